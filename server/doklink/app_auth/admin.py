@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
-from .models import UserProfile, Address, UserAgreement, OTPVerification, LoginAudit
+from .models import UserProfile, Address, UserAgreement, OTPVerification, OutboundMessage, LoginAudit
 
 
 class AddressInline(admin.TabularInline):
@@ -222,6 +222,23 @@ class OTPVerificationAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('user')
 
 
+@admin.register(OutboundMessage)
+class OutboundMessageAdmin(admin.ModelAdmin):
+    """Outbox (queued OTP / account emails and SMS) Admin"""
+    
+    list_display = [
+        'message_id', 'channel', 'destination', 'purpose', 'status',
+        'attempts', 'next_attempt_at', 'created_at', 'sent_at'
+    ]
+    list_filter = ['channel', 'status', 'purpose', 'created_at']
+    search_fields = ['destination', 'user__email', 'user__username', 'message_id']
+    readonly_fields = ['message_id', 'created_at', 'sent_at', 'last_error']
+    ordering = ['-created_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+
+
 @admin.register(LoginAudit)
 class LoginAuditAdmin(admin.ModelAdmin):
     """Enhanced admin for Login Audit tracking"""
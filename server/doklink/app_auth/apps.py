@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AuthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_auth'
+
+    def ready(self):
+        import app_auth.signals  # noqa: F401
@@ -0,0 +1,194 @@
+# app_auth/audit_buffer.py
+"""
+Buffered, batched LoginAudit writes.
+
+LoginAudit.log_attempt() hands events to a process-wide buffer instead of
+doing one INSERT per login / OTP attempt. A background thread flushes the
+buffer with bulk_create when it reaches LOGIN_AUDIT_FLUSH_SIZE events or every
+LOGIN_AUDIT_FLUSH_SECONDS, and again at interpreter exit (graceful shutdown).
+
+Backends (AUDIT_SETTINGS['LOGIN_AUDIT_BUFFER']):
+- 'memory': per-process list; events are lost only if the process is killed.
+- 'redis':  shared Redis list; events survive worker restarts and any
+            process may flush them. Falls back to a direct INSERT if Redis
+            is unreachable.
+
+Set AUDIT_SETTINGS['LOGIN_AUDIT_SYNC'] = True for strict compliance setups
+that require every attempt to be committed before the response is sent.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, InterfaceError, OperationalError, close_old_connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = 'audit:login_attempts'
+
+
+def _audit_settings():
+    return settings.AUDIT_SETTINGS
+
+
+class MemoryAuditBuffer:
+    """Per-process in-memory buffer."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+
+    def push(self, event):
+        with self._lock:
+            self._events.append(event)
+            return len(self._events)
+
+    def pop_batch(self, size):
+        with self._lock:
+            batch, self._events = self._events[:size], self._events[size:]
+        return batch
+
+    def requeue(self, events):
+        with self._lock:
+            self._events[:0] = events
+
+
+class RedisAuditBuffer:
+    """Redis list shared by all processes."""
+
+    def _redis(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection("default")
+
+    def push(self, event):
+        return self._redis().rpush(REDIS_KEY, json.dumps(event, default=str))
+
+    def pop_batch(self, size):
+        # Read and trim in one MULTI so concurrent flushers never double-write
+        pipe = self._redis().pipeline(transaction=True)
+        pipe.lrange(REDIS_KEY, 0, size - 1)
+        pipe.ltrim(REDIS_KEY, size, -1)
+        raw_events, _ = pipe.execute()
+        return [self._decode(raw) for raw in raw_events]
+
+    def requeue(self, events):
+        self._redis().lpush(REDIS_KEY, *[json.dumps(e, default=str) for e in reversed(events)])
+
+    def _decode(self, raw):
+        event = json.loads(raw)
+        event['attempted_at'] = parse_datetime(event['attempted_at'])
+        return event
+
+
+class AuditFlusher:
+    """Owns the buffer and the background thread that drains it."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def add(self, event):
+        self._ensure_thread()
+        if self.buffer.push(event) >= _audit_settings()['LOGIN_AUDIT_FLUSH_SIZE']:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write every buffered event. Returns the number of rows inserted."""
+        from .models import LoginAudit
+
+        size = _audit_settings()['LOGIN_AUDIT_FLUSH_SIZE']
+        written = 0
+        with self._flush_lock:
+            while True:
+                events = self.buffer.pop_batch(size)
+                if not events:
+                    break
+                try:
+                    LoginAudit.objects.bulk_create([LoginAudit(**event) for event in events])
+                    written += len(events)
+                except (OperationalError, InterfaceError) as e:
+                    # Database unavailable: keep the events for the next flush
+                    logger.error(f"LoginAudit flush of {len(events)} event(s) failed, will retry: {e}")
+                    self.buffer.requeue(events)
+                    break
+                except DatabaseError as e:
+                    # A bad row (e.g. user deleted meanwhile) must not block the batch
+                    logger.error(f"LoginAudit bulk flush failed, writing rows individually: {e}")
+                    written += self._write_individually(events)
+        return written
+
+    def _write_individually(self, events):
+        from .models import LoginAudit
+
+        written = 0
+        for event in events:
+            try:
+                LoginAudit.objects.create(**event)
+                written += 1
+            except DatabaseError as e:
+                logger.error(f"Dropping LoginAudit event for {event.get('email_attempted')}: {e}")
+        return written
+
+    def _ensure_thread(self):
+        # Forked workers inherit the object but not the thread
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name='login-audit-flusher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(_audit_settings()['LOGIN_AUDIT_FLUSH_SECONDS'])
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"LoginAudit flusher error: {e}")
+            finally:
+                close_old_connections()
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def get_flusher():
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            backend = _audit_settings().get('LOGIN_AUDIT_BUFFER', 'memory')
+            _flusher = AuditFlusher(RedisAuditBuffer() if backend == 'redis' else MemoryAuditBuffer())
+            atexit.register(_flush_at_exit)
+    return _flusher
+
+
+def _flush_at_exit():
+    try:
+        written = _flusher.flush()
+        if written:
+            logger.info(f"Flushed {written} buffered LoginAudit event(s) at shutdown")
+    except Exception as e:
+        logger.error(f"LoginAudit flush at shutdown failed: {e}")
+
+
+def buffer_login_attempt(fields):
+    """
+    Queue one LoginAudit row (a dict of model field values).
+    Returns False if the event could not be buffered and should be written directly.
+    """
+    fields.setdefault('attempted_at', timezone.now())
+    try:
+        get_flusher().add(fields)
+        return True
+    except Exception as e:
+        logger.warning(f"LoginAudit buffering failed, writing synchronously: {e}")
+        return False
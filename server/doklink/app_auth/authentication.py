@@ -0,0 +1,167 @@
+# app_auth/authentication.py
+"""
+JWT authentication without a User query on every request.
+
+simplejwt's JWTAuthentication loads the User row for each authenticated
+request. CachedJWTAuthentication validates the token exactly the same way
+(signature, expiry, token type) but resolves the user from a small snapshot
+of the User row kept in two tiers:
+
+- a per-process dict with a very short TTL (AUTH_USER_CACHE['LOCAL_TTL_SECONDS']),
+- the shared Redis cache (AUTH_USER_CACHE['TTL_SECONDS']),
+
+and only falls back to the database when both are cold.
+
+The returned user is a real User instance built with Model.from_db(), so
+related managers (user.profile, user.notifications, ...) and saves work as
+usual; fields not in the snapshot (e.g. password) are deferred and loaded on
+first access, and save() only writes loaded fields.
+
+Revocation is unchanged: refresh tokens are still blacklisted by
+token_blacklist, inactive users are still rejected, and with
+SIMPLE_JWT['CHECK_REVOKE_TOKEN'] the token's password-hash claim (its token
+version) is compared against the snapshot. Snapshots are dropped whenever the
+User is saved or deleted (see app_auth.signals); other processes' local tier
+catches up within LOCAL_TTL_SECONDS.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+logger = logging.getLogger(__name__)
+
+# Loaded on every request; everything else on the User row stays deferred
+SNAPSHOT_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name',
+    'is_active', 'is_staff', 'is_superuser', 'last_login', 'date_joined',
+)
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _cache_settings():
+    return settings.AUTH_USER_CACHE
+
+
+def _cache_key(user_id):
+    return f"auth_user:{user_id}"
+
+
+def _local_get(user_id):
+    with _local_lock:
+        entry = _local.get(user_id)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if expires_at < time.monotonic():
+            del _local[user_id]
+            return None
+        _local.move_to_end(user_id)
+        return snapshot
+
+
+def _local_set(user_id, snapshot):
+    with _local_lock:
+        _local[user_id] = (time.monotonic() + _cache_settings()['LOCAL_TTL_SECONDS'], snapshot)
+        _local.move_to_end(user_id)
+        while len(_local) > _cache_settings()['LOCAL_MAX_ENTRIES']:
+            _local.popitem(last=False)
+
+
+def _load_snapshot(user_id):
+    """Snapshot dict from the database, or None if the user does not exist."""
+    row = User.objects.filter(pk=user_id).values(*SNAPSHOT_FIELDS, 'password').first()
+    if row is None:
+        return None
+    password = row.pop('password')
+    # Only the hash-of-hash used by CHECK_REVOKE_TOKEN is cached, never the password hash
+    row['token_version'] = get_md5_hash_password(password) if api_settings.CHECK_REVOKE_TOKEN else ''
+    return row
+
+
+def get_user_snapshot(user_id):
+    """Cached snapshot of the User row: local tier, then Redis, then Postgres."""
+    snapshot = _local_get(user_id)
+    if snapshot is not None:
+        return snapshot
+
+    key = _cache_key(user_id)
+    try:
+        snapshot = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Auth user cache read failed for {user_id}: {e}")
+        snapshot = None
+
+    if snapshot is None:
+        snapshot = _load_snapshot(user_id)
+        if snapshot is None:
+            return None
+        try:
+            cache.set(key, snapshot, _cache_settings()['TTL_SECONDS'])
+        except Exception as e:
+            logger.warning(f"Auth user cache write failed for {user_id}: {e}")
+
+    _local_set(user_id, snapshot)
+    return snapshot
+
+
+def invalidate_user_snapshot(user_id):
+    """Drop a user's cached snapshot (this process and Redis)."""
+    with _local_lock:
+        _local.pop(user_id, None)
+    try:
+        cache.delete(_cache_key(user_id))
+    except Exception as e:
+        logger.warning(f"Auth user cache invalidation failed for {user_id}: {e}")
+
+
+def user_from_snapshot(snapshot):
+    """A User instance for the snapshot, as if loaded with .only(*SNAPSHOT_FIELDS)."""
+    # from_db() expects values in concrete field order
+    field_names = [f.attname for f in User._meta.concrete_fields if f.attname in SNAPSHOT_FIELDS]
+    return User.from_db(
+        router.db_for_read(User),
+        field_names,
+        [snapshot[name] for name in field_names],
+    )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the user from the auth user cache."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if api_settings.USER_ID_FIELD != 'id':
+            # Snapshots are keyed by primary key
+            return super().get_user(validated_token)
+
+        snapshot = get_user_snapshot(user_id)
+        if snapshot is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not snapshot['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != snapshot['token_version']:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user_from_snapshot(snapshot)
@@ -0,0 +1,188 @@
+# app_auth/blacklist.py
+"""
+Refresh-token blacklist: Bloom-filter pre-check and pruning.
+
+With ROTATE_REFRESH_TOKENS + BLACKLIST_AFTER_ROTATION every refresh adds an
+OutstandingToken and a BlacklistedToken row and first checks the blacklist
+table for the presented token.
+
+- A Bloom filter of blacklisted JTIs lives in a Redis bitmap. A token whose
+  bits are not all set is definitely not blacklisted, so the common refresh
+  skips the table; a (possible) hit is confirmed with the usual query.
+  JTIs are added just before a BlacklistedToken row is written (see
+  app_auth.signals), and if that fails the filter is deleted, so it never
+  reports a blacklisted token as clean. If Redis or the filter is missing
+  the check goes to the database, so revocation never depends on the filter.
+- `prune_expired_tokens()` deletes expired outstanding tokens and their
+  blacklist rows in small batches, then rebuilds the filter so it only
+  describes live tokens. Run it via `python manage.py prune_tokens`.
+"""
+import hashlib
+import logging
+import math
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+BLOOM_KEY = 'token_blacklist:bloom'
+BLOOM_BUILD_KEY = 'token_blacklist:bloom:building'
+
+
+def _blacklist_settings():
+    return settings.TOKEN_BLACKLIST_SETTINGS
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection("default")
+
+
+def _bloom_size():
+    """(bits, hash count) for BLOOM_CAPACITY entries at BLOOM_ERROR_RATE."""
+    capacity = _blacklist_settings()['BLOOM_CAPACITY']
+    error_rate = _blacklist_settings()['BLOOM_ERROR_RATE']
+    bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+def _bit_positions(jti):
+    # Double hashing (Kirsch-Mitzenmacher) from one SHA-256 digest
+    bits, hashes = _bloom_size()
+    digest = hashlib.sha256(str(jti).encode()).digest()
+    h1 = int.from_bytes(digest[:8], 'big')
+    h2 = int.from_bytes(digest[8:16], 'big') | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+def _add_to_filter(pipe, key, jti):
+    for position in _bit_positions(jti):
+        pipe.setbit(key, position, 1)
+
+
+def bloom_add(jti):
+    """
+    Record a blacklisted JTI in the filter (and in a filter being rebuilt).
+    Must run before the blacklist row is visible. If the bits cannot be set
+    the filter is dropped, so checks go to the database until the next rebuild.
+    """
+    if not _blacklist_settings()['BLOOM_FILTER']:
+        return
+    try:
+        redis = _redis()
+        # Never create a partial filter; the next rebuild will include this JTI
+        keys = [key for key in (BLOOM_KEY, BLOOM_BUILD_KEY) if redis.exists(key)]
+        if not keys:
+            return
+        pipe = redis.pipeline(transaction=False)
+        for key in keys:
+            _add_to_filter(pipe, key, jti)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Blacklist filter update failed for {jti}, dropping filter: {e}")
+        try:
+            _redis().delete(BLOOM_KEY, BLOOM_BUILD_KEY)
+        except Exception as e:
+            logger.error(f"Could not drop blacklist filter after failed update: {e}")
+
+
+def bloom_might_contain(jti):
+    """False only if the JTI is definitely not blacklisted; None if the filter is unavailable."""
+    if not _blacklist_settings()['BLOOM_FILTER']:
+        return None
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        pipe.exists(BLOOM_KEY)
+        for position in _bit_positions(jti):
+            pipe.getbit(BLOOM_KEY, position)
+        exists, *bits = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Blacklist filter check failed, using database: {e}")
+        return None
+    if not exists:
+        return None
+    return all(bits)
+
+
+def is_blacklisted(jti):
+    if bloom_might_contain(jti) is False:
+        return False
+    return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+def rebuild_filter():
+    """Rebuild the Bloom filter from the blacklist table. Returns the JTI count."""
+    bits, _hashes = _bloom_size()
+    # Margin covers blacklist rows inserted earlier but committed during the build
+    started_at = timezone.now() - timedelta(minutes=5)
+    redis = _redis()
+
+    redis.delete(BLOOM_BUILD_KEY)
+    # Allocate the full bitmap up front so an empty blacklist still yields a filter
+    redis.setbit(BLOOM_BUILD_KEY, bits - 1, 0)
+
+    count = 0
+    pipe = redis.pipeline(transaction=False)
+    jtis = BlacklistedToken.objects.values_list('token__jti', flat=True)
+    for jti in jtis.iterator(chunk_size=5000):
+        _add_to_filter(pipe, BLOOM_BUILD_KEY, jti)
+        count += 1
+        if count % 1000 == 0:
+            pipe.execute()
+    pipe.execute()
+
+    redis.rename(BLOOM_BUILD_KEY, BLOOM_KEY)
+
+    # Tokens blacklisted while building may have gone to the old filter
+    recent = BlacklistedToken.objects.filter(blacklisted_at__gte=started_at).values_list('token__jti', flat=True)
+    pipe = redis.pipeline(transaction=False)
+    for jti in recent:
+        _add_to_filter(pipe, BLOOM_KEY, jti)
+    pipe.execute()
+
+    return count
+
+
+def prune_expired_tokens(batch_size=None, sleep=0):
+    """
+    Delete expired outstanding tokens (and their blacklist rows) in batches.
+    Returns (outstanding_deleted, blacklisted_deleted).
+    """
+    batch_size = batch_size or _blacklist_settings()['PRUNE_BATCH_SIZE']
+    now = timezone.now()
+    # Old ids expire first, so walking the primary key finds each batch quickly
+    expired = OutstandingToken.objects.filter(expires_at__lt=now).order_by('id')
+
+    outstanding_deleted = blacklisted_deleted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(expired.select_for_update(skip_locked=True).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            blacklisted_deleted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+            outstanding_deleted += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+
+        if len(ids) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+
+    return outstanding_deleted, blacklisted_deleted
+
+
+class FilteredRefreshToken(RefreshToken):
+    """RefreshToken whose blacklist check consults the Bloom filter first."""
+
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
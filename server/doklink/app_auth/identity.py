@@ -0,0 +1,119 @@
+# app_auth/identity.py
+"""
+Single resolver for login identifiers (email / phone / username) -> User.
+
+- The identifier is normalised first (lowercased email/username, phone in
+  E.164), so every lookup is one exact-match query instead of the previous
+  per-view `phone_number__endswith` scans.
+- Resolved user ids are cached briefly; "not found" is cached too, so
+  enumeration floods against the unauthenticated endpoints don't reach
+  Postgres. Cache keys hash the identifier so no PII ends up in Redis.
+- Cached entries are dropped when a User or UserProfile is saved (see
+  app_auth.signals), and a cached id is re-checked against the identifier
+  on every hit, so a stale entry can never resolve to the wrong account.
+"""
+import hashlib
+import logging
+import re
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+LOGIN_METHODS = ('email', 'phone', 'username')
+
+# Stored in the cache for identifiers with no account
+NOT_FOUND = 0
+
+
+def normalize_identifier(login_method, login_field):
+    """Canonical form of a login identifier, or None if it cannot match any account."""
+    if not login_field or login_method not in LOGIN_METHODS:
+        return None
+
+    value = str(login_field).strip()
+    if login_method in ('email', 'username'):
+        return value.lower()
+
+    # Phone numbers are stored in E.164; accept 10 digits, 91XXXXXXXXXX or +91XXXXXXXXXX
+    digits = re.sub(r'\D', '', value)
+    if len(digits) == 10:
+        return f'+91{digits}'
+    if len(digits) == 12 and digits.startswith('91'):
+        return f'+{digits}'
+    if value.startswith('+') and digits:
+        return f'+{digits}'
+    return None
+
+
+def _as_e164(phone_number):
+    # PhoneNumber.__str__ follows PHONENUMBER_DEFAULT_FORMAT (NATIONAL here)
+    return getattr(phone_number, 'as_e164', None) or str(phone_number)
+
+
+def _cache_key(login_method, normalized):
+    digest = hashlib.sha256(normalized.encode()).hexdigest()[:32]
+    return f"login_identity:{login_method}:{digest}"
+
+
+def _lookup(login_method, normalized):
+    users = User.objects.select_related('profile')
+    if login_method == 'email':
+        return users.filter(email=normalized).first()
+    if login_method == 'username':
+        return users.filter(username=normalized).first()
+    return users.filter(profile__phone_number=normalized).first()
+
+
+def _matches(user, login_method, normalized):
+    if login_method == 'email':
+        return (user.email or '').lower() == normalized
+    if login_method == 'username':
+        return user.username == normalized
+    profile = getattr(user, 'profile', None)
+    return profile is not None and bool(profile.phone_number) and _as_e164(profile.phone_number) == normalized
+
+
+def resolve_login_user(login_method, login_field):
+    """
+    Return the User for a login identifier, or None if no account matches.
+    Inactive users are returned; callers decide how to report them.
+    """
+    normalized = normalize_identifier(login_method, login_field)
+    if normalized is None:
+        return None
+
+    ttl = settings.LOGIN_IDENTITY_CACHE
+    key = _cache_key(login_method, normalized)
+    cached = cache.get(key)
+
+    if cached == NOT_FOUND:
+        return None
+
+    if cached:
+        user = User.objects.select_related('profile').filter(pk=cached).first()
+        if user is not None and _matches(user, login_method, normalized):
+            return user
+        # Identifier changed or user deleted since it was cached
+
+    user = _lookup(login_method, normalized)
+    if user is None:
+        cache.set(key, NOT_FOUND, ttl['NEGATIVE_TTL_SECONDS'])
+    else:
+        cache.set(key, user.pk, ttl['POSITIVE_TTL_SECONDS'])
+    return user
+
+
+def invalidate_login_identity(user, phone_number=None):
+    """Drop cached resolutions for all of a user's current identifiers."""
+    keys = []
+    if user.email:
+        keys.append(_cache_key('email', user.email.lower()))
+    if user.username:
+        keys.append(_cache_key('username', user.username.lower()))
+    if phone_number:
+        keys.append(_cache_key('phone', _as_e164(phone_number)))
+    if keys:
+        cache.delete_many(keys)
@@ -0,0 +1,131 @@
+# app_auth/lockout.py
+"""
+Brute-force protection for the login endpoints using Redis sliding windows.
+
+Every failed attempt is recorded against two counters, the login identifier
+and the client IP, each a sorted set of attempt timestamps trimmed to
+RATE_LIMITING['LOGIN_ATTEMPT_WINDOW_MINUTES']. One Lua call updates both
+and sets a lock key (TTL = LOCKOUT_DURATION) once a limit is reached, so:
+
+- checking a lockout is a single PTTL round trip and never touches LoginAudit;
+- the counts travel with the (buffered) LoginAudit row as
+  failed_attempts_count / is_suspicious.
+
+If Redis is unavailable the checks fail open and logins proceed normally.
+"""
+import hashlib
+import logging
+import time
+import uuid
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# KEYS: id_attempts, id_lock, ip_attempts, ip_lock
+# ARGV: now_ms, window_ms, member, lock_ms, id_limit, ip_limit
+# Returns {id_count, ip_count}
+_RECORD_FAILURE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local counts = {}
+for i = 0, 1 do
+    local attempts_key = KEYS[i * 2 + 1]
+    local lock_key = KEYS[i * 2 + 2]
+    redis.call('ZREMRANGEBYSCORE', attempts_key, '-inf', now - window)
+    redis.call('ZADD', attempts_key, now, ARGV[3])
+    redis.call('PEXPIRE', attempts_key, window)
+    local count = redis.call('ZCARD', attempts_key)
+    if count >= tonumber(ARGV[5 + i]) then
+        redis.call('SET', lock_key, count, 'PX', ARGV[4])
+    end
+    counts[i + 1] = count
+end
+return counts
+"""
+
+
+def _limits():
+    return settings.RATE_LIMITING
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection("default")
+
+
+def _identifier_hash(identifier):
+    return hashlib.sha256(str(identifier).lower().encode()).hexdigest()[:32]
+
+
+def _keys(identifier, ip_address):
+    ident = _identifier_hash(identifier)
+    return [
+        f"lockout:attempts:id:{ident}",
+        f"lockout:lock:id:{ident}",
+        f"lockout:attempts:ip:{ip_address}",
+        f"lockout:lock:ip:{ip_address}",
+    ]
+
+
+def lockout_identifier(login_method, login_field):
+    """Counter identity for a login attempt: the normalised identifier when possible."""
+    from .identity import normalize_identifier
+
+    normalized = normalize_identifier(login_method, login_field)
+    return f"{login_method}:{normalized or str(login_field or '').strip().lower()}"
+
+
+def lockout_remaining(identifier, ip_address):
+    """Seconds until the identifier / IP may try again, or 0 if not locked."""
+    _, id_lock, _, ip_lock = _keys(identifier, ip_address)
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        pipe.pttl(id_lock)
+        pipe.pttl(ip_lock)
+        remaining_ms = max(pipe.execute())
+    except Exception as e:
+        logger.warning(f"Lockout check failed, allowing attempt: {e}")
+        return 0
+    return (remaining_ms + 999) // 1000 if remaining_ms > 0 else 0
+
+
+def record_failure(identifier, ip_address):
+    """
+    Count a failed attempt. Returns the LoginAudit fields describing it:
+    failed_attempts_count (identifier window) and is_suspicious.
+    """
+    window_ms = _limits()['LOGIN_ATTEMPT_WINDOW_MINUTES'] * 60 * 1000
+    lock_ms = _limits()['LOCKOUT_DURATION'] * 60 * 1000
+    id_limit = _limits()['LOGIN_ATTEMPT_LIMIT']
+    ip_limit = _limits()['IP_ATTEMPT_LIMIT']
+
+    try:
+        script = _redis().register_script(_RECORD_FAILURE_SCRIPT)
+        id_count, ip_count = script(
+            keys=_keys(identifier, ip_address),
+            args=[int(time.time() * 1000), window_ms, uuid.uuid4().hex, lock_ms, id_limit, ip_limit],
+        )
+    except Exception as e:
+        logger.warning(f"Lockout counter update failed: {e}")
+        return {}
+
+    if id_count >= id_limit or ip_count >= ip_limit:
+        logger.warning(
+            f"Login lockout triggered for ip {ip_address}: "
+            f"{id_count} identifier / {ip_count} IP failures in window"
+        )
+
+    return {
+        'failed_attempts_count': id_count,
+        'is_suspicious': id_count >= id_limit or ip_count >= ip_limit,
+    }
+
+
+def reset_failures(identifier):
+    """Clear the identifier's window after a successful login (IP window is kept)."""
+    attempts_key, lock_key, _, _ = _keys(identifier, '')
+    try:
+        _redis().delete(attempts_key, lock_key)
+    except Exception as e:
+        logger.warning(f"Lockout reset failed: {e}")
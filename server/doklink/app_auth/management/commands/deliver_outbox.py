@@ -0,0 +1,78 @@
+"""
+Management command to deliver queued OTP / account emails and SMS from the outbox.
+Run it as a long-lived worker, or periodically via cron job or scheduler:
+
+    python manage.py deliver_outbox --loop
+    python manage.py deliver_outbox            # drain due messages once and exit
+
+Each batch reuses one SMTP connection and one HTTP session; failed messages are
+retried with exponential backoff (see OUTBOX_SETTINGS).
+"""
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from app_auth.outbox import deliver_due, get_sms_session
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending outbox messages (OTP / account emails and SMS)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.OUTBOX_SETTINGS['BATCH_SIZE'],
+            help='Messages claimed per batch'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new messages instead of exiting when idle'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when idle (with --loop, default: 2)'
+        )
+
+    def handle(self, *args, **options):
+        # Pooled for the lifetime of the worker
+        email_connection = get_connection()
+        sms_session = get_sms_session()
+        totals = {'claimed': 0, 'sent': 0, 'retry': 0, 'failed': 0}
+
+        try:
+            while True:
+                result = deliver_due(
+                    batch_size=options['batch_size'],
+                    email_connection=email_connection,
+                    sms_session=sms_session,
+                )
+                for key in totals:
+                    totals[key] += result[key]
+
+                if result['claimed']:
+                    self.stdout.write(
+                        f"Delivered batch: {result['sent']} sent, "
+                        f"{result['retry']} to retry, {result['failed']} failed"
+                    )
+                    continue
+
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping outbox worker')
+        finally:
+            email_connection.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {totals['claimed']} message(s): {totals['sent']} sent, "
+                f"{totals['retry']} to retry, {totals['failed']} failed"
+            )
+        )
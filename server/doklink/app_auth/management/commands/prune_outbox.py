@@ -0,0 +1,47 @@
+"""
+Management command to delete delivered and permanently failed outbox messages
+older than the retention period. Run this periodically via cron job or
+scheduler, e.g. nightly:
+
+    python manage.py prune_outbox
+    python manage.py prune_outbox --days 3
+
+Message bodies are already blanked when a message becomes final; this keeps
+the table itself small. Pending and retrying messages are never touched.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app_auth.outbox import prune_final
+
+
+class Command(BaseCommand):
+    help = 'Delete sent/failed outbox messages older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.OUTBOX_SETTINGS['RETENTION_DAYS'],
+            help=f"Keep this many days of final messages (default: {settings.OUTBOX_SETTINGS['RETENTION_DAYS']})"
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Messages deleted per batch (default: 1000)'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.5,
+            help='Seconds to pause between batches so vacuum can keep up (default: 0.5)'
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_final(
+            days=options['days'],
+            batch_size=options['batch_size'],
+            sleep=options['sleep'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} outbox message(s) older than {options['days']} days"))
@@ -0,0 +1,60 @@
+"""
+Management command to prune expired JWT outstanding / blacklisted tokens in chunks
+and rebuild the blacklist Bloom filter. Run this periodically via cron job or
+scheduler, e.g. nightly:
+
+    python manage.py prune_tokens
+    python manage.py prune_tokens --rebuild-only    # (re)create the filter, e.g. after a Redis flush
+
+Rows are deleted in small batches, each in its own transaction, so locks stay
+short and autovacuum can reclaim dead tuples between batches (--sleep).
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app_auth.blacklist import prune_expired_tokens, rebuild_filter
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding/blacklisted JWTs in chunks and rebuild the blacklist filter'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.TOKEN_BLACKLIST_SETTINGS['PRUNE_BATCH_SIZE'],
+            help='Outstanding tokens deleted per transaction'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.5,
+            help='Seconds to pause between batches so vacuum can keep up (default: 0.5)'
+        )
+        parser.add_argument(
+            '--rebuild-only',
+            action='store_true',
+            help='Only rebuild the Bloom filter, do not delete anything'
+        )
+
+    def handle(self, *args, **options):
+        if not options['rebuild_only']:
+            outstanding, blacklisted = prune_expired_tokens(
+                batch_size=options['batch_size'],
+                sleep=options['sleep'],
+            )
+            self.stdout.write(
+                f'Deleted {outstanding} expired outstanding token(s) '
+                f'and {blacklisted} blacklist entr{"y" if blacklisted == 1 else "ies"}'
+            )
+
+        if not settings.TOKEN_BLACKLIST_SETTINGS['BLOOM_FILTER']:
+            return
+
+        try:
+            count = rebuild_filter()
+        except Exception as e:
+            self.stderr.write(f'Failed to rebuild blacklist filter: {e}')
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt blacklist filter with {count} token(s)'))
@@ -0,0 +1,33 @@
+"""
+Management command to report allowed / denied request counts per throttle scope:
+
+    python manage.py throttle_metrics
+    python manage.py throttle_metrics --reset    # report, then start counting afresh
+"""
+from django.core.management.base import BaseCommand
+
+from doklink.throttling import get_throttle_metrics
+
+
+class Command(BaseCommand):
+    help = 'Show allowed/denied request counts per DRF throttle scope'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the counters after reporting them'
+        )
+
+    def handle(self, *args, **options):
+        metrics = get_throttle_metrics(reset=options['reset'])
+
+        for scope, counts in metrics.items():
+            total = counts['allowed'] + counts['denied']
+            denied_pct = counts['denied'] / total * 100 if total else 0
+            self.stdout.write(
+                f"{scope:<16} {counts['allowed']:>10} allowed {counts['denied']:>8} denied ({denied_pct:.1f}%)"
+            )
+
+        if options['reset']:
+            self.stdout.write(self.style.SUCCESS('Throttle counters reset'))
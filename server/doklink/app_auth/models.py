@@ -306,6 +306,9 @@ class OTPVerification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     is_used = models.BooleanField(default=False)
+    # Set only when the code was actually verified; is_used is also set when a
+    # code is superseded, and on audit rows for codes that live in Redis
+    verified_at = models.DateTimeField(null=True, blank=True)
     attempts = models.IntegerField(default=0)
     max_attempts = models.IntegerField(default=3)
 
@@ -345,6 +348,69 @@ class OTPVerification(models.Model):
         return f"{self.user.email} - {self.get_otp_type_display()} OTP ({self.delivery_method})"
 
 
+class OutboundMessage(models.Model):
+    """
+    Transactional outbox for OTP and account emails/SMS.
+
+    Rows are written in the same transaction as the action that triggers them
+    and delivered afterwards by app_auth.outbox (in-process after commit, or
+    the `deliver_outbox` worker), so requests never wait on SMTP or Fast2SMS.
+    """
+    
+    CHANNEL_CHOICES = [
+        ('email', 'Email'),
+        ('sms', 'SMS'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent Successfully'),
+        ('retry', 'Retrying'),
+        ('failed', 'Delivery Failed'),
+    ]
+    
+    message_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False, help_text="Public id clients poll for delivery status")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='outbound_messages')
+    otp = models.ForeignKey(
+        OTPVerification,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='outbound_messages',
+        help_text="OTP delivered by this message (database OTP store only)"
+    )
+    purpose = models.CharField(max_length=30, blank=True, help_text="OTP type or message kind, e.g. 'welcome'")
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    destination = models.CharField(max_length=255, help_text="Email address or phone number")
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Outbound Message"
+        verbose_name_plural = "Outbound Messages"
+        indexes = [
+            # Worker claim query: WHERE status IN (...) AND next_attempt_at <= now
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['created_at']),
+        ]
+
+    @property
+    def delivery_status(self):
+        """Client-facing status: in-flight and retrying messages are still 'pending'"""
+        return 'pending' if self.status in ('pending', 'sending', 'retry') else self.status
+
+    def __str__(self):
+        return f"{self.get_channel_display()} to {self.destination} ({self.status})"
+
+
 class LoginAudit(models.Model):
     """Comprehensive audit trail for login attempts"""
     
@@ -381,8 +447,8 @@ class LoginAudit(models.Model):
         help_text="OTP used for this login (if any)"
     )
     
-    # Timestamps
-    attempted_at = models.DateTimeField(auto_now_add=True)
+    # Timestamps (set when the attempt happens, not when a buffered row is flushed)
+    attempted_at = models.DateTimeField(default=timezone.now, editable=False)
     session_duration = models.DurationField(null=True, blank=True)  # For logout tracking
 
     class Meta:
@@ -407,19 +473,33 @@ class LoginAudit(models.Model):
         Accepts either `otp` (legacy) or `otp_used` (new) keyword for the OTP record so
         that older call-sites do not break. The first non-None value among the two is
         persisted in the `otp_used` field.
+
+        Unless AUDIT_SETTINGS['LOGIN_AUDIT_SYNC'] is set, the row is buffered and
+        written in batches by app_auth.audit_buffer; the returned instance is then
+        unsaved.
         """
+        from django.conf import settings
+        from .audit_buffer import buffer_login_attempt
+
         # Backwards compatibility for both `otp` and `otp_used` keyword arguments
         otp_record = otp if otp is not None else otp_used
 
-        return cls.objects.create(
-            user=user,
-            email_attempted=email,
-            status=status,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            otp_used=otp_record,
+        fields = {
+            'user_id': user.pk if user is not None else None,
+            'email_attempted': email,
+            'status': status,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            # Audit rows of the Redis OTP store may not be written yet
+            'otp_used_id': otp_record.pk if otp_record is not None else None,
+            'attempted_at': timezone.now(),
             **kwargs
-        )
+        }
+
+        if not settings.AUDIT_SETTINGS.get('LOGIN_AUDIT_SYNC') and buffer_login_attempt(dict(fields)):
+            return cls(**fields)
+
+        return cls.objects.create(**fields)
 
     def mark_suspicious(self, reason=""):
         """Mark this login attempt as suspicious"""
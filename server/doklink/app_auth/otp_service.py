@@ -1,12 +1,9 @@
 # app_auth/otp_service.py
 import random
 import string
-import requests
-from django.core.mail import send_mail
-from django.conf import settings
-from django.utils import timezone
-from datetime import timedelta
-from .models import OTPVerification
+from django.db import transaction
+from . import outbox
+from .otp_store import get_otp_store
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,32 +18,21 @@ class OTPService:
         return ''.join(random.choices(string.digits, k=length))
     
     @staticmethod
-    def create_otp_record(user, otp_type, delivery_method='auto', otp_length=6):
-        """Create OTP record in database"""
-        # Invalidate any existing OTPs of the same type for this user
-        OTPVerification.objects.filter(
-            user=user, 
-            otp_type=otp_type, 
-            is_used=False
-        ).update(is_used=True)
+    def create_otp_record(user, otp_type, delivery_method='auto', otp_length=6, otp_code=None):
+        """Issue a new OTP via the configured store, replacing any live one"""
+        if otp_code is None:
+            otp_code = OTPService.generate_otp(otp_length)
         
-        # Generate new OTP
-        otp_code = OTPService.generate_otp(otp_length)
-        
-        # Create new OTP record
-        otp_record = OTPVerification.objects.create(
-            user=user,
-            otp_type=otp_type,
-            otp_code=otp_code,
-            delivery_method=delivery_method,
-            expires_at=timezone.now() + timedelta(minutes=10)
-        )
-        
-        return otp_record
+        return get_otp_store().issue(user, otp_type, otp_code, delivery_method)
+    
+    @staticmethod
+    def record_delivery(otp_record, delivery_status, destination=''):
+        """Record the delivery outcome of an OTP (written behind when using Redis)"""
+        get_otp_store().record_delivery(otp_record, delivery_status, destination)
     
     @staticmethod
     def send_email_otp(otp_record, subject_template="OTP Verification"):
-        """Send OTP via email"""
+        """Queue OTP email in the outbox; returns (success, message, outbound_message)"""
         try:
             subject = f"{subject_template} - DokLink"
             message = f"""
@@ -60,150 +46,121 @@ Best regards,
 DokLink Team
             """
             
-            send_mail(
-                subject,
+            outbound = outbox.enqueue(
+                'email',
+                otp_record.user.email,
                 message,
-                settings.DEFAULT_FROM_EMAIL,
-                [otp_record.user.email],
-                fail_silently=False,
+                subject=subject,
+                user=otp_record.user,
+                purpose=otp_record.otp_type,
+                otp_record=otp_record,
             )
             
-            # Update delivery status
-            otp_record.delivery_status = 'sent'
-            otp_record.delivery_destination = otp_record.user.email
-            otp_record.save()
+            # Delivery status is updated by the outbox worker
+            OTPService.record_delivery(otp_record, 'pending', otp_record.user.email)
             
-            logger.info(f"Email OTP sent successfully to {otp_record.user.email}")
-            return True, f"OTP sent to {OTPService.mask_email(otp_record.user.email)}"
+            logger.info(f"Email OTP queued for {otp_record.user.email}")
+            return True, f"OTP sent to {OTPService.mask_email(otp_record.user.email)}", outbound
             
         except Exception as e:
-            otp_record.delivery_status = 'failed'
-            otp_record.save()
-            logger.error(f"Failed to send email OTP: {e}")
-            return False, "Failed to send OTP via email"
+            logger.error(f"Failed to queue email OTP: {e}")
+            return False, "Failed to send OTP via email", None
     
     @staticmethod
     def send_sms_otp(otp_record, phone_number):
-        """Send OTP via SMS using Fast2SMS"""
+        """Queue OTP SMS (Fast2SMS) in the outbox; returns (success, message, outbound_message)"""
         try:
-            # Fast2SMS API configuration
-            api_key = settings.FAST2SMS_API_KEY
-            url = "https://www.fast2sms.com/dev/bulkV2"
-            
-            # Clean phone number (remove +91 if present)
-            clean_phone = phone_number
-            if phone_number.startswith('+91'):
-                clean_phone = phone_number[3:]
-            elif phone_number.startswith('91'):
-                clean_phone = phone_number[2:]
-            
             message = f"Your DokLink verification code is {otp_record.otp_code}. Valid for 10 minutes. Do not share with anyone."
             
-            payload = {
-                "authorization": api_key,
-                "sender_id": "DOKLIK",  # Your sender ID from Fast2SMS
-                "message": message,
-                "language": "english",
-                "route": "q",
-                "numbers": clean_phone,
-            }
-            
-            headers = {
-                'authorization': api_key,
-                'Content-Type': "application/x-www-form-urlencoded",
-                'Cache-Control': "no-cache",
-            }
+            outbound = outbox.enqueue(
+                'sms',
+                phone_number,
+                message,
+                user=otp_record.user,
+                purpose=otp_record.otp_type,
+                otp_record=otp_record,
+            )
             
-            response = requests.post(url, data=payload, headers=headers, timeout=30)
+            # Delivery status is updated by the outbox worker
+            OTPService.record_delivery(otp_record, 'pending', phone_number)
             
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('return'):
-                    # Update delivery status
-                    otp_record.delivery_status = 'sent'
-                    otp_record.delivery_destination = phone_number
-                    otp_record.save()
-                    
-                    logger.info(f"SMS OTP sent successfully to {phone_number}")
-                    return True, f"OTP sent to {OTPService.mask_phone(phone_number)}"
-                else:
-                    raise Exception(f"Fast2SMS API error: {result.get('message', 'Unknown error')}")
-            else:
-                raise Exception(f"HTTP {response.status_code}: {response.text}")
+            logger.info(f"SMS OTP queued for {phone_number}")
+            return True, f"OTP sent to {OTPService.mask_phone(phone_number)}", outbound
                 
         except Exception as e:
-            otp_record.delivery_status = 'failed'
-            otp_record.save()
-            logger.error(f"Failed to send SMS OTP: {e}")
-            return False, "Failed to send OTP via SMS"
+            logger.error(f"Failed to queue SMS OTP: {e}")
+            return False, "Failed to send OTP via SMS", None
     
     @staticmethod
-    def send_otp(user, otp_type, delivery_method='auto', phone_number=None, email_subject="OTP Verification"):
-        """Main method to send OTP based on delivery method"""
+    def queue_otp(user, otp_type, delivery_method='auto', phone_number=None, email_subject="OTP Verification"):
+        """
+        Issue an OTP and queue its delivery in one transaction.
+        Returns (success, message, outbound_message); clients poll the
+        outbound message for delivery status.
+        """
         try:
-            # Create OTP record
-            otp_record = OTPService.create_otp_record(user, otp_type, delivery_method)
-            
-            # Determine delivery method if auto
-            if delivery_method == 'auto':
-                if otp_type == 'phone' or (phone_number and delivery_method != 'email'):
-                    delivery_method = 'sms'
+            with transaction.atomic():
+                # Create OTP record
+                otp_record = OTPService.create_otp_record(user, otp_type, delivery_method)
+                
+                # Determine delivery method if auto
+                if delivery_method == 'auto':
+                    if otp_type == 'phone' or (phone_number and delivery_method != 'email'):
+                        delivery_method = 'sms'
+                    else:
+                        delivery_method = 'email'
+                
+                # Queue based on method
+                if delivery_method == 'email':
+                    return OTPService.send_email_otp(otp_record, email_subject)
+                elif delivery_method == 'sms':
+                    if not phone_number:
+                        # Get phone from user profile
+                        phone_number = str(user.profile.phone_number)
+                    return OTPService.send_sms_otp(otp_record, phone_number)
                 else:
-                    delivery_method = 'email'
-            
-            # Send based on method
-            if delivery_method == 'email':
-                return OTPService.send_email_otp(otp_record, email_subject)
-            elif delivery_method == 'sms':
-                if not phone_number:
-                    # Get phone from user profile
-                    phone_number = str(user.profile.phone_number)
-                return OTPService.send_sms_otp(otp_record, phone_number)
-            else:
-                raise ValueError(f"Invalid delivery method: {delivery_method}")
+                    raise ValueError(f"Invalid delivery method: {delivery_method}")
                 
         except Exception as e:
             logger.error(f"Failed to send OTP: {e}")
-            return False, "Failed to send OTP. Please try again."
+            return False, "Failed to send OTP. Please try again.", None
+    
+    @staticmethod
+    def send_otp(user, otp_type, delivery_method='auto', phone_number=None, email_subject="OTP Verification"):
+        """Main method to send OTP based on delivery method"""
+        success, message, _ = OTPService.queue_otp(user, otp_type, delivery_method, phone_number, email_subject)
+        return success, message
     
     @staticmethod
     def verify_otp(user, otp_code, otp_type):
         """Verify OTP code"""
         try:
-            # Find valid OTP
-            otp_record = OTPVerification.objects.filter(
-                user=user,
-                otp_type=otp_type,
-                otp_code=otp_code,
-                is_used=False
-            ).first()
-            
-            if not otp_record:
-                return False, "Invalid OTP code"
-            
-            # Check if expired
-            if otp_record.is_expired():
-                return False, "OTP has expired. Please request a new one."
-            
-            # Check attempts
-            otp_record.attempts += 1
-            otp_record.save()
-            
-            if otp_record.attempts > otp_record.max_attempts:
-                otp_record.is_used = True
-                otp_record.save()
-                return False, "Too many attempts. Please request a new OTP."
-            
-            # Mark as used
-            otp_record.is_used = True
-            otp_record.save()
-            
-            return True, "OTP verified successfully"
+            return get_otp_store().verify(user, otp_code, otp_type)
             
         except Exception as e:
             logger.error(f"OTP verification error: {e}")
             return False, "OTP verification failed"
     
+    @staticmethod
+    def get_verified_record(user, otp_type, otp_code):
+        """Return the audit record of a verified OTP, if it has been written yet"""
+        return get_otp_store().verified_record(user, otp_type, otp_code)
+    
+    @staticmethod
+    def issue_reset_token(user, otp_code):
+        """Issue a short-lived password reset token after a verified reset OTP"""
+        return get_otp_store().issue_reset_token(user, otp_code)
+    
+    @staticmethod
+    def resolve_reset_token(reset_token):
+        """Return the user a reset token was issued to, or None if invalid/expired"""
+        return get_otp_store().resolve_reset_token(reset_token)
+    
+    @staticmethod
+    def has_recent_verification(user, otp_type):
+        """Whether the user verified an OTP of this type within the reset window"""
+        return get_otp_store().has_recent_verification(user, otp_type)
+    
     @staticmethod
     def mask_email(email):
         """Mask email for privacy"""
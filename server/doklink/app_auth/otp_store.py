@@ -0,0 +1,287 @@
+# app_auth/otp_store.py
+"""
+Pluggable storage backends for OTP codes, used by OTPService.
+
+- DatabaseOTPStore (default): codes live in OTPVerification rows.
+- RedisOTPStore: codes live in a Redis hash with a native TTL and an atomic
+  attempts counter, so issuing and verifying an OTP touches no Postgres rows
+  on the request path. OTPVerification rows are still written, after commit
+  on a background thread, as an audit trail only.
+
+Select with settings.OTP_SETTINGS['BACKEND'] = 'database' | 'redis'.
+When Redis is unreachable the Redis store falls back to the database store.
+"""
+import logging
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import OTPVerification
+
+logger = logging.getLogger(__name__)
+
+# Password reset may be confirmed this long after the OTP was verified
+RESET_WINDOW = timedelta(minutes=15)
+
+
+def _expiry_minutes():
+    return settings.OTP_SETTINGS['DEFAULT_EXPIRY_MINUTES']
+
+
+def _max_attempts():
+    return settings.OTP_SETTINGS['MAX_ATTEMPTS']
+
+
+class DatabaseOTPStore:
+    """OTP codes stored in OTPVerification rows (original behaviour)."""
+
+    def issue(self, user, otp_type, otp_code, delivery_method):
+        # Invalidate any existing OTPs of the same type for this user
+        OTPVerification.objects.filter(
+            user=user,
+            otp_type=otp_type,
+            is_used=False
+        ).update(is_used=True)
+
+        return OTPVerification.objects.create(
+            user=user,
+            otp_type=otp_type,
+            otp_code=otp_code,
+            delivery_method=delivery_method,
+            expires_at=timezone.now() + timedelta(minutes=_expiry_minutes())
+        )
+
+    def record_delivery(self, otp_record, delivery_status, destination=''):
+        otp_record.delivery_status = delivery_status
+        if destination:
+            otp_record.delivery_destination = destination
+        otp_record.save(update_fields=['delivery_status', 'delivery_destination'])
+
+    def verify(self, user, otp_code, otp_type):
+        otp_record = OTPVerification.objects.filter(
+            user=user,
+            otp_type=otp_type,
+            otp_code=otp_code,
+            is_used=False
+        ).first()
+
+        if not otp_record:
+            return False, "Invalid OTP code"
+
+        if otp_record.is_expired():
+            return False, "OTP has expired. Please request a new one."
+
+        otp_record.attempts += 1
+        if otp_record.attempts > otp_record.max_attempts:
+            otp_record.is_used = True
+            otp_record.save(update_fields=['attempts', 'is_used'])
+            return False, "Too many attempts. Please request a new OTP."
+
+        otp_record.is_used = True
+        otp_record.verified_at = timezone.now()
+        otp_record.save(update_fields=['attempts', 'is_used', 'verified_at'])
+        return True, "OTP verified successfully"
+
+    def verified_record(self, user, otp_type, otp_code):
+        return OTPVerification.objects.filter(
+            user=user,
+            otp_type=otp_type,
+            otp_code=otp_code,
+            verified_at__isnull=False
+        ).order_by('-verified_at').first()
+
+    def issue_reset_token(self, user, otp_code):
+        otp_record = self.verified_record(user, 'password_reset', otp_code)
+        return str(otp_record.id) if otp_record else None
+
+    def resolve_reset_token(self, reset_token):
+        if not str(reset_token).isdigit():
+            return None
+        otp_record = OTPVerification.objects.filter(
+            id=reset_token,
+            otp_type='password_reset',
+            verified_at__gte=timezone.now() - RESET_WINDOW
+        ).select_related('user').first()
+        return otp_record.user if otp_record else None
+
+    def has_recent_verification(self, user, otp_type):
+        return OTPVerification.objects.filter(
+            user=user,
+            otp_type=otp_type,
+            verified_at__gte=timezone.now() - RESET_WINDOW
+        ).exists()
+
+
+# Atomically check an OTP and count the attempt.
+# Returns 1 = verified (code deleted), 0 = no live code,
+# -1 = too many attempts (code deleted), 2 = wrong code.
+_VERIFY_SCRIPT = """
+local code = redis.call('HGET', KEYS[1], 'code')
+if not code then
+    return 0
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if attempts > tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    return -1
+end
+if code == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+return 2
+"""
+
+# One worker keeps audit writes ordered; pending writes are flushed at exit.
+_audit_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='otp-audit')
+
+
+def _run_audit_write(fn):
+    try:
+        fn()
+    except Exception as e:
+        logger.error(f"OTP audit write failed: {e}")
+    finally:
+        close_old_connections()
+
+
+def _write_behind(fn):
+    """Run a DB write off the request path, once the current transaction commits."""
+    transaction.on_commit(lambda: _audit_executor.submit(_run_audit_write, fn))
+
+
+class RedisOTPStore:
+    """
+    OTP codes stored in Redis with native TTL and an atomic attempts counter.
+
+    Audit rows are written with is_used=True and no verified_at: Redis is the
+    source of truth for live codes, so these rows can neither be redeemed nor
+    count as a verification through the database fallback. Codes issued while
+    Redis was down are normal database OTPs.
+
+    Reset tokens are random Redis keys only; the database store's numeric
+    (row id) tokens are never accepted here, and a token that cannot be
+    stored in Redis is not issued at all.
+    """
+
+    def __init__(self):
+        self.fallback = DatabaseOTPStore()
+
+    def _redis(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection("default")
+
+    def _code_key(self, user_id, otp_type):
+        return f"otp:code:{user_id}:{otp_type}"
+
+    def _verified_key(self, user_id, otp_type):
+        return f"otp:verified:{user_id}:{otp_type}"
+
+    def _reset_key(self, reset_token):
+        return f"otp:reset:{reset_token}"
+
+    def issue(self, user, otp_type, otp_code, delivery_method):
+        ttl = _expiry_minutes() * 60
+        key = self._code_key(user.id, otp_type)
+        try:
+            # Replacing the hash invalidates the previous code, no UPDATE needed
+            pipe = self._redis().pipeline(transaction=True)
+            pipe.delete(key)
+            pipe.hset(key, mapping={'code': otp_code, 'attempts': 0})
+            pipe.expire(key, ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis OTP issue failed, using database store: {e}")
+            return self.fallback.issue(user, otp_type, otp_code, delivery_method)
+
+        # Unsaved until the delivery outcome is known (see record_delivery)
+        return OTPVerification(
+            user=user,
+            otp_type=otp_type,
+            otp_code=otp_code,
+            delivery_method=delivery_method,
+            expires_at=timezone.now() + timedelta(seconds=ttl),
+            max_attempts=_max_attempts(),
+            is_used=True,
+        )
+
+    def record_delivery(self, otp_record, delivery_status, destination=''):
+        if otp_record.pk:
+            return self.fallback.record_delivery(otp_record, delivery_status, destination)
+
+        otp_record.delivery_status = delivery_status
+        if destination:
+            otp_record.delivery_destination = destination
+        _write_behind(otp_record.save)
+
+    def verify(self, user, otp_code, otp_type):
+        try:
+            script = self._redis().register_script(_VERIFY_SCRIPT)
+            result = script(keys=[self._code_key(user.id, otp_type)], args=[otp_code, _max_attempts()])
+        except Exception as e:
+            logger.warning(f"Redis OTP verify failed, using database store: {e}")
+            return self.fallback.verify(user, otp_code, otp_type)
+
+        if result == 0:
+            # Not in Redis: may have been issued by the fallback during an outage
+            return self.fallback.verify(user, otp_code, otp_type)
+        if result == -1:
+            return False, "Too many attempts. Please request a new OTP."
+        if result == 2:
+            return False, "Invalid OTP code"
+
+        try:
+            self._redis().set(self._verified_key(user.id, otp_type), 1, ex=int(RESET_WINDOW.total_seconds()))
+        except Exception as e:
+            logger.warning(f"Redis OTP verified-marker write failed: {e}")
+        return True, "OTP verified successfully"
+
+    def verified_record(self, user, otp_type, otp_code):
+        # Audit rows are written behind; may not exist yet
+        return self.fallback.verified_record(user, otp_type, otp_code)
+
+    def issue_reset_token(self, user, otp_code):
+        reset_token = secrets.token_urlsafe(24)
+        try:
+            self._redis().set(self._reset_key(reset_token), user.id, ex=int(RESET_WINDOW.total_seconds()))
+        except Exception as e:
+            logger.warning(f"Redis reset token write failed: {e}")
+            return None
+        return reset_token
+
+    def resolve_reset_token(self, reset_token):
+        if str(reset_token).isdigit():
+            return None  # Database-store token format; guessable, never valid here
+        try:
+            user_id = self._redis().get(self._reset_key(reset_token))
+        except Exception as e:
+            logger.warning(f"Redis reset token lookup failed: {e}")
+            return None
+        if not user_id:
+            return None
+        return User.objects.filter(id=int(user_id)).first()
+
+    def has_recent_verification(self, user, otp_type):
+        try:
+            if self._redis().exists(self._verified_key(user.id, otp_type)):
+                return True
+        except Exception as e:
+            logger.warning(f"Redis OTP verified-marker lookup failed: {e}")
+        return self.fallback.has_recent_verification(user, otp_type)
+
+
+_store = None
+
+
+def get_otp_store():
+    """Return the configured OTP store (cached per process)."""
+    global _store
+    if _store is None:
+        backend = settings.OTP_SETTINGS.get('BACKEND', 'database')
+        _store = RedisOTPStore() if backend == 'redis' else DatabaseOTPStore()
+    return _store
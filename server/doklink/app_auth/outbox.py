@@ -0,0 +1,267 @@
+# app_auth/outbox.py
+"""
+Transactional outbox for OTP and account emails/SMS.
+
+`enqueue()` writes an OutboundMessage row inside the caller's transaction and
+returns immediately with a 'pending' message clients can poll. Delivery
+happens after commit:
+
+- in-process on a small background pool (OUTBOX_SETTINGS['DELIVER_ON_COMMIT']),
+- and/or by `python manage.py deliver_outbox`, which also picks up retries and
+  anything left behind by a crashed process.
+
+Each batch reuses one SMTP connection and one HTTP session, and failed sends
+are retried with exponential backoff up to `max_attempts`.
+
+Bodies carry OTP codes, so they are blanked as soon as a message is final
+(sent, or failed for good), and final rows are deleted after
+OUTBOX_SETTINGS['RETENTION_DAYS'] by `python manage.py prune_outbox`.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import OTPVerification, OutboundMessage
+
+logger = logging.getLogger(__name__)
+
+FAST2SMS_URL = "https://www.fast2sms.com/dev/bulkV2"
+
+# Claimable states; 'sending' rows are reclaimed once their lease expires
+CLAIMABLE_STATUSES = ('pending', 'retry', 'sending')
+FINAL_STATUSES = ('sent', 'failed')
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='outbox')
+_sms_session = None
+
+
+def _outbox_settings():
+    return settings.OUTBOX_SETTINGS
+
+
+def get_sms_session():
+    """Process-wide keep-alive session for the SMS provider."""
+    global _sms_session
+    if _sms_session is None:
+        _sms_session = requests.Session()
+    return _sms_session
+
+
+def enqueue(channel, destination, body, subject='', user=None, purpose='', otp_record=None):
+    """Queue a message for delivery once the current transaction commits."""
+    message = OutboundMessage.objects.create(
+        user=user,
+        otp=otp_record if otp_record is not None and otp_record.pk else None,
+        purpose=purpose,
+        channel=channel,
+        destination=destination,
+        subject=subject,
+        body=body,
+        max_attempts=_outbox_settings()['MAX_ATTEMPTS'],
+    )
+
+    if _outbox_settings()['DELIVER_ON_COMMIT']:
+        message_id = message.id
+        transaction.on_commit(lambda: _executor.submit(_deliver_in_background, [message_id]))
+
+    return message
+
+
+def _deliver_in_background(ids):
+    try:
+        deliver(claim(ids=ids))
+    except Exception as e:
+        logger.error(f"Outbox background delivery failed for {ids}: {e}")
+    finally:
+        close_old_connections()
+
+
+def claim(ids=None, batch_size=None):
+    """
+    Lock due messages and lease them to this worker.
+
+    Leased rows move to 'sending' with next_attempt_at pushed out by
+    LEASE_SECONDS, so a worker that dies mid-batch does not lose them.
+    """
+    now = timezone.now()
+    batch_size = batch_size or _outbox_settings()['BATCH_SIZE']
+
+    with transaction.atomic():
+        queryset = OutboundMessage.objects.filter(
+            status__in=CLAIMABLE_STATUSES,
+            next_attempt_at__lte=now
+        )
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+
+        messages = list(
+            queryset.order_by('next_attempt_at')
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if messages:
+            OutboundMessage.objects.filter(id__in=[m.id for m in messages]).update(
+                status='sending',
+                next_attempt_at=now + timedelta(seconds=_outbox_settings()['LEASE_SECONDS'])
+            )
+
+    return messages
+
+
+def deliver(messages, email_connection=None, sms_session=None):
+    """Send claimed messages, pooling connections per channel. Returns counts."""
+    results = {'sent': 0, 'retry': 0, 'failed': 0}
+
+    email_messages = [m for m in messages if m.channel == 'email']
+    sms_messages = [m for m in messages if m.channel == 'sms']
+
+    if email_messages:
+        connection = email_connection or get_connection()
+        try:
+            # One SMTP session for the whole batch
+            connection.open()
+        except Exception as e:
+            for message in email_messages:
+                results[_mark_failed(message, e)] += 1
+            email_messages = []
+
+        try:
+            for message in email_messages:
+                try:
+                    EmailMessage(
+                        message.subject,
+                        message.body,
+                        settings.DEFAULT_FROM_EMAIL,
+                        [message.destination],
+                        connection=connection,
+                    ).send(fail_silently=False)
+                    results[_mark_sent(message)] += 1
+                except Exception as e:
+                    results[_mark_failed(message, e)] += 1
+        finally:
+            if email_connection is None:
+                connection.close()
+
+    if sms_messages:
+        session = sms_session or get_sms_session()
+        for message in sms_messages:
+            try:
+                _send_sms(session, message)
+                results[_mark_sent(message)] += 1
+            except Exception as e:
+                results[_mark_failed(message, e)] += 1
+
+    return results
+
+
+def deliver_due(batch_size=None, email_connection=None, sms_session=None):
+    """Claim and deliver one batch of due messages. Returns counts incl. 'claimed'."""
+    messages = claim(batch_size=batch_size)
+    results = deliver(messages, email_connection=email_connection, sms_session=sms_session)
+    return {'claimed': len(messages), **results}
+
+
+def _send_sms(session, message):
+    """Send one SMS via Fast2SMS, raising on any provider error."""
+    api_key = settings.FAST2SMS_API_KEY
+
+    # Clean phone number (remove +91 if present)
+    clean_phone = message.destination
+    if clean_phone.startswith('+91'):
+        clean_phone = clean_phone[3:]
+    elif clean_phone.startswith('91'):
+        clean_phone = clean_phone[2:]
+
+    payload = {
+        "authorization": api_key,
+        "sender_id": "DOKLIK",  # Your sender ID from Fast2SMS
+        "message": message.body,
+        "language": "english",
+        "route": "q",
+        "numbers": clean_phone,
+    }
+
+    headers = {
+        'authorization': api_key,
+        'Content-Type': "application/x-www-form-urlencoded",
+        'Cache-Control': "no-cache",
+    }
+
+    response = session.post(
+        FAST2SMS_URL, data=payload, headers=headers,
+        timeout=_outbox_settings()['SMS_TIMEOUT_SECONDS']
+    )
+    if response.status_code != 200:
+        raise Exception(f"HTTP {response.status_code}: {response.text}")
+
+    result = response.json()
+    if not result.get('return'):
+        raise Exception(f"Fast2SMS API error: {result.get('message', 'Unknown error')}")
+
+
+def _mark_sent(message):
+    now = timezone.now()
+    OutboundMessage.objects.filter(id=message.id).update(
+        status='sent',
+        attempts=message.attempts + 1,
+        sent_at=now,
+        last_error='',
+        body=''  # No OTP codes at rest once delivered
+    )
+    if message.otp_id:
+        OTPVerification.objects.filter(id=message.otp_id).update(
+            delivery_status='sent',
+            delivery_destination=message.destination
+        )
+    logger.info(f"Outbox {message.channel} message {message.message_id} sent to {message.destination}")
+    return 'sent'
+
+
+def _mark_failed(message, error):
+    attempts = message.attempts + 1
+    status = 'failed' if attempts >= message.max_attempts else 'retry'
+    backoff = _outbox_settings()['RETRY_BASE_SECONDS'] * (2 ** (attempts - 1))
+
+    final = {'body': ''} if status == 'failed' else {}  # Retries still need the body
+    OutboundMessage.objects.filter(id=message.id).update(
+        status=status,
+        attempts=attempts,
+        last_error=str(error)[:1000],
+        next_attempt_at=timezone.now() + timedelta(seconds=backoff),
+        **final
+    )
+    if message.otp_id:
+        OTPVerification.objects.filter(id=message.otp_id).update(delivery_status=status)
+
+    logger.error(
+        f"Outbox {message.channel} message {message.message_id} failed "
+        f"(attempt {attempts}/{message.max_attempts}): {error}"
+    )
+    return status
+
+
+def prune_final(days=None, batch_size=1000, sleep=0):
+    """Delete sent / failed messages older than `days` in batches. Returns the count."""
+    days = _outbox_settings()['RETENTION_DAYS'] if days is None else days
+    old = OutboundMessage.objects.filter(
+        status__in=FINAL_STATUSES,
+        created_at__lt=timezone.now() - timedelta(days=days)
+    ).order_by('id')
+
+    deleted = 0
+    while True:
+        ids = list(old.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += OutboundMessage.objects.filter(id__in=ids).delete()[0]
+        if len(ids) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+    return deleted
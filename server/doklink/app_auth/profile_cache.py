@@ -0,0 +1,97 @@
+# app_auth/profile_cache.py
+"""
+Per-user cache of the composed profile payload returned by UserSerializer
+(login responses, ProfileView, OTP login, signup).
+
+Building the payload reads the UserProfile and both addresses; the cold load
+does that in one select_related query, and the result is cached for
+PROFILE_CACHE['TTL_SECONDS']. Entries are dropped whenever the profile or one
+of its addresses is saved or deleted (see app_auth.signals), which covers
+ProfileView.put, address edits and the email/phone verification flags.
+
+Aadhaar and medical fields (SENSITIVE_FIELDS) are never written to the cache:
+cached entries hold None in their place, and they are read per request with
+one query on the profile's unique user_id index.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import UserProfile
+
+logger = logging.getLogger(__name__)
+
+# Cached for users without a profile, so they don't hit the database either
+NO_PROFILE = {}
+
+# Identity and health data: served from the database only, never cached
+SENSITIVE_FIELDS = (
+    'aadhaar_number',
+    'medical_allergies',
+    'current_medications',
+    'medical_conditions',
+    'previous_surgeries',
+)
+
+
+def _cache_key(user_id):
+    return f"user_profile:{user_id}"
+
+
+def load_profile(user_id):
+    """The user's profile with both addresses joined in, or None."""
+    return (
+        UserProfile.objects
+        .select_related('permanent_address', 'current_address')
+        .filter(user_id=user_id)
+        .first()
+    )
+
+
+def get_profile_payload(user_id, build):
+    """
+    Cached profile payload for a user. `build(profile)` composes the payload on
+    a miss. Returns None if the user has no profile.
+    """
+    key = _cache_key(user_id)
+    try:
+        payload = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Profile cache read failed for {user_id}: {e}")
+        payload = None
+
+    if payload is None:
+        profile = load_profile(user_id)
+        payload = build(profile) if profile is not None else NO_PROFILE
+        cached = {**payload, **{field: None for field in SENSITIVE_FIELDS}} if payload else NO_PROFILE
+        try:
+            cache.set(key, cached, settings.PROFILE_CACHE['TTL_SECONDS'])
+        except Exception as e:
+            logger.warning(f"Profile cache write failed for {user_id}: {e}")
+        return payload or None
+
+    if not payload:
+        return None
+    sensitive = UserProfile.objects.filter(user_id=user_id).values(*SENSITIVE_FIELDS).first()
+    if sensitive is None:
+        return None  # Profile deleted since it was cached
+    payload.update(sensitive)
+    return payload
+
+
+def invalidate_profile_payload(*user_ids):
+    try:
+        cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+    except Exception as e:
+        logger.warning(f"Profile cache invalidation failed for {user_ids}: {e}")
+
+
+def users_for_address(address_id):
+    """Ids of users whose profile points at an address."""
+    return list(
+        UserProfile.objects
+        .filter(Q(permanent_address_id=address_id) | Q(current_address_id=address_id))
+        .values_list('user_id', flat=True)
+    )
@@ -3,7 +3,14 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
-from .models import UserProfile, Address, UserAgreement, OTPVerification
+from django.db import IntegrityError, transaction
+from django.db.models import CharField, Value
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer, TokenVerifySerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+from .blacklist import FilteredRefreshToken, is_blacklisted
+from .models import UserProfile, Address, UserAgreement
+from .profile_cache import get_profile_payload
 import re
 from datetime import datetime, date
 
@@ -70,18 +77,18 @@ class UserSignUpSerializer(serializers.Serializer):
             raise serializers.ValidationError("Name must be at least 2 characters long")
         return value.strip()
 
+    UNIQUENESS_ERRORS = {
+        'email': "A user with this email already exists",
+        'phone_number': "A user with this phone number already exists",
+        'aadhaar_number': "A user with this Aadhaar number already exists",
+    }
+
     def validate_email(self, value):
-        """Validate email uniqueness"""
-        if User.objects.filter(email=value.lower()).exists():
-            raise serializers.ValidationError("A user with this email already exists")
+        """Normalise email (uniqueness is checked in validate)"""
         return value.lower()
 
     def validate_phone_number(self, value):
-        """Validate phone number uniqueness and format using regex"""
-        # Check for existing phone number
-        if UserProfile.objects.filter(phone_number=value).exists():
-            raise serializers.ValidationError("A user with this phone number already exists")
-        
+        """Validate phone number format using regex (uniqueness is checked in validate)"""
         # Convert to string for regex validation
         phone_str = str(value).strip()
         
@@ -99,13 +106,10 @@ class UserSignUpSerializer(serializers.Serializer):
         return value
 
     def validate_aadhaar_number(self, value):
-        """Validate Aadhaar number format and uniqueness"""
+        """Validate Aadhaar number format (uniqueness is checked in validate)"""
         if not re.match(r'^[2-9][0-9]{11}$', value):
             raise serializers.ValidationError("Aadhaar number must be exactly 12 digits")
         
-        if UserProfile.objects.filter(aadhaar_number=value).exists():
-            raise serializers.ValidationError("A user with this Aadhaar number already exists")
-        
         return value
 
     def validate_dob(self, value):
@@ -172,10 +176,32 @@ class UserSignUpSerializer(serializers.Serializer):
                 'current_address': 'Current address is required when different from permanent address'
             })
         
+        # Email, phone and Aadhaar uniqueness in one round trip
+        taken = self._taken_identifiers(attrs)
+        if taken:
+            raise serializers.ValidationError({
+                field: message for field, message in self.UNIQUENESS_ERRORS.items() if field in taken
+            })
+        
         return attrs
 
+    @staticmethod
+    def _taken_identifiers(attrs):
+        """Names of the fields whose value already belongs to an account (single UNION ALL query)"""
+        def taken_if(queryset, field):
+            return queryset.annotate(field=Value(field, output_field=CharField())).values_list('field', flat=True)
+
+        return set(
+            taken_if(User.objects.filter(email=attrs['email']), 'email').union(
+                taken_if(UserProfile.objects.filter(phone_number=attrs['phone_number']), 'phone_number'),
+                taken_if(UserProfile.objects.filter(aadhaar_number=attrs['aadhaar_number']), 'aadhaar_number'),
+                all=True
+            )
+        )
+
+    @transaction.atomic
     def create(self, validated_data):
-        """Create user with all related data"""
+        """Create user with all related data in one transaction"""
         # Extract nested data
         name = validated_data.pop('name')
         agreements_data = validated_data.pop('agreements')
@@ -199,17 +225,9 @@ class UserSignUpSerializer(serializers.Serializer):
         first_name = name_parts[0]
         last_name = name_parts[1] if len(name_parts) > 1 else ''
         
-        # Generate username from email
-        username = email.split('@')[0].lower()
-        base_username = username
-        counter = 1
-        while User.objects.filter(username=username).exists():
-            username = f"{base_username}{counter}"
-            counter += 1
-        
-        # Create Django User
-        user = User.objects.create_user(
-            username=username,
+        # Create Django User with a username generated from the email
+        user = self._create_user_with_unique_username(
+            email.split('@')[0].lower(),
             email=email,
             password=password,
             first_name=first_name,
@@ -261,16 +279,46 @@ class UserSignUpSerializer(serializers.Serializer):
             ('data_consent', agreements_data.get('dataConsent')),
         ]
         
-        for agreement_type, accepted in agreements_to_create:
-            if accepted:
-                UserAgreement.objects.create(
-                    user=user,
-                    agreement_type=agreement_type,
-                    version='1.0'
-                )
+        UserAgreement.objects.bulk_create([
+            UserAgreement(
+                user=user,
+                agreement_type=agreement_type,
+                version='1.0'
+            )
+            for agreement_type, accepted in agreements_to_create
+            if accepted
+        ])
         
         return user
 
+    USERNAME_ALLOCATION_ATTEMPTS = 5
+
+    @staticmethod
+    def _next_free_username(base_username):
+        """First free name of base, base1, base2, ... found with a single query"""
+        taken = set(
+            User.objects.filter(username__startswith=base_username)
+            .values_list('username', flat=True)
+        )
+        if base_username not in taken:
+            return base_username
+        counter = 1
+        while f"{base_username}{counter}" in taken:
+            counter += 1
+        return f"{base_username}{counter}"
+
+    def _create_user_with_unique_username(self, base_username, **fields):
+        """Create the user, retrying if a concurrent signup takes the same username"""
+        for attempt in range(self.USERNAME_ALLOCATION_ATTEMPTS):
+            username = self._next_free_username(base_username)
+            try:
+                # Savepoint, so a collision doesn't abort the surrounding transaction
+                with transaction.atomic():
+                    return User.objects.create_user(username=username, **fields)
+            except IntegrityError:
+                if attempt == self.USERNAME_ALLOCATION_ATTEMPTS - 1:
+                    raise
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for user data with profile"""
@@ -288,39 +336,40 @@ class UserSerializer(serializers.ModelSerializer):
         ]
 
     def get_profile(self, obj):
-        """Get user profile data"""
-        try:
-            profile = obj.profile
-            permanent_address = AddressSerializer(profile.permanent_address).data if profile.permanent_address else None
-            current_address = AddressSerializer(profile.current_address).data if profile.current_address else None
-            
-            return {
-                'phone_number': str(profile.phone_number),
-                'date_of_birth': profile.date_of_birth,
-                'profile_picture': profile.profile_picture if profile.profile_picture else None,
-                'aadhaar_number': profile.aadhaar_number,
-                'gender': profile.gender,
-                'pronoun': profile.pronoun,
-                'permanent_address': permanent_address,
-                'current_address': current_address,
-                'same_as_permanent': profile.same_as_permanent,
-                'preferred_language': profile.preferred_language,
-                'emergency_contact_name': profile.emergency_contact_name,
-                'emergency_contact_phone': str(profile.emergency_contact_phone) if profile.emergency_contact_phone else None,
-                'secondary_email': profile.secondary_email,
-                'secondary_phone': str(profile.secondary_phone) if profile.secondary_phone else None,
-                'medical_allergies': profile.medical_allergies,
-                'current_medications': profile.current_medications,
-                'medical_conditions': profile.medical_conditions,
-                'previous_surgeries': profile.previous_surgeries,
-                'is_verified': profile.is_verified,
-                'email_verified': profile.email_verified,
-                'phone_verified': profile.phone_verified,
-                'created_at': profile.created_at,
-                'updated_at': profile.updated_at
-            }
-        except UserProfile.DoesNotExist:
-            return None
+        """Get user profile data (cached per user, see app_auth.profile_cache)"""
+        return get_profile_payload(obj.pk, self.build_profile_payload)
+
+    @staticmethod
+    def build_profile_payload(profile):
+        """Compose the profile payload; addresses must already be select_related"""
+        permanent_address = AddressSerializer(profile.permanent_address).data if profile.permanent_address else None
+        current_address = AddressSerializer(profile.current_address).data if profile.current_address else None
+        
+        return {
+            'phone_number': str(profile.phone_number),
+            'date_of_birth': profile.date_of_birth,
+            'profile_picture': profile.profile_picture if profile.profile_picture else None,
+            'aadhaar_number': profile.aadhaar_number,
+            'gender': profile.gender,
+            'pronoun': profile.pronoun,
+            'permanent_address': permanent_address,
+            'current_address': current_address,
+            'same_as_permanent': profile.same_as_permanent,
+            'preferred_language': profile.preferred_language,
+            'emergency_contact_name': profile.emergency_contact_name,
+            'emergency_contact_phone': str(profile.emergency_contact_phone) if profile.emergency_contact_phone else None,
+            'secondary_email': profile.secondary_email,
+            'secondary_phone': str(profile.secondary_phone) if profile.secondary_phone else None,
+            'medical_allergies': profile.medical_allergies,
+            'current_medications': profile.current_medications,
+            'medical_conditions': profile.medical_conditions,
+            'previous_surgeries': profile.previous_surgeries,
+            'is_verified': profile.is_verified,
+            'email_verified': profile.email_verified,
+            'phone_verified': profile.phone_verified,
+            'created_at': profile.created_at,
+            'updated_at': profile.updated_at
+        }
 
 
 class LoginSerializer(serializers.Serializer):
@@ -371,32 +420,11 @@ class LoginSerializer(serializers.Serializer):
             raise serializers.ValidationError({'otp': 'OTP is required for OTP authentication'})
 
         # Find user based on login method
-        user = None
-        if login_method == 'email':
-            try:
-                user = User.objects.get(email=login_field.lower())
-            except User.DoesNotExist:
-                raise serializers.ValidationError({'login_field': 'No account found with this email'})
-        
-        elif login_method == 'phone':
-            # Normalize phone number for lookup
-            normalized_phone = login_field
-            if login_field.startswith('+91'):
-                normalized_phone = login_field[3:]
-            elif login_field.startswith('91'):
-                normalized_phone = login_field[2:]
-            
-            try:
-                profile = UserProfile.objects.get(phone_number__endswith=normalized_phone)
-                user = profile.user
-            except UserProfile.DoesNotExist:
-                raise serializers.ValidationError({'login_field': 'No account found with this phone number'})
-        
-        elif login_method == 'username':
-            try:
-                user = User.objects.get(username=login_field.lower())
-            except User.DoesNotExist:
-                raise serializers.ValidationError({'login_field': 'No account found with this username'})
+        from .identity import resolve_login_user
+        user = resolve_login_user(login_method, login_field)
+        if user is None:
+            label = 'phone number' if login_method == 'phone' else login_method
+            raise serializers.ValidationError({'login_field': f'No account found with this {label}'})
 
         if not user.is_active:
             raise serializers.ValidationError({'login_field': 'Account is disabled'})
@@ -408,20 +436,10 @@ class LoginSerializer(serializers.Serializer):
         
         elif auth_mode == 'otp':
             # Verify OTP
-            from django.utils import timezone
-            try:
-                otp_record = OTPVerification.objects.get(
-                    user=user,
-                    otp_type='login_2fa',
-                    otp_code=otp,
-                    is_used=False,
-                    expires_at__gt=timezone.now()
-                )
-                # Mark OTP as used
-                otp_record.is_used = True
-                otp_record.save()
-            except OTPVerification.DoesNotExist:
-                raise serializers.ValidationError({'otp': 'Invalid or expired OTP'})
+            from .otp_service import OTPService
+            success, message = OTPService.verify_otp(user, otp, 'login_2fa')
+            if not success:
+                raise serializers.ValidationError({'otp': message})
 
         attrs['user'] = user
         return attrs
@@ -482,3 +500,21 @@ class ProfileSerializer(serializers.ModelSerializer):
         
         instance.save()
         return instance
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    """Token refresh that pre-checks the blacklist Bloom filter"""
+    token_class = FilteredRefreshToken
+
+
+class FilteredTokenVerifySerializer(TokenVerifySerializer):
+    """Token verify that pre-checks the blacklist Bloom filter"""
+
+    def validate(self, attrs):
+        token = UntypedToken(attrs['token'])
+
+        jti = token.get(api_settings.JTI_CLAIM)
+        if api_settings.BLACKLIST_AFTER_ROTATION and jti and is_blacklisted(jti):
+            raise serializers.ValidationError("Token is blacklisted")
+
+        return {}
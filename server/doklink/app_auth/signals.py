@@ -0,0 +1,79 @@
+# app_auth/signals.py
+"""
+Keep the login-identity cache (app_auth.identity), the authenticated-user
+snapshots (app_auth.authentication), the profile payload cache
+(app_auth.profile_cache) and the token blacklist filter (app_auth.blacklist)
+in step with account and token changes.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .authentication import invalidate_user_snapshot
+from .blacklist import bloom_add
+from .identity import invalidate_login_identity
+from .models import Address, UserProfile
+from .profile_cache import invalidate_profile_payload, users_for_address
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_identity(sender, instance, **kwargs):
+    """Email/username changed, account created or removed."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    profile = UserProfile.objects.filter(user_id=instance.pk).only('phone_number').first()
+    invalidate_login_identity(instance, profile.phone_number if profile else None)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_snapshot_cache(sender, instance, **kwargs):
+    """Password change, deactivation, name/email edits, deletion."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    user_id = instance.pk
+    invalidate_user_snapshot(user_id)
+    # Again after commit, in case a request re-cached the old row meanwhile
+    transaction.on_commit(lambda: invalidate_user_snapshot(user_id))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_identity(sender, instance, **kwargs):
+    """Phone number changed, profile created or removed."""
+    invalidate_login_identity(instance.user, instance.phone_number)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_cache(sender, instance, **kwargs):
+    """Profile edits (ProfileView.put) and email/phone verification flags."""
+    user_id = instance.user_id
+    invalidate_profile_payload(user_id)
+    transaction.on_commit(lambda: invalidate_profile_payload(user_id))
+
+
+@receiver(post_save, sender=Address)
+@receiver(post_delete, sender=Address)
+def invalidate_address_profile_cache(sender, instance, **kwargs):
+    """Permanent or current address edited."""
+    user_ids = users_for_address(instance.pk)
+    if user_ids:
+        invalidate_profile_payload(*user_ids)
+        transaction.on_commit(lambda: invalidate_profile_payload(*user_ids))
+
+
+@receiver(pre_save, sender=BlacklistedToken)
+def add_blacklisted_token_to_filter(sender, instance, **kwargs):
+    """
+    Refresh rotation, logout or admin action blacklisting a token. Set before
+    the row is written, so the filter never misses a blacklisted JTI; a
+    rolled-back blacklist only leaves a harmless false positive.
+    """
+    if instance._state.adding:
+        bloom_add(instance.token.jti)
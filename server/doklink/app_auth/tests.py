@@ -1,3 +1,157 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from app_auth import blacklist, otp_store
+from app_auth.models import UserProfile
+from app_auth.profile_cache import SENSITIVE_FIELDS, _cache_key
+from app_auth.serializers import UserSerializer
+
+
+def _otp_settings(backend):
+    from django.conf import settings
+    return {**settings.OTP_SETTINGS, 'BACKEND': backend}
+
+
+def _sync_audit_settings():
+    # A buffered LoginAudit row would be flushed after the test rolled back its user
+    from django.conf import settings
+    return {**settings.AUDIT_SETTINGS, 'LOGIN_AUDIT_SYNC': True}
+
+
+class OTPStoreTestMixin:
+    backend = 'database'
+
+    def setUp(self):
+        self.settings_override = override_settings(
+            OTP_SETTINGS=_otp_settings(self.backend),
+            AUDIT_SETTINGS=_sync_audit_settings(),
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        otp_store._store = None
+        self.addCleanup(setattr, otp_store, '_store', None)
+        # Throttle counters live in Redis and would carry over between tests
+        throttle = mock.patch('doklink.throttling.RedisRateThrottleMixin.allow_request', return_value=True)
+        throttle.start()
+        self.addCleanup(throttle.stop)
+
+        self.user = User.objects.create_user('resetuser', 'reset@example.com', 'Old-pass-123')
+        self.store = otp_store.get_otp_store()
+        if self.backend == 'redis':
+            redis = self.store._redis()
+            for otp_type in ('password_reset', 'login'):
+                redis.delete(self.store._code_key(self.user.id, otp_type),
+                             self.store._verified_key(self.user.id, otp_type))
+
+    def confirm_reset(self, **data):
+        return self.client.post('/api/v1/auth/confirm-password-reset/', {
+            'new_password': 'New-pass-456',
+            'confirm_password': 'New-pass-456',
+            **data,
+        }, content_type='application/json')
+
+
+class RedisPasswordResetTests(OTPStoreTestMixin, TestCase):
+    backend = 'redis'
+
+    def test_confirm_without_verifying_is_rejected(self):
+        response = self.client.post('/api/v1/auth/send-forgot-password-otp/', {
+            'login_field': self.user.email,
+            'login_method': 'email',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.confirm_reset(login_field=self.user.email, login_method='email')
+        self.assertEqual(response.status_code, 400)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('Old-pass-123'))
+
+    def test_audit_row_is_not_a_verification(self):
+        record = self.store.issue(self.user, 'password_reset', '123456', 'email')
+        record.save()  # What the write-behind audit does
+
+        self.assertFalse(self.store.has_recent_verification(self.user, 'password_reset'))
+        self.assertIsNone(self.store.verified_record(self.user, 'password_reset', '123456'))
+        self.assertEqual(self.confirm_reset(reset_token=str(record.id)).status_code, 400)
+
+    def test_verified_code_issues_reset_token(self):
+        self.store.issue(self.user, 'password_reset', '123456', 'email')
+        self.assertTrue(self.store.verify(self.user, '123456', 'password_reset')[0])
+
+        reset_token = self.store.issue_reset_token(self.user, '123456')
+        self.assertFalse(reset_token.isdigit())
+        self.assertEqual(self.confirm_reset(reset_token=reset_token).status_code, 200)
+
+
+class DatabasePasswordResetTests(OTPStoreTestMixin, TestCase):
+    backend = 'database'
+
+    def test_superseded_code_is_not_a_verification(self):
+        first = self.store.issue(self.user, 'password_reset', '111111', 'email')
+        self.store.issue(self.user, 'password_reset', '222222', 'email')
+
+        first.refresh_from_db()
+        self.assertTrue(first.is_used)
+        self.assertFalse(self.store.has_recent_verification(self.user, 'password_reset'))
+        self.assertEqual(self.confirm_reset(reset_token=str(first.id)).status_code, 400)
+
+    def test_verified_code_allows_reset(self):
+        self.store.issue(self.user, 'password_reset', '123456', 'email')
+        self.assertTrue(self.store.verify(self.user, '123456', 'password_reset')[0])
+
+        reset_token = self.store.issue_reset_token(self.user, '123456')
+        self.assertEqual(self.confirm_reset(reset_token=reset_token).status_code, 200)
+
+
+@override_settings(TOKEN_BLACKLIST_SETTINGS={
+    'BLOOM_FILTER': True, 'BLOOM_CAPACITY': 1000, 'BLOOM_ERROR_RATE': 0.01, 'PRUNE_BATCH_SIZE': 100,
+})
+class BlacklistFilterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('tokenuser', 'token@example.com', 'Pass-123-word')
+        blacklist.rebuild_filter()
+        # Leave no filter behind; checks fall back to the database until the next rebuild
+        self.addCleanup(blacklist._redis().delete, blacklist.BLOOM_KEY, blacklist.BLOOM_BUILD_KEY)
+
+    def test_blacklisted_token_is_in_filter_before_commit(self):
+        token = blacklist.FilteredRefreshToken.for_user(self.user)
+        jti = token['jti']
+        self.assertFalse(blacklist.bloom_might_contain(jti))
+
+        token.blacklist()  # Still inside the test transaction, nothing committed
+
+        self.assertTrue(blacklist.bloom_might_contain(jti))
+        self.assertTrue(blacklist.is_blacklisted(jti))
+
+    def test_failed_filter_update_drops_filter(self):
+        token = blacklist.FilteredRefreshToken.for_user(self.user)
+
+        with mock.patch('app_auth.blacklist._add_to_filter', side_effect=ConnectionError('redis down')):
+            token.blacklist()
+
+        self.assertFalse(blacklist._redis().exists(blacklist.BLOOM_KEY))
+        self.assertIsNone(blacklist.bloom_might_contain(token['jti']))
+        self.assertTrue(blacklist.is_blacklisted(token['jti']))
+
+
+class ProfileCacheTests(TestCase):
+    def test_sensitive_fields_are_not_cached(self):
+        user = User.objects.create_user('cacheuser', 'cache@example.com', 'Pass-123-word')
+        profile = UserProfile.objects.create(
+            user=user, phone_number='+919876543210',
+            aadhaar_number='123412341234', medical_allergies='Penicillin',
+        )
+
+        self.assertEqual(UserSerializer(user).data['profile']['aadhaar_number'], '123412341234')
+        cached = cache.get(_cache_key(user.id))
+        self.assertEqual(cached['phone_number'], str(profile.phone_number))
+        self.assertTrue(all(cached[field] is None for field in SENSITIVE_FIELDS))
+
+        # Served from the cache, with the sensitive fields read per request
+        UserProfile.objects.filter(pk=profile.pk).update(medical_allergies='Latex')
+        payload = UserSerializer(user).data['profile']
+        self.assertEqual(payload['aadhaar_number'], '123412341234')
+        self.assertEqual(payload['medical_allergies'], 'Latex')
@@ -33,6 +33,7 @@ urlpatterns = [
     path('verify-phone/', views.verify_phone, name='verify_phone'),
     path('send-phone-otp/', views.send_phone_otp, name='send_phone_otp'),
     path('verification-status/', views.check_verification_status, name='verification_status'),
+    path('delivery-status/<uuid:message_id>/', views.get_delivery_status, name='delivery_status'),
     
     # Password reset (legacy - replaced by forgot password endpoints above)
     path('reset-password/', views.reset_password_request, name='reset_password_request'),
@@ -7,15 +7,15 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.db import transaction
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
-from django.core.mail import send_mail
 from django.conf import settings
-from .models import UserProfile, OTPVerification, LoginAudit
+from .models import UserProfile, LoginAudit, OutboundMessage
 from .serializers import UserSignUpSerializer, UserSerializer, LoginSerializer, ProfileSerializer
 from .otp_service import OTPService
+from .identity import LOGIN_METHODS, resolve_login_user
+from .lockout import lockout_identifier, lockout_remaining, record_failure, reset_failures
+from . import outbox
 import random
 import string
-from datetime import timedelta
 
 
 def get_client_ip(request):
@@ -28,6 +28,26 @@ def get_client_ip(request):
     return ip
 
 
+def delivery_payload(outbound):
+    """Delivery fields returned to clients so they can poll a queued message"""
+    if outbound is None:
+        return {'delivery_status': 'failed', 'message_id': None}
+    return {
+        'delivery_status': outbound.delivery_status,
+        'message_id': str(outbound.message_id),
+    }
+
+
+def locked_out_response(retry_after):
+    """429 returned while an identifier or IP is locked out"""
+    response = Response({
+        'error': 'Account locked due to too many failed attempts. Please try again later.',
+        'retry_after': retry_after
+    }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 def get_tokens_for_user(user):
     """Generate JWT tokens for user"""
     refresh = RefreshToken.for_user(user)
@@ -60,11 +80,11 @@ class SignUpView(APIView):
                     # Generate tokens
                     tokens = get_tokens_for_user(user)
                     
-                    # Send welcome email (optional)
+                    # Queue welcome email (optional)
                     self.send_welcome_email(user)
                     
-                    # Create OTP for email verification
-                    self.create_email_otp(user)
+                    # Create OTP for email verification (queued in the same transaction)
+                    email_otp = self.create_email_otp(user)
                     
                     # Serialize user data
                     user_serializer = UserSerializer(user)
@@ -73,7 +93,8 @@ class SignUpView(APIView):
                         'message': 'User registered successfully',
                         'user': user_serializer.data,
                         'tokens': tokens,
-                        'email_verification_required': True
+                        'email_verification_required': True,
+                        'email_otp_delivery': delivery_payload(email_otp)
                     }, status=status.HTTP_201_CREATED)
                     
             except Exception as e:
@@ -85,7 +106,7 @@ class SignUpView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def send_welcome_email(self, user):
-        """Send welcome email to new user"""
+        """Queue welcome email to new user"""
         try:
             subject = 'Welcome to DokLink!'
             message = f'''
@@ -99,28 +120,16 @@ class SignUpView(APIView):
             DokLink Team
             '''
             
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                fail_silently=True,
-            )
+            outbox.enqueue('email', user.email, message, subject=subject, user=user, purpose='welcome')
         except Exception as e:
             print(f"Error sending welcome email: {e}")
     
     def create_email_otp(self, user):
-        """Create OTP for email verification"""
+        """Create OTP for email verification and queue it; returns the outbound message"""
         try:
-            # Generate 6-digit OTP
-            otp_code = ''.join(random.choices(string.digits, k=6))
-            
-            # Create OTP record (expires_at will be auto-set by model)
-            otp = OTPVerification.objects.create(
-                user=user,
-                otp_type='email',
-                otp_code=otp_code
-            )
+            # Issue 6-digit OTP via the configured OTP store
+            otp = OTPService.create_otp_record(user, 'email', delivery_method='email')
+            otp_code = otp.otp_code
             
             # Send OTP via email
             subject = 'Email Verification - DokLink'
@@ -135,16 +144,16 @@ class SignUpView(APIView):
             DokLink Team
             '''
             
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                fail_silently=True,
+            outbound = outbox.enqueue(
+                'email', user.email, message,
+                subject=subject, user=user, purpose='email', otp_record=otp
             )
+            OTPService.record_delivery(otp, 'pending', user.email)
+            return outbound
             
         except Exception as e:
             print(f"Error creating email OTP: {e}")
+            return None
 
 
 class LoginView(APIView):
@@ -156,11 +165,25 @@ class LoginView(APIView):
         ip_address = get_client_ip(request)
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         email_attempted = request.data.get('email', '')
+        identifier = lockout_identifier(request.data.get('login_method'), request.data.get('login_field'))
+        
+        # Lockout check against the Redis counters, before any DB work
+        retry_after = lockout_remaining(identifier, ip_address)
+        if retry_after:
+            LoginAudit.log_attempt(
+                email=email_attempted,
+                status='failed_locked',
+                ip_address=ip_address,
+                user_agent=user_agent,
+                is_suspicious=True
+            )
+            return locked_out_response(retry_after)
         
         serializer = LoginSerializer(data=request.data, context={'request': request})
         
         if serializer.is_valid():
             user = serializer.validated_data['user']
+            reset_failures(identifier)
             
             # Generate tokens
             tokens = get_tokens_for_user(user)
@@ -199,13 +222,14 @@ class LoginView(APIView):
                 login_status = status_value
                 break
         
-        # Log failed attempt
+        # Log failed attempt with the sliding-window counts
         LoginAudit.log_attempt(
             email=email_attempted,
             status=login_status,
             ip_address=ip_address,
             user_agent=user_agent,
-            user=None  # No user for failed attempts
+            user=None,  # No user for failed attempts
+            **record_failure(identifier, ip_address)
         )
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -253,40 +277,28 @@ def verify_email(request):
             'error': 'OTP code is required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    # Verify and consume the OTP
+    success, message = OTPService.verify_otp(request.user, otp_code, 'email')
+    if not success:
+        return Response({
+            'error': message
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Update user profile email verification status
     try:
-        # Find valid OTP
-        otp = OTPVerification.objects.get(
+        profile = request.user.profile
+        profile.email_verified = True
+        profile.save()
+    except UserProfile.DoesNotExist:
+        # Create profile if it doesn't exist
+        UserProfile.objects.create(
             user=request.user,
-            otp_type='email',
-            otp_code=otp_code,
-            is_used=False,
-            expires_at__gt=timezone.now()
+            email_verified=True
         )
-        
-        # Mark OTP as used
-        otp.is_used = True
-        otp.save()
-        
-        # Update user profile email verification status
-        try:
-            profile = request.user.profile
-            profile.email_verified = True
-            profile.save()
-        except UserProfile.DoesNotExist:
-            # Create profile if it doesn't exist
-            UserProfile.objects.create(
-                user=request.user,
-                email_verified=True
-            )
-        
-        return Response({
-            'message': 'Email verified successfully'
-        }, status=status.HTTP_200_OK)
-        
-    except OTPVerification.DoesNotExist:
-        return Response({
-            'error': 'Invalid or expired OTP'
-        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'message': 'Email verified successfully'
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -300,40 +312,28 @@ def verify_phone(request):
             'error': 'OTP code is required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    # Verify and consume the OTP
+    success, message = OTPService.verify_otp(request.user, otp_code, 'phone')
+    if not success:
+        return Response({
+            'error': message
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Update user profile phone verification status
     try:
-        # Find valid OTP
-        otp = OTPVerification.objects.get(
+        profile = request.user.profile
+        profile.phone_verified = True
+        profile.save()
+    except UserProfile.DoesNotExist:
+        # Create profile if it doesn't exist
+        UserProfile.objects.create(
             user=request.user,
-            otp_type='phone',
-            otp_code=otp_code,
-            is_used=False,
-            expires_at__gt=timezone.now()
+            phone_verified=True
         )
-        
-        # Mark OTP as used
-        otp.is_used = True
-        otp.save()
-        
-        # Update user profile phone verification status
-        try:
-            profile = request.user.profile
-            profile.phone_verified = True
-            profile.save()
-        except UserProfile.DoesNotExist:
-            # Create profile if it doesn't exist
-            UserProfile.objects.create(
-                user=request.user,
-                phone_verified=True
-            )
-        
-        return Response({
-            'message': 'Phone number verified successfully'
-        }, status=status.HTTP_200_OK)
-        
-    except OTPVerification.DoesNotExist:
-        return Response({
-            'error': 'Invalid or expired OTP'
-        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'message': 'Phone number verified successfully'
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -349,15 +349,10 @@ def send_phone_otp(request):
                 'error': 'No phone number associated with account'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Generate 6-digit OTP
-        otp_code = ''.join(random.choices(string.digits, k=6))
-        
-        # Create OTP record (expires_at will be auto-set by model)
-        OTPVerification.objects.create(
-            user=request.user,
-            otp_type='phone',
-            otp_code=otp_code
-        )
+        # Issue 6-digit OTP via the configured OTP store
+        otp = OTPService.create_otp_record(request.user, 'phone', delivery_method='sms')
+        otp_code = otp.otp_code
+        OTPService.record_delivery(otp, 'pending', str(phone_number))
         
         # Here you would integrate with SMS service
         # For now, we'll just return the OTP in response (for testing)
@@ -410,16 +405,18 @@ def reset_password_request(request):
     
     try:
         user = User.objects.get(email=email.lower())
-        
+    except User.DoesNotExist:
+        # Don't reveal if user exists or not
+        return Response({
+            'message': 'If an account with this email exists, password reset instructions have been sent'
+        }, status=status.HTTP_200_OK)
+    
+    with transaction.atomic():
         # Generate reset token (OTP)
         reset_token = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
         
-        # Create OTP record (expires_at will be auto-set by model)
-        OTPVerification.objects.create(
-            user=user,
-            otp_type='password_reset',
-            otp_code=reset_token
-        )
+        # Issue the reset code via the configured OTP store
+        otp = OTPService.create_otp_record(user, 'password_reset', delivery_method='email', otp_code=reset_token)
         
         # Send reset email
         subject = 'Password Reset - DokLink'
@@ -438,23 +435,17 @@ def reset_password_request(request):
         DokLink Team
         '''
         
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            fail_silently=False,
+        # Queue reset email in the same transaction as the reset code
+        outbound = outbox.enqueue(
+            'email', user.email, message,
+            subject=subject, user=user, purpose='password_reset', otp_record=otp
         )
-        
-        return Response({
-            'message': 'Password reset instructions sent to your email'
-        }, status=status.HTTP_200_OK)
-        
-    except User.DoesNotExist:
-        # Don't reveal if user exists or not
-        return Response({
-            'message': 'If an account with this email exists, password reset instructions have been sent'
-        }, status=status.HTTP_200_OK)
+        OTPService.record_delivery(otp, 'pending', user.email)
+    
+    return Response({
+        'message': 'Password reset instructions sent to your email',
+        **delivery_payload(outbound)
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -473,16 +464,7 @@ def reset_password_confirm(request):
     try:
         user = User.objects.get(email=email.lower())
         
-        # Find valid reset token
-        otp = OTPVerification.objects.get(
-            user=user,
-            otp_type='password_reset',
-            otp_code=reset_token,
-            is_used=False,
-            expires_at__gt=timezone.now()
-        )
-        
-        # Validate new password
+        # Validate new password before consuming the reset token
         from django.contrib.auth.password_validation import validate_password
         from django.core.exceptions import ValidationError
         
@@ -494,14 +476,17 @@ def reset_password_confirm(request):
                 'details': list(e.messages)
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Verify and consume the reset token
+        success, message = OTPService.verify_otp(user, reset_token, 'password_reset')
+        if not success:
+            return Response({
+                'error': 'Invalid or expired reset token'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
         # Update password
         user.set_password(new_password)
         user.save()
         
-        # Mark token as used
-        otp.is_used = True
-        otp.save()
-        
         return Response({
             'message': 'Password reset successfully'
         }, status=status.HTTP_200_OK)
@@ -510,10 +495,32 @@ def reset_password_confirm(request):
         return Response({
             'error': 'Invalid email'
         }, status=status.HTTP_400_BAD_REQUEST)
-    except OTPVerification.DoesNotExist:
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def get_delivery_status(request, message_id):
+    """Poll delivery status of a queued OTP / account message"""
+    outbound = OutboundMessage.objects.filter(message_id=message_id).first()
+    
+    if not outbound:
         return Response({
-            'error': 'Invalid or expired reset token'
-        }, status=status.HTTP_400_BAD_REQUEST)
+            'error': 'Message not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    destination = (
+        OTPService.mask_email(outbound.destination) if outbound.channel == 'email'
+        else OTPService.mask_phone(outbound.destination)
+    )
+    
+    return Response({
+        'message_id': str(outbound.message_id),
+        'channel': outbound.channel,
+        'destination': destination,
+        'delivery_status': outbound.delivery_status,
+        'attempts': outbound.attempts,
+        'sent_at': outbound.sent_at
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -610,7 +617,9 @@ def get_username_otp_options(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        user = User.objects.get(username=username.lower())
+        user = resolve_login_user('username', username)
+        if user is None:
+            raise User.DoesNotExist
         
         if not user.is_active:
             return Response({
@@ -677,47 +686,35 @@ def send_login_otp(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     # Find user based on login method
-    user = None
-    try:
-        if login_method == 'email':
-            user = User.objects.get(email=login_field.lower())
-            delivery_method = 'email'  # Force email for email login
-        elif login_method == 'phone':
-            # Normalize phone number
-            normalized_phone = login_field
-            if login_field.startswith('+91'):
-                normalized_phone = login_field[3:]
-            elif login_field.startswith('91'):
-                normalized_phone = login_field[2:]
-            
-            profile = UserProfile.objects.get(phone_number__endswith=normalized_phone)
-            user = profile.user
-            delivery_method = 'sms'  # Force SMS for phone login
-        elif login_method == 'username':
-            user = User.objects.get(username=login_field.lower())
-            # For username, delivery_method should be provided from frontend
-            if delivery_method == 'auto':
-                return Response({
-                    'error': 'Please specify delivery_method for username login'
-                }, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return Response({
-                'error': 'Invalid login method'
-            }, status=status.HTTP_400_BAD_REQUEST)
-            
-    except (User.DoesNotExist, UserProfile.DoesNotExist):
+    if login_method not in LOGIN_METHODS:
+        return Response({
+            'error': 'Invalid login method'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    user = resolve_login_user(login_method, login_field)
+    if user is None:
         return Response({
             'error': f'No account found with this {login_method}'
         }, status=status.HTTP_404_NOT_FOUND)
     
+    if login_method == 'email':
+        delivery_method = 'email'  # Force email for email login
+    elif login_method == 'phone':
+        delivery_method = 'sms'  # Force SMS for phone login
+    elif delivery_method == 'auto':
+        # For username, delivery_method should be provided from frontend
+        return Response({
+            'error': 'Please specify delivery_method for username login'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
     if not user.is_active:
         return Response({
             'error': 'Account is disabled'
         }, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        # Use the new OTP service
-        success, message = OTPService.send_otp(
+        # Issue the OTP and queue delivery; clients poll delivery-status/<message_id>/
+        success, message, outbound = OTPService.queue_otp(
             user=user,
             otp_type='login_2fa',
             delivery_method=delivery_method,
@@ -728,7 +725,8 @@ def send_login_otp(request):
         if success:
             return Response({
                 'message': message,
-                'delivery_method': delivery_method
+                'delivery_method': delivery_method,
+                **delivery_payload(outbound)
             }, status=status.HTTP_200_OK)
         else:
             return Response({
@@ -756,47 +754,35 @@ def send_forgot_password_otp(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     # Find user based on login method
-    user = None
-    try:
-        if login_method == 'email':
-            user = User.objects.get(email=login_field.lower())
-            delivery_method = 'email'  # Force email for email-based reset
-        elif login_method == 'phone':
-            # Normalize phone number
-            normalized_phone = login_field
-            if login_field.startswith('+91'):
-                normalized_phone = login_field[3:]
-            elif login_field.startswith('91'):
-                normalized_phone = login_field[2:]
-            
-            profile = UserProfile.objects.get(phone_number__endswith=normalized_phone)
-            user = profile.user
-            delivery_method = 'sms'  # Force SMS for phone-based reset
-        elif login_method == 'username':
-            user = User.objects.get(username=login_field.lower())
-            # For username, delivery_method should be provided from frontend
-            if delivery_method == 'auto':
-                return Response({
-                    'error': 'Please specify delivery_method for username-based reset'
-                }, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return Response({
-                'error': 'Invalid login method'
-            }, status=status.HTTP_400_BAD_REQUEST)
-            
-    except (User.DoesNotExist, UserProfile.DoesNotExist):
+    if login_method not in LOGIN_METHODS:
+        return Response({
+            'error': 'Invalid login method'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    user = resolve_login_user(login_method, login_field)
+    if user is None:
         return Response({
             'error': f'No account found with this {login_method}'
         }, status=status.HTTP_404_NOT_FOUND)
     
+    if login_method == 'email':
+        delivery_method = 'email'  # Force email for email-based reset
+    elif login_method == 'phone':
+        delivery_method = 'sms'  # Force SMS for phone-based reset
+    elif delivery_method == 'auto':
+        # For username, delivery_method should be provided from frontend
+        return Response({
+            'error': 'Please specify delivery_method for username-based reset'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
     if not user.is_active:
         return Response({
             'error': 'Account is disabled'
         }, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        # Use the new OTP service
-        success, message = OTPService.send_otp(
+        # Issue the OTP and queue delivery; clients poll delivery-status/<message_id>/
+        success, message, outbound = OTPService.queue_otp(
             user=user,
             otp_type='password_reset',
             delivery_method=delivery_method,
@@ -807,7 +793,8 @@ def send_forgot_password_otp(request):
         if success:
             return Response({
                 'message': message,
-                'delivery_method': delivery_method
+                'delivery_method': delivery_method,
+                **delivery_payload(outbound)
             }, status=status.HTTP_200_OK)
         else:
             return Response({
@@ -836,23 +823,8 @@ def verify_forgot_password_otp(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     # Find user based on login method
-    user = None
-    try:
-        if login_method == 'email':
-            user = User.objects.get(email=login_field.lower())
-        elif login_method == 'phone':
-            normalized_phone = login_field
-            if login_field.startswith('+91'):
-                normalized_phone = login_field[3:]
-            elif login_field.startswith('91'):
-                normalized_phone = login_field[2:]
-            
-            profile = UserProfile.objects.get(phone_number__endswith=normalized_phone)
-            user = profile.user
-        elif login_method == 'username':
-            user = User.objects.get(username=login_field.lower())
-            
-    except (User.DoesNotExist, UserProfile.DoesNotExist):
+    user = resolve_login_user(login_method, login_field)
+    if user is None:
         return Response({
             'error': f'No account found with this {login_method}'
         }, status=status.HTTP_404_NOT_FOUND)
@@ -862,18 +834,13 @@ def verify_forgot_password_otp(request):
         success, message = OTPService.verify_otp(user, otp_code, 'password_reset')
         
         if success:
-            # Fetch the OTP record we just verified to use its ID as a reset token
-            otp_record = OTPVerification.objects.filter(
-                user=user,
-                otp_type='password_reset',
-                otp_code=otp_code,
-                is_used=True
-            ).order_by('-created_at').first()
+            # Short-lived token that lets confirm_password_reset identify the user
+            reset_token = OTPService.issue_reset_token(user, otp_code)
 
             return Response({
                 'message': message + ' You can now reset your password.',
                 'verified': True,
-                'reset_token': str(otp_record.id) if otp_record else None
+                'reset_token': reset_token
             }, status=status.HTTP_200_OK)
         else:
             return Response({
@@ -907,32 +874,14 @@ def confirm_password_reset(request):
     
     # Resolve user via reset_token if provided, else fall back to login_field/login_method
     if reset_token:
-        otp_record = OTPVerification.objects.filter(
-            id=reset_token,
-            otp_type='password_reset',
-            is_used=True,
-            created_at__gte=timezone.now() - timedelta(minutes=15)
-        ).select_related('user').first()
-        if not otp_record:
+        user = OTPService.resolve_reset_token(reset_token)
+        if not user:
             return Response({'error': 'Invalid or expired reset token'}, status=status.HTTP_400_BAD_REQUEST)
-        user = otp_record.user
     else:
-        try:
-            if login_method == 'email':
-                user = User.objects.get(email=login_field.lower())
-            elif login_method == 'phone':
-                normalized_phone = login_field
-                if login_field and login_field.startswith('+91'):
-                    normalized_phone = login_field[3:]
-                elif login_field and login_field.startswith('91'):
-                    normalized_phone = login_field[2:]
-                profile = UserProfile.objects.get(phone_number__endswith=normalized_phone)
-                user = profile.user
-            elif login_method == 'username':
-                user = User.objects.get(username=login_field.lower())
-            else:
-                return Response({'error': 'Invalid login method'}, status=status.HTTP_400_BAD_REQUEST)
-        except (User.DoesNotExist, UserProfile.DoesNotExist):
+        if login_method not in LOGIN_METHODS:
+            return Response({'error': 'Invalid login method'}, status=status.HTTP_400_BAD_REQUEST)
+        user = resolve_login_user(login_method, login_field)
+        if user is None:
             return Response({'error': f'No account found with this {login_method}'}, status=status.HTTP_404_NOT_FOUND)
     
     # Validate new password
@@ -947,14 +896,8 @@ def confirm_password_reset(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     # Check if there's a recent used password reset OTP for this user
-    recent_otp = OTPVerification.objects.filter(
-        user=user,
-        otp_type='password_reset',
-        is_used=True,
-        created_at__gte=timezone.now() - timedelta(minutes=15)  # Allow reset within 15 minutes of OTP verification
-    ).order_by('-created_at').first()
-    
-    if not recent_otp:
+    # (allow reset within 15 minutes of OTP verification)
+    if not OTPService.has_recent_verification(user, 'password_reset'):
         return Response({
             'error': 'No recent OTP verification found. Please verify OTP first.'
         }, status=status.HTTP_400_BAD_REQUEST)
@@ -995,34 +938,33 @@ def verify_login_otp(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     # Find user based on login method
-    user = None
-    try:
-        if login_method == 'email':
-            user = User.objects.get(email=login_field.lower())
-        elif login_method == 'phone':
-            # Normalize phone number
-            normalized_phone = login_field
-            if login_field.startswith('+91'):
-                normalized_phone = login_field[3:]
-            elif login_field.startswith('91'):
-                normalized_phone = login_field[2:]
-            
-            profile = UserProfile.objects.get(phone_number__endswith=normalized_phone)
-            user = profile.user
-        elif login_method == 'username':
-            user = User.objects.get(username=login_field.lower())
-        else:
-            return Response({
-                'error': 'Invalid login method'
-            }, status=status.HTTP_400_BAD_REQUEST)
-            
-    except (User.DoesNotExist, UserProfile.DoesNotExist):
+    if login_method not in LOGIN_METHODS:
+        return Response({
+            'error': 'Invalid login method'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Lockout check against the Redis counters, before any DB work
+    identifier = lockout_identifier(login_method, login_field)
+    retry_after = lockout_remaining(identifier, ip_address)
+    if retry_after:
+        LoginAudit.log_attempt(
+            email=login_field,
+            status='failed_locked',
+            ip_address=ip_address,
+            user_agent=user_agent,
+            is_suspicious=True
+        )
+        return locked_out_response(retry_after)
+    
+    user = resolve_login_user(login_method, login_field)
+    if user is None:
         # Log failed attempt
         LoginAudit.log_attempt(
             email=login_field,
             status='failed_user',
             ip_address=ip_address,
-            user_agent=user_agent
+            user_agent=user_agent,
+            **record_failure(identifier, ip_address)
         )
         return Response({
             'error': f'No account found with this {login_method}'
@@ -1046,16 +988,13 @@ def verify_login_otp(request):
         success, message = OTPService.verify_otp(user, otp_code, 'login_2fa')
         
         if success:
+            reset_failures(identifier)
+            
             # Generate tokens
             tokens = get_tokens_for_user(user)
             
             # Get the OTP record for audit logging
-            otp_record = OTPVerification.objects.filter(
-                user=user,
-                otp_type='login_2fa',
-                otp_code=otp_code,
-                is_used=True
-            ).order_by('-created_at').first()
+            otp_record = OTPService.get_verified_record(user, 'login_2fa', otp_code)
             
             # Log successful login
             LoginAudit.log_attempt(
@@ -1082,7 +1021,8 @@ def verify_login_otp(request):
                 status='failed_otp',
                 ip_address=ip_address,
                 user_agent=user_agent,
-                user=user
+                user=user,
+                **record_failure(identifier, ip_address)
             )
             return Response({
                 'error': message
@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Long-lived endpoints such as the notification SSE stream
+(/api/v1/notifications/stream/) are async views and should be served through
+this application, e.g. ``uvicorn doklink.asgi:application``.
 """
 
 import os
@@ -0,0 +1,165 @@
+"""
+Keyset (cursor) pagination helpers shared by the API apps.
+
+A cursor is an opaque, URL-safe token that encodes the sort key of a row:
+``(timestamp, id)``. Filtering with ``(ts, id) < cursor`` walks a composite
+index directly, so the 1000th page costs the same as the first one — unlike
+OFFSET, which has to scan and discard every earlier row.
+
+`paginate_keyset()` generalises this to any non-null sort column: its cursor
+carries ``(value, id)`` as JSON and is parsed back with the model field.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, time, timezone
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# Sort key before every row, for polling an empty list from the start
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue."""
+
+
+def encode_cursor(timestamp, pk):
+    """Encode a (timestamp, id) sort key as an opaque cursor string."""
+    raw = f"{timestamp.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def initial_cursor():
+    """Cursor that sorts before every row: since= from it returns everything."""
+    return encode_cursor(EPOCH, 0)
+
+
+def decode_cursor(cursor):
+    """Decode a cursor back into a (timestamp, id) tuple."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        ts_str, pk_str = raw.rsplit('|', 1)
+        timestamp = parse_datetime(ts_str)
+        if timestamp is None:
+            raise ValueError(ts_str)
+        return timestamp, int(pk_str)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise InvalidCursor('Invalid cursor')
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Parse a ?limit= query param, clamped to [1, maximum]."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def before(field, timestamp, pk):
+    """Q for rows strictly older than (timestamp, pk) in (field, id) order."""
+    return Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk})
+
+
+def after(field, timestamp, pk):
+    """Q for rows strictly newer than (timestamp, pk) in (field, id) order."""
+    return Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': pk})
+
+
+def paginate_desc(queryset, field, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return one page of `queryset` ordered newest-first by (field, id).
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    Raises InvalidCursor for a malformed cursor.
+    """
+    queryset = queryset.order_by(f'-{field}', '-id')
+    if cursor:
+        queryset = queryset.filter(before(field, *decode_cursor(cursor)))
+
+    rows = list(queryset[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return rows, next_cursor
+
+
+def paginate_since(queryset, field, cursor, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return rows newer than `cursor`, oldest-first, for incremental polling.
+
+    Returns (rows, latest_cursor, has_more). latest_cursor points at the newest
+    row returned (or echoes `cursor` when nothing is new) so clients can keep
+    polling from it; when has_more is True they should fetch again right away.
+    """
+    queryset = queryset.order_by(field, 'id').filter(after(field, *decode_cursor(cursor)))
+
+    rows = list(queryset[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest_cursor = cursor
+    if rows:
+        last = rows[-1]
+        latest_cursor = encode_cursor(getattr(last, field), last.pk)
+    return rows, latest_cursor, has_more
+
+
+def encode_key_cursor(value, pk):
+    """Encode a (value, id) sort key of any JSON-serialisable field type."""
+    if isinstance(value, (datetime, time)):
+        # DjangoJSONEncoder drops microseconds, so rows would repeat or vanish at page edges
+        value = value.isoformat()
+    raw = json.dumps([value, pk], cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_key_cursor(cursor, model_field):
+    """Decode a key cursor, converting the value with `model_field.to_python`."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        value = model_field.to_python(value)
+        if value is None:
+            raise ValueError(cursor)
+        return value, int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError, binascii.Error, ValidationError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def paginate_keyset(queryset, field, descending=False, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return one page of `queryset` ordered by (field, id), ascending or descending.
+    `field` must be a non-null column, ideally leading a composite index.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    Raises InvalidCursor for a malformed cursor.
+    """
+    direction = '-' if descending else ''
+    queryset = queryset.order_by(f'{direction}{field}', f'{direction}id')
+    if cursor:
+        value, pk = decode_key_cursor(cursor, queryset.model._meta.get_field(field))
+        keyset = before if descending else after
+        queryset = queryset.filter(keyset(field, value, pk))
+
+    rows = list(queryset[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_key_cursor(getattr(last, field), last.pk)
+    return rows, next_cursor
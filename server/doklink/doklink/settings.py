@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',  # Add this for JWT token management
@@ -65,6 +66,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'hospital_dashboard.middleware.TenantMiddleware',
     
     'django_browser_reload.middleware.BrowserReloadMiddleware'
 ]
@@ -164,7 +166,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'app_auth.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -176,8 +178,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'doklink.throttling.RedisAnonRateThrottle',
+        'doklink.throttling.RedisUserRateThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
@@ -215,6 +217,16 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     'SLIDING_TOKEN_LIFETIME': timedelta(minutes=60),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=7),
+    'TOKEN_REFRESH_SERIALIZER': 'app_auth.serializers.FilteredTokenRefreshSerializer',
+    'TOKEN_VERIFY_SERIALIZER': 'app_auth.serializers.FilteredTokenVerifySerializer',
+}
+
+# Refresh-token blacklist maintenance (see app_auth.blacklist)
+TOKEN_BLACKLIST_SETTINGS = {
+    'BLOOM_FILTER': True,  # Redis Bloom filter in front of the blacklist table
+    'BLOOM_CAPACITY': 1_000_000,  # Blacklisted JTIs alive at once (~REFRESH_TOKEN_LIFETIME of refreshes)
+    'BLOOM_ERROR_RATE': 0.001,  # ~1.8 MB bitmap, 10 hashes
+    'PRUNE_BATCH_SIZE': 1000,
 }
 
 # CORS Configuration for React Native & Expo Go
@@ -295,6 +307,8 @@ OTP_EXPIRY_MINUTES = env.int('OTP_EXPIRY_MINUTES', default=10)
 OTP_LENGTH = env.int('OTP_LENGTH', default=6)
 MAX_OTP_ATTEMPTS = env.int('MAX_OTP_ATTEMPTS', default=3)
 OTP_RESEND_COOLDOWN_SECONDS = env.int('OTP_RESEND_COOLDOWN_SECONDS', default=60)
+# 'database' keeps codes in OTPVerification; 'redis' keeps them in Redis with TTL
+OTP_BACKEND = env('OTP_BACKEND', default='database')
 
 # Redis Configuration (for caching and rate limiting)
 REDIS_URL = env('REDIS_URL', default='redis://localhost:6379/0')
@@ -318,6 +332,52 @@ CACHES = {
     }
 }
 
+# Real-time notification stream (SSE over Redis pub/sub, served via ASGI)
+NOTIFICATION_STREAM = {
+    'CHANNEL_PREFIX': 'doklink:notifications:user',
+    'HEARTBEAT_SECONDS': env.int('NOTIFICATION_STREAM_HEARTBEAT_SECONDS', default=15),
+    'RETRY_MILLISECONDS': 5000,  # Client reconnect delay sent in the stream
+    'MAX_QUEUED_EVENTS': 100,  # Per connection; beyond this the client is told to resync
+}
+
+# Dashboard broadcasts (POST /api/v1/notifications/broadcast/). Callers are
+# either Django staff users (JWT) or the dashboard backend presenting this
+# secret in X-Broadcast-Secret; empty disables the secret
+NOTIFICATION_BROADCAST = {
+    'SECRET': env('NOTIFICATION_BROADCAST_SECRET', default=''),
+    # Send pushes in a background thread right after commit; the
+    # deliver_pushes command picks up anything a crashed process left behind
+    'DELIVER_ON_COMMIT': env.bool('NOTIFICATION_BROADCAST_DELIVER_ON_COMMIT', default=True),
+}
+
+# Hospital dashboard tenant (X-Hospital-Id) resolution cache
+TENANT_CACHE = {
+    'TTL_SECONDS': 3600,  # Redis tier, dropped on every Hospital save
+    'LOCAL_TTL_SECONDS': 30,  # Per-process tier, bounds staleness in other workers
+    'LOCAL_MAX_ENTRIES': 1024,
+}
+
+# Hospital dashboard per-hospital stats table (see hospital_dashboard.stats)
+HOSPITAL_STATS = {
+    'MAX_AGE_SECONDS': env.int('HOSPITAL_STATS_MAX_AGE_SECONDS', default=900),  # Older rows fall back to live counts
+}
+
+# Hospital dashboard bed occupancy summary cache (see hospital_dashboard.occupancy)
+OCCUPANCY_CACHE = {
+    'TTL_SECONDS': 300,  # Also dropped on every bed save/delete
+}
+
+# Hospital dashboard activity log retention (python manage.py prune_activities)
+ACTIVITY_LOG = {
+    'RETENTION_DAYS': env.int('ACTIVITY_RETENTION_DAYS', default=365),
+    'PARTITIONS_AHEAD': 2,  # Monthly partitions created in advance, if the table is partitioned
+}
+
+# Hospital dashboard per-hospital identifier sequences (see hospital_dashboard.sequences)
+HOSPITAL_SEQUENCES = {
+    'BLOCK_SIZE': 20,  # Values reserved per round trip; unused ones are skipped on restart
+}
+
 # Session Configuration using Redis
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
@@ -348,6 +408,38 @@ OTP_SETTINGS = {
     'ENABLE_SMS_OTP': bool(FAST2SMS_API_KEY),
     'EMAIL_TEMPLATE_PREFIX': 'otp/email/',
     'SMS_TEMPLATE_PREFIX': 'otp/sms/',
+    'BACKEND': OTP_BACKEND,
+}
+
+# Transactional outbox for OTP / account emails and SMS (app_auth.outbox)
+OUTBOX_SETTINGS = {
+    # Deliver in a background thread right after commit; the deliver_outbox
+    # command handles retries and anything a crashed process left behind
+    'DELIVER_ON_COMMIT': env.bool('OUTBOX_DELIVER_ON_COMMIT', default=True),
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BASE_SECONDS': 30,
+    'LEASE_SECONDS': 300,
+    'SMS_TIMEOUT_SECONDS': 10,
+    'RETENTION_DAYS': 7,  # Sent / failed rows are deleted after this (prune_outbox)
+}
+
+# Login identifier -> user resolution cache (app_auth.identity)
+LOGIN_IDENTITY_CACHE = {
+    'POSITIVE_TTL_SECONDS': 60,
+    'NEGATIVE_TTL_SECONDS': 30,  # "No account found" answers, absorbs enumeration floods
+}
+
+# Composed profile payload served by UserSerializer / ProfileView
+PROFILE_CACHE = {
+    'TTL_SECONDS': 900,  # Dropped on every profile / address save
+}
+
+# User snapshots used by CachedJWTAuthentication instead of a per-request User query
+AUTH_USER_CACHE = {
+    'TTL_SECONDS': 300,  # Redis tier, dropped on every User save
+    'LOCAL_TTL_SECONDS': 5,  # Per-process tier, bounds staleness in other workers
+    'LOCAL_MAX_ENTRIES': 2048,
 }
 
 # Rate Limiting Configuration
@@ -356,6 +448,9 @@ RATE_LIMITING = {
     'LOGIN_ATTEMPT_LIMIT': LOGIN_ATTEMPT_LIMIT,
     'PASSWORD_RESET_LIMIT': '5/hour',
     'LOCKOUT_DURATION': LOGIN_LOCKOUT_DURATION_MINUTES,
+    # Sliding window for the Redis failure counters (app_auth.lockout)
+    'LOGIN_ATTEMPT_WINDOW_MINUTES': env.int('LOGIN_ATTEMPT_WINDOW_MINUTES', default=15),
+    'IP_ATTEMPT_LIMIT': env.int('LOGIN_IP_ATTEMPT_LIMIT', default=20),
 }
 
 # Security Headers
@@ -388,7 +483,14 @@ AUDIT_SETTINGS = {
     'LOG_OTP_REQUESTS': True,
     'LOG_FAILED_AUTHENTICATIONS': True,
     'RETAIN_AUDIT_LOGS_DAYS': 90,
+    'RETAIN_READ_NOTIFICATIONS_DAYS': 90,  # Older read notifications are archived
     'ALERT_ON_SUSPICIOUS_ACTIVITY': True,
+    # LoginAudit rows are buffered and bulk-inserted (app_auth.audit_buffer);
+    # set LOGIN_AUDIT_SYNC=True to insert every attempt before responding
+    'LOGIN_AUDIT_SYNC': env.bool('LOGIN_AUDIT_SYNC', default=False),
+    'LOGIN_AUDIT_BUFFER': env('LOGIN_AUDIT_BUFFER', default='memory'),  # 'memory' or 'redis'
+    'LOGIN_AUDIT_FLUSH_SIZE': 200,
+    'LOGIN_AUDIT_FLUSH_SECONDS': 2,
 }
 
 # Logging Configuration
@@ -0,0 +1,112 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from notifications.models import Notification
+from .pagination import (
+    InvalidCursor, decode_cursor, decode_key_cursor, encode_cursor, encode_key_cursor,
+    paginate_desc, paginate_keyset, paginate_since,
+)
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        timestamp = timezone.now()
+        cursor = encode_cursor(timestamp, 42)
+
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decode_cursor(cursor), (timestamp, 42))
+
+    def test_rejects_foreign_cursors(self):
+        for cursor in ('', 'not-a-cursor', encode_cursor(timezone.now(), 1)[:-3] + '!!!'):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+
+class KeyCursorTests(SimpleTestCase):
+    def test_round_trip_uses_the_model_field(self):
+        field = Notification._meta.get_field('created_at')
+        timestamp = timezone.now()
+
+        self.assertEqual(decode_key_cursor(encode_key_cursor(timestamp, 7), field), (timestamp, 7))
+        self.assertEqual(
+            decode_key_cursor(encode_key_cursor('general', 3), Notification._meta.get_field('notification_type')),
+            ('general', 3)
+        )
+
+    def test_rejects_values_the_field_cannot_parse(self):
+        field = Notification._meta.get_field('created_at')
+        for cursor in ('garbage', encode_key_cursor('yesterday', 1), encode_key_cursor(None, 1)):
+            with self.assertRaises(InvalidCursor):
+                decode_key_cursor(cursor, field)
+        with self.assertRaises(InvalidCursor):
+            decode_key_cursor(encode_key_cursor(date(2025, 1, 1), 'x'), field)
+
+
+class PaginationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('pager', 'pager@example.com', 'Pass-123-word')
+        self.rows = [
+            Notification.objects.create(user=user, notification_type='general', title=str(i), body='')
+            for i in range(5)
+        ]
+        # Two rows share a timestamp, so the id tie-breaker matters
+        start = timezone.now() - timedelta(hours=1)
+        for i, row in enumerate(self.rows):
+            row.created_at = start + timedelta(minutes=min(i, 3))
+        Notification.objects.bulk_update(self.rows, ['created_at'])
+        self.queryset = Notification.objects.filter(user=user)
+
+    def test_paginate_desc_walks_every_row_once(self):
+        seen, cursor = [], None
+        while True:
+            page, cursor = paginate_desc(self.queryset, 'created_at', cursor, limit=2)
+            seen.extend(row.pk for row in page)
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, [row.pk for row in reversed(self.rows)])
+
+    def test_paginate_since_returns_only_newer_rows(self):
+        cursor = encode_cursor(self.rows[1].created_at, self.rows[1].pk)
+
+        page, latest, has_more = paginate_since(self.queryset, 'created_at', cursor, limit=2)
+        self.assertEqual([row.pk for row in page], [self.rows[2].pk, self.rows[3].pk])
+        self.assertTrue(has_more)
+
+        page, latest, has_more = paginate_since(self.queryset, 'created_at', latest, limit=2)
+        self.assertEqual([row.pk for row in page], [self.rows[4].pk])
+        self.assertFalse(has_more)
+
+        self.assertEqual(paginate_since(self.queryset, 'created_at', latest)[:2], ([], latest))
+
+    def test_paginate_keyset_both_directions(self):
+        for descending in (False, True):
+            seen, cursor = [], None
+            while True:
+                page, cursor = paginate_keyset(self.queryset, 'title', descending, cursor, limit=2)
+                seen.extend(row.title for row in page)
+                if cursor is None:
+                    break
+
+            self.assertEqual(seen, sorted((row.title for row in self.rows), reverse=descending))
+
+    def test_paginate_keyset_keeps_microseconds(self):
+        # Timestamps one microsecond apart, as rows written in a burst are
+        start = timezone.now().replace(microsecond=1000)
+        for i, row in enumerate(self.rows):
+            row.created_at = start + timedelta(microseconds=i)
+        Notification.objects.bulk_update(self.rows, ['created_at'])
+
+        for descending in (False, True):
+            seen, cursor = [], None
+            while True:
+                page, cursor = paginate_keyset(self.queryset, 'created_at', descending, cursor, limit=2)
+                seen.extend(row.pk for row in page)
+                if cursor is None:
+                    break
+
+            expected = [row.pk for row in self.rows]
+            self.assertEqual(seen, expected[::-1] if descending else expected)
@@ -0,0 +1,136 @@
+"""
+Redis-backed DRF throttles shared by the API apps.
+
+DRF's SimpleRateThrottle keeps a list of request timestamps per client in the
+cache and rewrites the whole list on every request: two round trips, racy
+between workers, and the payload grows with the rate. These throttles keep a
+sliding-window counter instead: the current and previous fixed-window counts,
+with the previous one weighted by how much of it still overlaps the window.
+One Lua script reads, decides and increments atomically, and also bumps the
+per-scope allowed/denied counters reported by `get_throttle_metrics()`
+(`python manage.py throttle_metrics`).
+
+Rates and scopes come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] as before.
+If Redis is unavailable requests are allowed through.
+"""
+import logging
+import math
+import time
+
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = 'throttle:metrics:{scope}'
+
+# KEYS: current window, previous window, scope metrics hash
+# ARGV: previous-window weight, limit, counter TTL (s)
+# Returns {allowed, previous count, current count}
+_SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * tonumber(ARGV[1]) + current >= tonumber(ARGV[2]) then
+    redis.call('HINCRBY', KEYS[3], 'denied', 1)
+    return {0, previous, current}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+redis.call('HINCRBY', KEYS[3], 'allowed', 1)
+return {1, previous, current}
+"""
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection("default")
+
+
+def _seconds_until_allowed(previous, current, limit, duration, elapsed):
+    """How long until the weighted count drops below the limit, assuming no new requests."""
+    if current >= limit:
+        # Wait for the next window, where this window's count becomes the weighted one
+        return (duration - elapsed) + duration * max(0.0, 1 - limit / current)
+    # previous > 0 here: only its weight can still be shrinking
+    return max(0.0, duration * (1 - (limit - current) / previous) - elapsed)
+
+
+class RedisRateThrottleMixin:
+    """Replaces SimpleRateThrottle's timestamp list with the atomic sliding-window counter."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = time.time()
+        window = int(now // self.duration)
+        elapsed = now - window * self.duration
+
+        try:
+            script = _redis().register_script(_SLIDING_WINDOW_SCRIPT)
+            allowed, previous, current = script(
+                keys=[f"{self.key}:{window}", f"{self.key}:{window - 1}", METRICS_KEY.format(scope=self.scope)],
+                args=[(self.duration - elapsed) / self.duration, self.num_requests, self.duration * 2],
+            )
+        except Exception as e:
+            logger.warning(f"Throttle check failed for scope {self.scope}, allowing request: {e}")
+            return True
+
+        if allowed:
+            return True
+
+        self._wait = _seconds_until_allowed(previous, current, self.num_requests, self.duration, elapsed)
+        return False
+
+    def wait(self):
+        return math.ceil(getattr(self, '_wait', 0)) or None
+
+
+class RedisAnonRateThrottle(RedisRateThrottleMixin, AnonRateThrottle):
+    """'anon' scope, keyed by client IP for unauthenticated requests."""
+
+
+class RedisUserRateThrottle(RedisRateThrottleMixin, UserRateThrottle):
+    """'user' scope, keyed by user id (client IP when anonymous)."""
+
+
+# Throttles for the custom scopes in DEFAULT_THROTTLE_RATES. Like the scopes
+# themselves they are not attached to any view: they key by user or client IP,
+# so a shared bucket across the auth flows would lock out patients behind the
+# same NAT, and failed logins are already limited by app_auth.lockout.
+class OTPRequestRateThrottle(RedisUserRateThrottle):
+    scope = 'otp_request'
+
+
+class LoginAttemptsRateThrottle(RedisUserRateThrottle):
+    scope = 'login_attempts'
+
+
+class PasswordResetRateThrottle(RedisUserRateThrottle):
+    scope = 'password_reset'
+
+
+THROTTLE_SCOPES = ('anon', 'user', 'otp_request', 'login_attempts', 'password_reset')
+
+
+def get_throttle_metrics(reset=False):
+    """{scope: {'allowed': n, 'denied': n}} since the last reset."""
+    pipe = _redis().pipeline(transaction=True)
+    for scope in THROTTLE_SCOPES:
+        pipe.hgetall(METRICS_KEY.format(scope=scope))
+    if reset:
+        pipe.delete(*[METRICS_KEY.format(scope=scope) for scope in THROTTLE_SCOPES])
+    results = pipe.execute()
+
+    return {
+        scope: {
+            'allowed': int(counts.get(b'allowed', 0)),
+            'denied': int(counts.get(b'denied', 0)),
+        }
+        for scope, counts in zip(THROTTLE_SCOPES, results)
+    }
@@ -66,6 +66,8 @@ def api_root(request):
                 'list': '/api/v1/notifications/',
                 'mark_read': '/api/v1/notifications/mark-read/',
                 'unread_count': '/api/v1/notifications/unread-count/',
+                'stream': '/api/v1/notifications/stream/',
+                'broadcast': '/api/v1/notifications/broadcast/',
             }
         }
     })
@@ -0,0 +1,126 @@
+"""
+Retention for the dashboard activity log (HospitalActivity).
+
+In production the activity table can be range-partitioned by month on
+`time`, with one partition per month named <table>_pYYYYMM. Expiring a month
+then means detaching and dropping its partition, which is instant and leaves
+no dead tuples, instead of a DELETE over millions of rows. Converting the
+table is a one-off database operation (Postgres requires the primary key to
+include the partition key, so it becomes (id, time)), roughly:
+
+    ALTER TABLE hospital_dashboard_hospitalactivity RENAME TO hospital_dashboard_hospitalactivity_old;
+    CREATE TABLE hospital_dashboard_hospitalactivity
+        (LIKE hospital_dashboard_hospitalactivity_old INCLUDING DEFAULTS INCLUDING IDENTITY,
+         PRIMARY KEY (id, time))
+        PARTITION BY RANGE (time);
+    -- python manage.py prune_activities  (creates current and upcoming partitions;
+    -- create older months the same way before copying them)
+    INSERT INTO hospital_dashboard_hospitalactivity OVERRIDING SYSTEM VALUE
+        SELECT * FROM hospital_dashboard_hospitalactivity_old;
+    SELECT setval(pg_get_serial_sequence('hospital_dashboard_hospitalactivity', 'id'),
+                  (SELECT max(id) FROM hospital_dashboard_hospitalactivity));
+
+When the table is not partitioned, old rows are deleted in small batches
+instead, so the command works either way.
+"""
+import time
+from datetime import date
+
+from django.db import connection, transaction
+
+from .models import HospitalActivity
+
+
+def _table():
+    return HospitalActivity._meta.db_table
+
+
+def _month_start(day, offset=0):
+    month = day.year * 12 + day.month - 1 + offset
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def _partition_name(month):
+    return f"{_table()}_p{month:%Y%m}"
+
+
+def is_partitioned():
+    """True when the activity table is a partitioned (parent) table."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+            [_table()]
+        )
+        return cursor.fetchone() is not None
+
+
+def partitions():
+    """Monthly partitions of the activity table as {month start: name}."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [_table()]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    prefix = f"{_table()}_p"
+    months = {}
+    for name in names:
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            months[date(int(suffix[:4]), int(suffix[4:]), 1)] = name
+    return months
+
+
+def ensure_partitions(today, months_ahead):
+    """Create the partitions for this month and the next `months_ahead`. Returns names created."""
+    existing = partitions()
+    created = []
+    qn = connection.ops.quote_name
+    for offset in range(months_ahead + 1):
+        month = _month_start(today, offset)
+        if month in existing:
+            continue
+        name = _partition_name(month)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {qn(name)} PARTITION OF {qn(_table())} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month, _month_start(month, 1)]
+            )
+        created.append(name)
+    return created
+
+
+def drop_partitions_before(cutoff):
+    """Drop every monthly partition that ends on or before `cutoff`. Returns names dropped."""
+    qn = connection.ops.quote_name
+    dropped = []
+    for month, name in sorted(partitions().items()):
+        if _month_start(month, 1) > cutoff.date():
+            break
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {qn(_table())} DETACH PARTITION {qn(name)}")
+            cursor.execute(f"DROP TABLE {qn(name)}")
+        dropped.append(name)
+    return dropped
+
+
+def delete_before(cutoff, batch_size=5000, sleep=0.0):
+    """Delete rows older than `cutoff` in batches. Yields the running total."""
+    deleted = 0
+    old = HospitalActivity.objects.filter(time__lt=cutoff)
+    while True:
+        ids = list(old.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        HospitalActivity.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+        yield deleted
+        if len(ids) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
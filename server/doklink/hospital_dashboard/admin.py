@@ -1,7 +1,8 @@
 from django.contrib import admin
 from .models import (
     HospitalStaff, HospitalBedConfig, HospitalBed,
-    HospitalPatient, HospitalDocument, HospitalClaim, HospitalActivity
+    HospitalPatient, HospitalDocument, HospitalClaim, HospitalActivity,
+    HospitalStats, HospitalClaimRollup
 )
 
 
@@ -50,3 +51,16 @@ class HospitalActivityAdmin(admin.ModelAdmin):
     list_display = ['activity_type', 'description', 'hospital', 'time']
     list_filter = ['activity_type', 'hospital']
     ordering = ['-time']
+
+
+@admin.register(HospitalStats)
+class HospitalStatsAdmin(admin.ModelAdmin):
+    list_display = ['hospital', 'beds', 'patients', 'claims', 'refreshed_at']
+    readonly_fields = ['refreshed_at']
+
+
+@admin.register(HospitalClaimRollup)
+class HospitalClaimRollupAdmin(admin.ModelAdmin):
+    list_display = ['hospital', 'insurer', 'status', 'month', 'claims', 'claim_amount', 'approved_amount']
+    list_filter = ['status', 'hospital']
+    search_fields = ['insurer']
@@ -0,0 +1,164 @@
+"""
+Claims analytics for a hospital (GET claims/analytics/).
+
+Reads come from HospitalClaimRollup, one row per hospital x insurer x status
+x month, so a request touches at most a few rows per insurer and month
+regardless of how many claims the hospital has. The rollup is maintained
+incrementally: every claim save subtracts the claim's previous contribution
+and adds its new one, and deletes subtract it (see
+hospital_dashboard.signals). `rebuild_claim_rollups()` recomputes it from
+the claims table for backfills and after bulk updates that skip signals:
+
+    python manage.py rebuild_claim_rollups [--hospital-id N]
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import HospitalClaim, HospitalClaimRollup
+
+AMOUNT_FIELDS = ['claim_amount', 'approved_amount', 'pending_amount', 'rejected_amount']
+
+# Statuses counted as settled (approval rate numerator, settlement average)
+SETTLED_STATUSES = {'Approved', 'Partial'}
+DECIDED_STATUSES = SETTLED_STATUSES | {'Rejected'}
+
+CENT = Decimal('0.01')
+
+
+def _month(claim):
+    day = claim.submission_date
+    if isinstance(day, str):
+        day = parse_date(day)
+    if not day:
+        day = timezone.localdate(claim.created_at)
+    return day.replace(day=1)
+
+
+def claim_contribution(claim):
+    """(rollup key, amounts) that a claim adds to the rollup."""
+    key = {
+        'hospital_id': claim.hospital_id,
+        'insurer': claim.insurer or '',
+        'status': claim.status,
+        'month': _month(claim),
+    }
+    amounts = {field: Decimal(str(getattr(claim, field) or 0)) for field in AMOUNT_FIELDS}
+    return key, amounts
+
+
+def apply_contribution(key, amounts, sign):
+    """Add (sign=1) or subtract (sign=-1) one claim's contribution in place."""
+    changes = {'claims': F('claims') + sign}
+    changes.update({field: F(field) + sign * amount for field, amount in amounts.items()})
+
+    if HospitalClaimRollup.objects.filter(**key).update(**changes):
+        return
+    if sign < 0:
+        return  # Group was never counted (not backfilled yet, or hospital being deleted)
+
+    try:
+        with transaction.atomic():
+            HospitalClaimRollup.objects.create(**key, claims=1, **amounts)
+    except IntegrityError:
+        # Created concurrently; add to it instead
+        HospitalClaimRollup.objects.filter(**key).update(**changes)
+
+
+def rebuild_claim_rollups(hospital_id=None):
+    """Recompute the rollup from HospitalClaim. Returns rows written."""
+    claims = HospitalClaim.objects.all()
+    rollups = HospitalClaimRollup.objects.all()
+    if hospital_id is not None:
+        claims = claims.filter(hospital_id=hospital_id)
+        rollups = rollups.filter(hospital_id=hospital_id)
+
+    month = TruncMonth(
+        Coalesce('submission_date', TruncDate('created_at'), output_field=DateField()),
+        output_field=DateField(),
+    )
+    groups = (
+        claims.order_by()
+        .annotate(rollup_month=month)
+        .values('hospital_id', 'insurer', 'status', 'rollup_month')
+        .annotate(n=Count('id'), **{f'sum_{field}': Sum(field) for field in AMOUNT_FIELDS})
+    )
+    rows = [
+        HospitalClaimRollup(
+            hospital_id=group['hospital_id'],
+            insurer=group['insurer'],
+            status=group['status'],
+            month=group['rollup_month'],
+            claims=group['n'],
+            **{field: group[f'sum_{field}'] or 0 for field in AMOUNT_FIELDS},
+        )
+        for group in groups
+    ]
+
+    with transaction.atomic():
+        rollups.delete()
+        HospitalClaimRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def _new_bucket():
+    return {'claims': 0, 'settled': 0, 'decided': 0, **{field: Decimal(0) for field in AMOUNT_FIELDS}}
+
+
+def _add(bucket, row):
+    bucket['claims'] += row['claims']
+    if row['status'] in SETTLED_STATUSES:
+        bucket['settled'] += row['claims']
+    if row['status'] in DECIDED_STATUSES:
+        bucket['decided'] += row['claims']
+    for field in AMOUNT_FIELDS:
+        bucket[field] += row[field]
+
+
+def _summary(bucket):
+    return {
+        'claims': bucket['claims'],
+        'claimAmount': str(bucket['claim_amount'].quantize(CENT)),
+        'approvedAmount': str(bucket['approved_amount'].quantize(CENT)),
+        'pendingAmount': str(bucket['pending_amount'].quantize(CENT)),
+        'rejectedAmount': str(bucket['rejected_amount'].quantize(CENT)),
+        'approvalRate': round(100 * bucket['settled'] / bucket['decided'], 1) if bucket['decided'] else 0.0,
+        'outstanding': str(bucket['pending_amount'].quantize(CENT)),
+        'averageSettlement': str(
+            (bucket['approved_amount'] / bucket['settled']).quantize(CENT) if bucket['settled'] else Decimal(0).quantize(CENT)
+        ),
+    }
+
+
+def claim_analytics(hospital_id, month_from=None, month_to=None, insurer=None):
+    """
+    Totals plus breakdowns by insurer, status and month.
+
+    month_from / month_to: first days of the months to include (inclusive).
+    """
+    rollups = HospitalClaimRollup.objects.filter(hospital_id=hospital_id, claims__gt=0)
+    if month_from:
+        rollups = rollups.filter(month__gte=month_from)
+    if month_to:
+        rollups = rollups.filter(month__lte=month_to)
+    if insurer:
+        rollups = rollups.filter(insurer=insurer)
+
+    totals = _new_bucket()
+    by_insurer, by_status, by_month = {}, {}, {}
+    for row in rollups.values('insurer', 'status', 'month', 'claims', *AMOUNT_FIELDS):
+        _add(totals, row)
+        _add(by_insurer.setdefault(row['insurer'], _new_bucket()), row)
+        _add(by_status.setdefault(row['status'], _new_bucket()), row)
+        _add(by_month.setdefault(row['month'], _new_bucket()), row)
+
+    return {
+        **_summary(totals),
+        'byInsurer': [{'insurer': k, **_summary(v)} for k, v in sorted(by_insurer.items())],
+        'byStatus': [{'status': k, **_summary(v)} for k, v in sorted(by_status.items())],
+        'byMonth': [{'month': k.strftime('%Y-%m'), **_summary(v)} for k, v in sorted(by_month.items())],
+    }
@@ -0,0 +1,206 @@
+"""
+Streaming exports of a hospital's claims, patients and expenses
+(GET export/<dataset>/).
+
+Query params:
+- exportFormat=csv (default) or ndjson (one JSON object per line)
+- gzip=true to download a .gz file instead
+- the same filters / date ranges as the matching list endpoint
+
+Rows are read with `.values().iterator(chunk_size=...)`, which uses a
+server-side cursor on Postgres, and written out as they arrive through a
+StreamingHttpResponse in ~64 KB pieces, so memory stays flat however many
+rows are exported. Rows go out in id order.
+
+Under ASGI (doklink.asgi) the response body is an async iterator: Django
+would otherwise consume a sync iterator in full before sending anything.
+Each chunk is still produced by the sync code, one sync_to_async step at a
+time on the request's sync thread, so the server-side cursor stays on one
+database connection.
+"""
+import csv
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from healthcare.models import DailyExpense
+from .models import HospitalClaim, HospitalPatient
+
+CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+# dataset -> queryset for a hospital, [(column, field)], filters, ranges
+DATASETS = {
+    'claims': {
+        'queryset': lambda hospital: HospitalClaim.objects.filter(hospital=hospital),
+        'columns': [
+            ('id', 'id'), ('patientId', 'patient_id'), ('patientName', 'patient_name'),
+            ('policyNumber', 'policy_number'), ('insurer', 'insurer'),
+            ('claimAmount', 'claim_amount'), ('approvedAmount', 'approved_amount'),
+            ('pendingAmount', 'pending_amount'), ('rejectedAmount', 'rejected_amount'),
+            ('status', 'status'), ('submissionDate', 'submission_date'),
+            ('diagnosis', 'diagnosis'), ('treatment', 'treatment'), ('expenses', 'expenses'),
+            ('createdAt', 'created_at'), ('updatedAt', 'updated_at'),
+        ],
+        'filters': {'status': 'status', 'insurer': 'insurer', 'patientId': 'patient_id'},
+        'ranges': {
+            'submittedFrom': ('submission_date', 'date_from'),
+            'submittedTo': ('submission_date', 'date_to'),
+        },
+    },
+    'patients': {
+        'queryset': lambda hospital: HospitalPatient.objects.filter(hospital=hospital),
+        'columns': [
+            ('id', 'id'), ('uhid', 'uhid'), ('name', 'name'), ('age', 'age'),
+            ('gender', 'gender'), ('phone', 'phone'), ('email', 'email'),
+            ('address', 'address'), ('bloodGroup', 'blood_group'),
+            ('emergencyContact', 'emergency_contact'), ('allergies', 'allergies'),
+            ('medications', 'medications'), ('diagnosis', 'diagnosis'),
+            ('assignedBed', 'assigned_bed'), ('status', 'status'),
+            ('admissionDate', 'admission_date'), ('dischargeDate', 'discharge_date'),
+            ('createdAt', 'created_at'), ('updatedAt', 'updated_at'),
+        ],
+        'filters': {'status': 'status', 'gender': 'gender', 'uhid': 'uhid', 'assignedBed': 'assigned_bed'},
+        'ranges': {
+            'admittedFrom': ('admission_date', 'datetime_from'),
+            'admittedTo': ('admission_date', 'datetime_to'),
+            'dischargedFrom': ('discharge_date', 'datetime_from'),
+            'dischargedTo': ('discharge_date', 'datetime_to'),
+        },
+    },
+    # Daily expenses recorded against this hospital's app admissions
+    'expenses': {
+        'queryset': lambda hospital: DailyExpense.objects.filter(admission__hospital=hospital),
+        'columns': [
+            ('id', 'id'), ('admissionId', 'admission_id'),
+            ('patientName', 'admission__patient_name'), ('date', 'date'),
+            ('expenseType', 'expense_type'), ('description', 'description'),
+            ('amount', 'amount'), ('insuranceCovered', 'insurance_covered'),
+            ('patientShare', 'patient_share'), ('verified', 'verified'),
+            ('verificationNotes', 'verification_notes'),
+            ('createdAt', 'created_at'), ('updatedAt', 'updated_at'),
+        ],
+        'filters': {'expenseType': 'expense_type', 'verified': 'verified', 'admissionId': 'admission_id'},
+        'ranges': {
+            'dateFrom': ('date', 'date_from'),
+            'dateTo': ('date', 'date_to'),
+        },
+    },
+}
+
+
+class _Echo:
+    """File-like object for csv.writer that hands back each written line."""
+
+    def write(self, value):
+        return value
+
+
+_json = DjangoJSONEncoder()
+
+# Spreadsheet apps run a cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_value(value):
+    """
+    Same text as the NDJSON output for dates, decimals and nested JSON.
+    Text that would start a formula is prefixed with ' (CSV injection).
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date, Decimal)):
+        return _json.default(value)
+    if isinstance(value, (list, dict)):
+        return _json.encode(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _lines(rows, columns, export_format):
+    headers = [header for header, _ in columns]
+    fields = [field for _, field in columns]
+
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow([_csv_value(row[field]) for field in fields])
+    else:
+        for row in rows:
+            yield json.dumps(
+                {header: row[field] for header, field in columns}, cls=DjangoJSONEncoder
+            ) + '\n'
+
+
+def _chunks(lines, compress):
+    """Join lines into ~FLUSH_BYTES byte chunks, gzip-compressed if asked."""
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31: gzip container
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= FLUSH_BYTES:
+            chunk = b''.join(buffer)
+            buffer, size = [], 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+    chunk = b''.join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+async def _async_chunks(chunks):
+    """Async iterator over `chunks`, advancing it on the request's sync thread."""
+    step = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await step(chunks, None)  # _chunks never yields None
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # Client gone or done: close the generator and its server-side cursor
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def export_response(queryset, columns, export_format, compress, filename, asynchronous=False):
+    """
+    StreamingHttpResponse writing `queryset` as CSV / NDJSON. Pass
+    asynchronous=True when serving under ASGI.
+    """
+    rows = (
+        queryset.order_by('id')
+        .values(*[field for _, field in columns])
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    content_type, extension = FORMATS[export_format]
+    filename = f"{filename}-{timezone.localdate():%Y%m%d}.{extension}"
+    if compress:
+        content_type, filename = 'application/gzip', f"{filename}.gz"
+
+    chunks = _chunks(_lines(rows, columns, export_format), compress)
+    response = StreamingHttpResponse(
+        _async_chunks(chunks) if asynchronous else chunks,
+        content_type=content_type,
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
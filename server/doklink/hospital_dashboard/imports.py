@@ -0,0 +1,370 @@
+"""
+Bulk import of beds and patients from CSV or XLSX (POST beds/import/,
+patients/import/).
+
+The upload is read row by row (csv.reader over the file, or openpyxl in
+read-only mode for .xlsx) and each row is validated with the same
+serializer as the single-item POST. Valid rows are inserted in chunks of
+CHUNK_SIZE with bulk_create, so memory stays flat for large files and
+every chunk is a single INSERT. Invalid or duplicate rows are skipped and
+reported by row number.
+
+bulk_create does not send post_save, so the per-bed and per-patient side
+effects run once at the end instead: the hospital's aggregate bed counts
+and occupancy cache for beds, and for patients mobile-user linking by phone
+number followed by the admission pushes, created and sent as one batch
+(notifications.broadcast.queue_notifications) rather than one request each.
+
+Headers are matched loosely against the API's field names, so "bedNumber",
+"Bed Number" and "bed_number" all work.
+"""
+import csv
+import io
+import logging
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from notifications.broadcast import queue_notifications
+from notifications.models import Notification
+from notifications.signals import admission_message, sync_bed_counts
+from .models import HospitalBed, HospitalPatient
+from .occupancy import invalidate_occupancy
+from .sequences import UHID, allocate
+from .serializers import BedEquipmentSerializer, CreateBedSerializer, CreatePatientSerializer
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 500
+
+
+class ImportFileError(ValueError):
+    """Raised for an upload that cannot be read at all."""
+
+
+# ============================================================
+# Reading
+# ============================================================
+
+def _normalize(header):
+    return re.sub(r'[^a-z0-9]', '', str(header or '').lower())
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # Spreadsheet numbers: floor 2.0 -> "2"
+    return str(value).strip()
+
+
+def _rows(header, rows, first_row=2):
+    header = [_normalize(h) for h in header]
+    for row_number, row in enumerate(rows, start=first_row):
+        values = [_cell(v) for v in row]
+        if any(values):
+            yield row_number, dict(zip(header, values))
+
+
+def _csv_rows(upload):
+    text = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    try:
+        header = next(reader, None)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFileError(f'Could not read CSV: {e}')
+    if header is None:
+        raise ImportFileError('The file is empty')
+
+    def rows():
+        try:
+            yield from _rows(header, reader)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ImportFileError(f'Could not read CSV: {e}')
+    return rows()
+
+
+def _xlsx_rows(upload):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportFileError('XLSX import is not available on this server; upload a CSV instead')
+
+    try:
+        workbook = openpyxl.load_workbook(upload.file, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFileError(f'Could not read XLSX: {e}')
+    sheet_rows = workbook.active.iter_rows(values_only=True)
+    header = next(sheet_rows, None)
+    if header is None:
+        workbook.close()
+        raise ImportFileError('The file is empty')
+
+    def rows():
+        try:
+            yield from _rows(header, sheet_rows)
+        finally:
+            workbook.close()
+    return rows()
+
+
+def iter_rows(upload):
+    """
+    Read the header row and return an iterator of
+    (row number, {normalized header: value}) for each non-empty row.
+    Raises ImportFileError for an unreadable or empty file.
+    """
+    name = (upload.name or '').lower()
+    if name.endswith('.xlsx'):
+        return _xlsx_rows(upload)
+    if name.endswith('.csv'):
+        return _csv_rows(upload)
+    raise ImportFileError('Unsupported file type; upload a .csv or .xlsx file')
+
+
+def _columns(serializer_class, nested=None):
+    """{normalized header: path into the serializer's data}."""
+    columns = {_normalize(field): (field,) for field in serializer_class().fields}
+    for parent, child_class in (nested or {}).items():
+        columns.pop(_normalize(parent), None)
+        columns.update({_normalize(field): (parent, field) for field in child_class().fields})
+    return columns
+
+
+BED_COLUMNS = _columns(CreateBedSerializer, nested={'equipment': BedEquipmentSerializer})
+PATIENT_COLUMNS = _columns(CreatePatientSerializer)
+
+
+def _row_data(raw, columns):
+    data = {}
+    for header, value in raw.items():
+        path = columns.get(header)
+        if path is None or value == '':
+            continue  # Unknown column, or blank so the serializer default applies
+        target = data
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = value
+    return data
+
+
+# ============================================================
+# Building rows (shared with the single-item POST handlers)
+# ============================================================
+
+def build_bed(hospital, d):
+    """Unsaved HospitalBed from CreateBedSerializer data."""
+    equipment = d.get('equipment', {})
+    return HospitalBed(
+        hospital=hospital,
+        bed_number=d['bedNumber'],
+        bed_category=d['bedCategory'],
+        department=d.get('department', 'NA'),
+        floor=d['floor'],
+        wing=d.get('wing', 'NA'),
+        daily_rate=d['dailyRate'],
+        status=d.get('status', 'available'),
+        has_monitor=equipment.get('hasMonitor', False),
+        has_oxygen=equipment.get('hasOxygen', False),
+        has_ventilator=equipment.get('hasVentilator', False),
+    )
+
+
+def build_patient(hospital, d, uhid):
+    """Unsaved HospitalPatient from CreatePatientSerializer data."""
+    return HospitalPatient(
+        hospital=hospital,
+        uhid=uhid,
+        name=d['name'],
+        age=d['age'],
+        gender=d['gender'],
+        phone=d['phone'],
+        email=d.get('email', ''),
+        address=d.get('address', ''),
+        blood_group=d.get('bloodGroup', ''),
+        emergency_contact=d['emergencyContact'],
+        allergies=d.get('allergies', ''),
+        medications=d.get('medications', ''),
+        diagnosis=d['diagnosis'],
+        assigned_bed=d.get('assignedBed', ''),
+        status=d.get('status', 'Admitted'),
+    )
+
+
+# ============================================================
+# Import runs
+# ============================================================
+
+class _Report:
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, row_number, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'imported': self.imported,
+            'errorCount': self.error_count,
+            'errors': self.errors,
+            'dryRun': self.dry_run,
+        }
+
+
+def _valid_chunks(rows, serializer_class, columns, report):
+    """Validate rows, reporting failures; yield lists of (row number, validated data)."""
+    chunk = []
+    try:
+        for row_number, raw in rows:
+            ser = serializer_class(data=_row_data(raw, columns))
+            if not ser.is_valid():
+                report.error(row_number, ser.errors)
+                continue
+            chunk.append((row_number, ser.validated_data))
+            if len(chunk) >= CHUNK_SIZE:
+                yield chunk
+                chunk = []
+    except ImportFileError as e:
+        # Unreadable data part way through: keep what was read, stop there
+        report.error(None, {'file': [str(e)]})
+    if chunk:
+        yield chunk
+
+
+def _insert(model, chunk, objs, report):
+    """bulk_create one chunk; a conflict from a concurrent writer fails the chunk's rows."""
+    if report.dry_run or not objs:
+        report.imported += len(objs)
+        return objs
+    try:
+        with transaction.atomic():
+            created = model.objects.bulk_create(objs)
+    except IntegrityError:
+        for row_number, _ in chunk:
+            report.error(row_number, {'non_field_errors': ['Conflicts with a record saved meanwhile; retry this row']})
+        return []
+    report.imported += len(created)
+    return created
+
+
+def import_beds(hospital, upload, dry_run=False):
+    """Import beds from an uploaded file. Returns the report dict."""
+    report = _Report(dry_run)
+    seen = set()
+
+    for chunk in _valid_chunks(iter_rows(upload), CreateBedSerializer, BED_COLUMNS, report):
+        numbers = [d['bedNumber'] for _, d in chunk]
+        taken = set(
+            HospitalBed.objects.filter(hospital=hospital, bed_number__in=numbers)
+            .values_list('bed_number', flat=True)
+        )
+        rows, beds = [], []
+        for row_number, d in chunk:
+            if d['bedNumber'] in taken or d['bedNumber'] in seen:
+                report.error(row_number, {'bedNumber': ['A bed with this number already exists']})
+                continue
+            seen.add(d['bedNumber'])
+            rows.append((row_number, d))
+            beds.append(build_bed(hospital, d))
+        _insert(HospitalBed, rows, beds, report)
+
+    if report.imported and not dry_run:
+        sync_bed_counts(hospital)
+        invalidate_occupancy(hospital.id)
+    return report.as_dict()
+
+
+def import_patients(hospital, upload, dry_run=False):
+    """Import patients from an uploaded file. Returns the report dict."""
+    report = _Report(dry_run)
+    seen = set()
+    created = []
+
+    for chunk in _valid_chunks(iter_rows(upload), CreatePatientSerializer, PATIENT_COLUMNS, report):
+        given = [d['uhid'] for _, d in chunk if d.get('uhid')]
+        taken = set(
+            HospitalPatient.objects.filter(hospital=hospital, uhid__in=given)
+            .values_list('uhid', flat=True)
+        ) if given else set()
+        rows = []
+        for row_number, d in chunk:
+            uhid = d.get('uhid')
+            if uhid and (uhid in taken or uhid in seen):
+                report.error(row_number, {'uhid': ['A patient with this UHID already exists']})
+                continue
+            if uhid:
+                seen.add(uhid)
+            rows.append((row_number, d))
+
+        # One sequence reservation for the whole chunk
+        missing = sum(1 for _, d in rows if not d.get('uhid'))
+        new_uhids = iter(allocate(hospital.id, UHID, missing) if missing and not dry_run else [])
+        patients = [
+            build_patient(hospital, d, d.get('uhid') or f"P{next(new_uhids, '')}")
+            for _, d in rows
+        ]
+        created.extend((p.pk, p.phone) for p in _insert(HospitalPatient, rows, patients, report) if p.pk)
+
+    if created:
+        notify_admissions(hospital, link_patients_to_users(created))
+    return report.as_dict()
+
+
+def link_patients_to_users(patients):
+    """
+    Batch version of the single-patient phone matching: link each
+    (patient id, phone) to the mobile app user whose profile phone ends
+    with the same last 10 digits. Returns {patient id: user id} for the
+    patients linked.
+    """
+    try:
+        from app_auth.models import UserProfile
+
+        by_suffix = {}
+        for pk, phone in patients:
+            clean_phone = phone.strip().replace(' ', '').replace('-', '')
+            if len(clean_phone) >= 10:
+                by_suffix.setdefault(clean_phone[-10:], []).append(pk)
+
+        suffixes = list(by_suffix)
+        updates = []
+        for start in range(0, len(suffixes), CHUNK_SIZE):
+            batch = suffixes[start:start + CHUNK_SIZE]
+            match = Q()
+            for suffix in batch:
+                match |= Q(phone_number__endswith=suffix)
+            users = {}
+            for phone_number, user_id in UserProfile.objects.filter(match).values_list('phone_number', 'user_id'):
+                users.setdefault(re.sub(r'\D', '', str(phone_number))[-10:], user_id)
+            updates.extend(
+                HospitalPatient(pk=pk, linked_user_id=users[suffix])
+                for suffix in batch if suffix in users
+                for pk in by_suffix[suffix]
+            )
+
+        HospitalPatient.objects.bulk_update(updates, ['linked_user'], batch_size=CHUNK_SIZE)
+        return {patient.pk: patient.linked_user_id for patient in updates}
+    except Exception as e:
+        logger.warning(f"Patient linking after import failed: {e}")  # Non-critical, as for single patients
+        return {}
+
+
+def notify_admissions(hospital, linked):
+    """Admission pushes for the imported patients linked to an app user and admitted."""
+    try:
+        ids = list(linked)
+        for start in range(0, len(ids), CHUNK_SIZE):
+            admitted = HospitalPatient.objects.filter(id__in=ids[start:start + CHUNK_SIZE], status='Admitted')
+            queue_notifications([
+                Notification(user_id=linked[patient.pk], status='pending', **admission_message(patient, hospital.name))
+                for patient in admitted
+            ])
+    except Exception as e:
+        logger.warning(f"Admission notifications after import failed: {e}")  # Non-critical, as for single patients
@@ -0,0 +1,127 @@
+"""
+Filtering, sorting and keyset pagination for the dashboard list endpoints
+(beds, patients, claims, documents).
+
+Query params (all optional, camelCase like the rest of the dashboard API):
+- filters listed per endpoint, e.g. ?status=available,occupied&floor=2
+  (comma-separated values match any of them)
+- date ranges, e.g. ?admittedFrom=2025-01-01&admittedTo=2025-01-31 (inclusive days)
+- sort=<key> or sort=-<key> for descending, from the endpoint's sort keys
+- limit=N / cursor=<token> to page through results
+
+Without limit or cursor the full filtered list is returned as a plain array,
+exactly like before, so existing clients keep working. With either, the
+response is {"results": [...], "nextCursor": ..., "hasMore": ...}.
+"""
+from datetime import datetime, time, timedelta
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from doklink.pagination import InvalidCursor, paginate_keyset, parse_page_size
+
+
+class InvalidFilter(ValueError):
+    """Raised for a filter value that cannot be parsed."""
+
+
+def _parse_day(value):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise InvalidFilter(f"Invalid date '{value}', expected YYYY-MM-DD")
+    return day
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+# Range param kinds -> (lookup suffix, value converter). Datetime columns are
+# compared against day boundaries, so the plain column index still applies.
+RANGE_LOOKUPS = {
+    'date_from': ('gte', _parse_day),
+    'date_to': ('lte', _parse_day),
+    'datetime_from': ('gte', lambda value: _day_start(_parse_day(value))),
+    'datetime_to': ('lt', lambda value: _day_start(_parse_day(value) + timedelta(days=1))),
+}
+
+
+def apply_filters(queryset, params, filters=None, ranges=None):
+    """
+    Narrow `queryset` by request params.
+
+    filters: {param: field} exact matches, comma-separated values use __in.
+    ranges:  {param: (field, kind)} with kind a RANGE_LOOKUPS key.
+    """
+    for param, field in (filters or {}).items():
+        value = params.get(param)
+        if not value:
+            continue
+        values = [v.strip() for v in value.split(',') if v.strip()]
+        try:
+            if len(values) == 1:
+                queryset = queryset.filter(**{field: values[0]})
+            elif values:
+                queryset = queryset.filter(**{f'{field}__in': values})
+        except (ValueError, ValidationError):
+            raise InvalidFilter(f"Invalid value for '{param}'")
+
+    for param, (field, kind) in (ranges or {}).items():
+        value = params.get(param)
+        if not value:
+            continue
+        lookup, convert = RANGE_LOOKUPS[kind]
+        queryset = queryset.filter(**{f'{field}__{lookup}': convert(value)})
+
+    return queryset
+
+
+def list_response(request, queryset, serializer_class, sorts, default_sort,
+                  filters=None, ranges=None):
+    """
+    Filtered, sorted and optionally paginated list response.
+
+    sorts: {sort key: non-null model field}; default_sort like '-createdAt'.
+    """
+    params = request.query_params
+
+    try:
+        queryset = apply_filters(queryset, params, filters, ranges)
+    except InvalidFilter as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    sort = params.get('sort') or default_sort
+    descending = sort.startswith('-')
+    sort_key = sort.lstrip('-')
+    if sort_key not in sorts:
+        return Response(
+            {'error': f"Invalid sort '{sort}'. Options: {', '.join(sorted(sorts))}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    field = sorts[sort_key]
+
+    if 'limit' not in params and 'cursor' not in params:
+        direction = '-' if descending else ''
+        rows = queryset.order_by(f'{direction}{field}', f'{direction}id')
+        return Response(serializer_class(rows, many=True).data)
+
+    try:
+        rows, next_cursor = paginate_keyset(
+            queryset, field, descending,
+            cursor=params.get('cursor'),
+            limit=parse_page_size(params.get('limit')),
+        )
+    except InvalidCursor as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'results': serializer_class(rows, many=True).data,
+        'nextCursor': next_cursor,
+        'hasMore': next_cursor is not None,
+    })
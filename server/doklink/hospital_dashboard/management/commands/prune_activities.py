@@ -0,0 +1,77 @@
+"""
+Management command to apply the dashboard activity log retention policy.
+Run it periodically via cron job or scheduler, e.g. daily:
+
+    python manage.py prune_activities
+    python manage.py prune_activities --days 180 --months-ahead 3
+
+On a month-partitioned activity table (see hospital_dashboard.activity_log)
+it creates upcoming partitions and drops whole months older than --days;
+otherwise it deletes old rows in batches of --batch-size.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from hospital_dashboard.activity_log import (
+    delete_before, drop_partitions_before, ensure_partitions, is_partitioned,
+)
+
+
+class Command(BaseCommand):
+    help = 'Drop or delete dashboard activity older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.ACTIVITY_LOG['RETENTION_DAYS'],
+            help=f"Keep this many days of activity (default: {settings.ACTIVITY_LOG['RETENTION_DAYS']})"
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=settings.ACTIVITY_LOG['PARTITIONS_AHEAD'],
+            help='Partitioned tables only: create partitions this many months ahead'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Unpartitioned tables only: rows deleted per batch (default: 5000)'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.5,
+            help='Unpartitioned tables only: seconds to pause between batches (default: 0.5)'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = now - timedelta(days=options['days'])
+        started = time.monotonic()
+
+        if is_partitioned():
+            for name in ensure_partitions(now.date(), options['months_ahead']):
+                self.stdout.write(f'Created partition {name}')
+            dropped = drop_partitions_before(cutoff)
+            for name in dropped:
+                self.stdout.write(f'Dropped partition {name}')
+            self.stdout.write(
+                self.style.SUCCESS(f'Dropped {len(dropped)} partition(s) in {time.monotonic() - started:.2f}s')
+            )
+            return
+
+        deleted = 0
+        for deleted in delete_before(cutoff, options['batch_size'], options['sleep']):
+            self.stdout.write(f'Deleted {deleted} activity row(s)')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Deleted {deleted} activity row(s) older than {options["days"]} days '
+                f'in {time.monotonic() - started:.2f}s'
+            )
+        )
@@ -0,0 +1,34 @@
+"""
+Management command to recompute the claims analytics rollup from the claims
+table. Claim saves keep it current; run this once to backfill existing
+claims and after bulk changes that bypass model signals:
+
+    python manage.py rebuild_claim_rollups
+    python manage.py rebuild_claim_rollups --hospital-id 12
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from hospital_dashboard.claim_analytics import rebuild_claim_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute HospitalClaimRollup from HospitalClaim'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hospital-id',
+            type=int,
+            default=None,
+            help='Only rebuild this hospital (default: all hospitals)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = rebuild_claim_rollups(options['hospital_id'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Wrote {written} rollup row(s) in {time.monotonic() - started:.2f}s'
+            )
+        )
@@ -0,0 +1,46 @@
+"""
+Management command to rebuild the per-hospital stats table served to the
+SuperAdmin hospital list. Run it periodically via cron job or scheduler,
+more often than HOSPITAL_STATS['MAX_AGE_SECONDS'] (default 15 minutes):
+
+    python manage.py refresh_hospital_stats
+    python manage.py refresh_hospital_stats --loop --interval 300
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from hospital_dashboard.stats import refresh_hospital_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute bed/patient/claim counts for every hospital'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep refreshing instead of exiting after one pass'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=300.0,
+            help='Seconds between refreshes (with --loop, default: 300)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                started = time.monotonic()
+                written = refresh_hospital_stats()
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'Refreshed stats for {written} hospital(s) in {time.monotonic() - started:.2f}s'
+                    )
+                )
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping stats refresher')
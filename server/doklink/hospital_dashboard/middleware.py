@@ -0,0 +1,113 @@
+"""
+Tenant resolution for the hospital dashboard API.
+
+TenantMiddleware reads X-Hospital-Id (or ?hospital_id= for direct API calls)
+once per request and attaches the Hospital as `request.hospital` (None when
+absent or unknown), so handlers never query it themselves.
+
+Hospitals are looked up in two cache tiers before the database:
+- a per-process LRU (TENANT_CACHE['LOCAL_TTL_SECONDS'] / LOCAL_MAX_ENTRIES),
+- the shared Redis cache (TENANT_CACHE['TTL_SECONDS']).
+Saving or deleting a Hospital drops both entries in this process and the
+Redis entry (see hospital_dashboard.signals); other processes' local tier
+catches up within LOCAL_TTL_SECONDS.
+
+Each request gets its own copy of the cached instance: handlers save through
+it (bed-count syncs, for one), and a shared object would be changed under
+other requests and threads.
+"""
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from healthcare.models import Hospital
+
+logger = logging.getLogger(__name__)
+
+# Cached for ids with no hospital, so bad headers don't reach the database
+NOT_FOUND = 0
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _tenant_settings():
+    return settings.TENANT_CACHE
+
+
+def _cache_key(hospital_id):
+    return f"tenant:hospital:{hospital_id}"
+
+
+def _local_get(hospital_id):
+    with _local_lock:
+        entry = _local.get(hospital_id)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del _local[hospital_id]
+            return None
+        _local.move_to_end(hospital_id)
+        return value
+
+
+def _local_set(hospital_id, value):
+    with _local_lock:
+        _local[hospital_id] = (time.monotonic() + _tenant_settings()['LOCAL_TTL_SECONDS'], value)
+        _local.move_to_end(hospital_id)
+        while len(_local) > _tenant_settings()['LOCAL_MAX_ENTRIES']:
+            _local.popitem(last=False)
+
+
+def resolve_hospital(hospital_id):
+    """The Hospital for an id from the request, or None."""
+    try:
+        hospital_id = int(hospital_id)
+    except (TypeError, ValueError):
+        return None
+
+    hospital = _local_get(hospital_id)
+    if hospital is None:
+        try:
+            hospital = cache.get(_cache_key(hospital_id))
+        except Exception as e:
+            logger.warning(f"Tenant cache read failed for hospital {hospital_id}: {e}")
+
+        if hospital is None:
+            hospital = Hospital.objects.filter(id=hospital_id).first() or NOT_FOUND
+            try:
+                cache.set(_cache_key(hospital_id), hospital, _tenant_settings()['TTL_SECONDS'])
+            except Exception as e:
+                logger.warning(f"Tenant cache write failed for hospital {hospital_id}: {e}")
+
+        _local_set(hospital_id, hospital)
+
+    return copy.copy(hospital) if hospital else None
+
+
+def invalidate_hospital(hospital_id):
+    """Drop a hospital from both cache tiers (the local one only in this process)."""
+    with _local_lock:
+        _local.pop(hospital_id, None)
+    try:
+        cache.delete(_cache_key(hospital_id))
+    except Exception as e:
+        logger.warning(f"Tenant cache invalidation failed for hospital {hospital_id}: {e}")
+
+
+class TenantMiddleware:
+    """Attach the dashboard tenant as request.hospital."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        hospital_id = request.headers.get('X-Hospital-Id') or request.GET.get('hospital_id')
+        request.hospital = resolve_hospital(hospital_id) if hospital_id else None
+        return self.get_response(request)
@@ -1,10 +1,20 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password, check_password
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 from healthcare.models import Hospital
 
 
+def phone_digits(field='phone'):
+    """Digits only of a free-form phone column: "+91 98765-43210" -> "919876543210"."""
+    return models.Func(
+        models.F(field), models.Value(r'\D'), models.Value(''), models.Value('g'),
+        function='REGEXP_REPLACE', output_field=models.CharField(),
+    )
+
+
 class HospitalStaff(models.Model):
     """
     Staff users for the hospital web dashboard.
@@ -146,6 +156,17 @@ class HospitalPatient(models.Model):
         indexes = [
             models.Index(fields=['hospital', 'status']),
             models.Index(fields=['uhid']),
+            # Dashboard list sorts / filters (hospital_dashboard.listing)
+            models.Index(fields=['hospital', 'created_at', 'id']),
+            models.Index(fields=['hospital', 'status', 'created_at', 'id']),
+            models.Index(fields=['hospital', 'admission_date']),
+            # Patient search (hospital_dashboard.search); needs the pg_trgm extension
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='hd_patient_name_trgm'),
+            # uhid__icontains compiles to UPPER(uhid) LIKE ...
+            GinIndex(OpClass(Upper('uhid'), name='gin_trgm_ops'), name='hd_patient_uhid_trgm'),
+            # Phones are stored as typed; search matches their digits only
+            GinIndex(OpClass(phone_digits(), name='gin_trgm_ops'), name='hd_patient_phone_digits_trgm'),
+            GinIndex(fields=['diagnosis'], opclasses=['gin_trgm_ops'], name='hd_patient_diagnosis_trgm'),
         ]
 
     def __str__(self):
@@ -182,6 +203,7 @@ class HospitalDocument(models.Model):
         verbose_name_plural = "Hospital Documents"
         indexes = [
             models.Index(fields=['hospital', 'patient']),
+            models.Index(fields=['hospital', 'created_at', 'id']),
         ]
 
     def __str__(self):
@@ -229,11 +251,23 @@ class HospitalClaim(models.Model):
         verbose_name_plural = "Hospital Claims"
         indexes = [
             models.Index(fields=['hospital', 'status']),
+            # Dashboard list sorts / filters (hospital_dashboard.listing)
+            models.Index(fields=['hospital', 'created_at', 'id']),
+            models.Index(fields=['hospital', 'status', 'created_at', 'id']),
+            models.Index(fields=['hospital', 'submission_date']),
+            models.Index(fields=['hospital', 'insurer']),
         ]
 
     def __str__(self):
         return f"Claim {self.id} - {self.patient_name} ({self.status})"
 
+    def save(self, *args, **kwargs):
+        # The claims rollup reads the stored row under a lock in pre_save and
+        # updates in post_save (hospital_dashboard.signals); both must share
+        # the save's transaction so concurrent saves serialize on the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class HospitalBed(models.Model):
     """Individual bed records for the hospital dashboard."""
@@ -277,7 +311,10 @@ class HospitalBed(models.Model):
         verbose_name_plural = "Hospital Beds"
         unique_together = ['hospital', 'bed_number']
         indexes = [
-            models.Index(fields=['hospital', 'status']),
+            # (hospital, bed_number) is covered by the unique constraint
+            models.Index(fields=['hospital', 'status', 'bed_number']),
+            models.Index(fields=['hospital', 'department', 'bed_number']),
+            models.Index(fields=['hospital', 'floor', 'bed_number']),
         ]
 
     def __str__(self):
@@ -306,13 +343,69 @@ class HospitalActivity(models.Model):
         verbose_name_plural = "Hospital Activities"
         ordering = ['-time']
         indexes = [
-            models.Index(fields=['hospital']),
+            # Newest-first activity pages per hospital (keyset on time, id)
+            models.Index(fields=['hospital', 'time', 'id']),
         ]
 
     def __str__(self):
         return f"{self.activity_type}: {self.description[:50]}"
 
 
+class HospitalStats(models.Model):
+    """
+    Periodically refreshed per-hospital counts for the SuperAdmin hospital list.
+    Rebuilt by `python manage.py refresh_hospital_stats`; rows older than
+    HOSPITAL_STATS['MAX_AGE_SECONDS'] are ignored in favour of live counts.
+    """
+    hospital = models.OneToOneField(
+        Hospital, on_delete=models.CASCADE,
+        related_name='dashboard_stats'
+    )
+    beds = models.PositiveIntegerField(default=0)
+    patients = models.PositiveIntegerField(default=0)
+    claims = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Hospital Stats"
+        verbose_name_plural = "Hospital Stats"
+
+    def __str__(self):
+        return f"Stats - {self.hospital.name} ({self.refreshed_at:%Y-%m-%d %H:%M})"
+
+
+class HospitalClaimRollup(models.Model):
+    """
+    Claim counts and amounts per hospital x insurer x status x month, kept
+    current from claim saves/deletes (see hospital_dashboard.claim_analytics).
+    Month is the first day of the submission month, or of the creation month
+    for claims without a submission date.
+    """
+    hospital = models.ForeignKey(
+        Hospital, on_delete=models.CASCADE,
+        related_name='claim_rollups'
+    )
+    insurer = models.CharField(max_length=200)
+    status = models.CharField(max_length=15)
+    month = models.DateField()
+    claims = models.IntegerField(default=0)
+    claim_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    approved_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pending_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    rejected_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Hospital Claim Rollup"
+        verbose_name_plural = "Hospital Claim Rollups"
+        unique_together = ['hospital', 'insurer', 'status', 'month']
+        indexes = [
+            models.Index(fields=['hospital', 'month']),
+        ]
+
+    def __str__(self):
+        return f"{self.hospital.name} - {self.insurer} {self.status} {self.month:%Y-%m}: {self.claims}"
+
+
 class HospitalSequence(models.Model):
     """Atomic counters for generating sequential IDs per hospital"""
     hospital = models.ForeignKey(
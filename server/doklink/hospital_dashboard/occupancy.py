@@ -0,0 +1,101 @@
+"""
+Bed occupancy summary for a hospital (GET beds/occupancy/).
+
+One GROUP BY over (status, category, department, floor, wing) returns a row
+per distinct combination; the per-dimension breakdowns are rolled up from
+those rows in Python, so the work grows with the number of distinct wards
+rather than the number of beds. The result is cached per hospital for
+OCCUPANCY_CACHE['TTL_SECONDS'] and dropped on every bed save or delete
+(see hospital_dashboard.signals).
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import HospitalBed
+
+logger = logging.getLogger(__name__)
+
+STATUSES = [value for value, _ in HospitalBed.BED_STATUS_CHOICES]
+
+# Response key -> HospitalBed field
+DIMENSIONS = {
+    'byCategory': 'bed_category',
+    'byDepartment': 'department',
+    'byFloor': 'floor',
+    'byWing': 'wing',
+}
+
+
+def _cache_key(hospital_id):
+    return f"occupancy:hospital:{hospital_id}"
+
+
+def _empty_counts():
+    return {'total': 0, **{s: 0 for s in STATUSES}}
+
+
+def _with_rate(counts):
+    counts['occupancyRate'] = round(100 * counts['occupied'] / counts['total'], 1) if counts['total'] else 0.0
+    return counts
+
+
+def compute_occupancy(hospital_id):
+    """Occupancy counts per status and per dimension, from one grouped query."""
+    rows = (
+        HospitalBed.objects.filter(hospital_id=hospital_id)
+        .order_by()
+        .values('status', *DIMENSIONS.values())
+        .annotate(n=Count('id'))
+    )
+
+    totals = _empty_counts()
+    groups = {key: {} for key in DIMENSIONS}
+    for row in rows:
+        n, bed_status = row['n'], row['status']
+        totals['total'] += n
+        totals[bed_status] = totals.get(bed_status, 0) + n
+        for key, field in DIMENSIONS.items():
+            counts = groups[key].setdefault(row[field] or '', _empty_counts())
+            counts['total'] += n
+            counts[bed_status] = counts.get(bed_status, 0) + n
+
+    return {
+        **_with_rate(totals),
+        **{
+            key: [
+                {'name': name, **_with_rate(counts)}
+                for name, counts in sorted(groups[key].items())
+            ]
+            for key in DIMENSIONS
+        },
+        'generatedAt': timezone.now().isoformat(),
+    }
+
+
+def get_occupancy(hospital_id):
+    """Cached occupancy summary for a hospital."""
+    try:
+        summary = cache.get(_cache_key(hospital_id))
+    except Exception as e:
+        logger.warning(f"Occupancy cache read failed for hospital {hospital_id}: {e}")
+        summary = None
+
+    if summary is None:
+        summary = compute_occupancy(hospital_id)
+        try:
+            cache.set(_cache_key(hospital_id), summary, settings.OCCUPANCY_CACHE['TTL_SECONDS'])
+        except Exception as e:
+            logger.warning(f"Occupancy cache write failed for hospital {hospital_id}: {e}")
+
+    return summary
+
+
+def invalidate_occupancy(hospital_id):
+    try:
+        cache.delete(_cache_key(hospital_id))
+    except Exception as e:
+        logger.warning(f"Occupancy cache invalidation failed for hospital {hospital_id}: {e}")
@@ -0,0 +1,67 @@
+"""
+Ranked patient search for the dashboard (GET patients/search/?q=...).
+
+Matches name and diagnosis by trigram word similarity (`%>`, tolerant of
+typos and partial words), UHID by substring, and phone by substring of its
+digits (spaces, dashes, brackets and "+" ignored on both sides), each served
+by a gin_trgm_ops index on HospitalPatient. Results are ranked by the best
+similarity across those fields, with exact UHID matches first, and exact
+phone matches too when the query is a full number (same last 10 digits, so
+a country code on either side does not matter).
+Only the top N rows are returned, so response size does not grow with the
+hospital's patient count.
+
+Requires the pg_trgm extension in the database:
+
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+"""
+from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+
+from .models import HospitalPatient, phone_digits
+
+MIN_QUERY_LENGTH = 2
+DEFAULT_RESULTS = 20
+MAX_RESULTS = 50
+
+# Phone fragments shorter than this would match most of the table
+MIN_PHONE_DIGITS = 4
+# A full (Indian mobile) number; only queries this long can be exact phone matches
+PHONE_NUMBER_DIGITS = 10
+
+
+def search_patients(hospital, query, limit=DEFAULT_RESULTS):
+    """Top `limit` patients of `hospital` matching `query`, best match first."""
+    query = query.strip()
+    digits = ''.join(ch for ch in query if ch.isdigit())
+
+    # Each condition is served by one of the trigram indexes on HospitalPatient
+    matches = (
+        Q(name__trigram_word_similar=query)
+        | Q(uhid__icontains=query)
+        | Q(diagnosis__trigram_word_similar=query)
+    )
+    exact = Q(uhid__iexact=query)
+    if len(digits) >= PHONE_NUMBER_DIGITS:
+        # Drop a country code typed in the query; a stored one still matches
+        digits = digits[-PHONE_NUMBER_DIGITS:]
+        exact |= Q(phone_digits__endswith=digits)
+    if len(digits) >= MIN_PHONE_DIGITS:
+        # Same expression as the hd_patient_phone_digits_trgm index
+        matches |= Q(phone_digits__contains=digits)
+
+    return (
+        HospitalPatient.objects.filter(hospital=hospital)
+        .annotate(phone_digits=phone_digits())
+        .filter(matches)
+        .annotate(
+            rank=Greatest(
+                Case(When(exact, then=Value(1.0)), default=Value(0.0), output_field=FloatField()),
+                TrigramWordSimilarity(query, 'name'),
+                TrigramSimilarity('uhid', query),
+                TrigramWordSimilarity(query, 'diagnosis') * 0.8,
+            )
+        )
+        .order_by('-rank', '-created_at', '-id')[:limit]
+    )
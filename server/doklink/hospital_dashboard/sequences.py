@@ -0,0 +1,105 @@
+"""
+Per-hospital sequential identifiers (UHIDs, ...) backed by HospitalSequence.
+
+Values are handed out hi/lo style: a process reserves a block of
+HOSPITAL_SEQUENCES['BLOCK_SIZE'] values with one
+`UPDATE ... SET current_val = current_val + n RETURNING current_val`
+and serves later requests from memory, so identifiers are known before the
+row is inserted and the counter row is locked only for that one statement.
+Values are unique per hospital and increasing within a process, but not
+gap-free: a restarted process forfeits the rest of its block.
+
+Inside an atomic block the reservation would be rolled back together with
+the caller's transaction, so there only the values actually needed are
+reserved and nothing is kept for later requests.
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Max
+
+from .models import HospitalPatient, HospitalSequence
+
+UHID = 'uhid'
+
+
+def _seed_uhid(hospital_id):
+    # UHIDs used to be "P<patient id>"; start above those to avoid clashes
+    return HospitalPatient.objects.filter(hospital_id=hospital_id).aggregate(m=Max('id'))['m'] or 0
+
+
+# Starting value for sequences created on first use
+SEQUENCE_SEEDS = {
+    UHID: _seed_uhid,
+}
+
+_blocks = {}
+_blocks_lock = threading.Lock()
+_blocks_pid = None
+
+
+def _reserve(hospital_id, name, size):
+    """Advance the counter by `size` in one statement; returns the reserved range."""
+    table = HospitalSequence._meta.db_table
+    sql = (
+        f'UPDATE {table} SET current_val = current_val + %s '
+        f'WHERE hospital_id = %s AND sequence_name = %s RETURNING current_val'
+    )
+    for _ in range(2):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [size, hospital_id, name])
+            row = cursor.fetchone()
+        if row is not None:
+            return range(row[0] - size + 1, row[0] + 1)
+        _create_sequence(hospital_id, name)
+    raise HospitalSequence.DoesNotExist(f"Sequence {name} for hospital {hospital_id} could not be created")
+
+
+def _create_sequence(hospital_id, name):
+    seed = SEQUENCE_SEEDS[name](hospital_id) if name in SEQUENCE_SEEDS else 0
+    try:
+        with transaction.atomic():
+            HospitalSequence.objects.get_or_create(
+                hospital_id=hospital_id, sequence_name=name,
+                defaults={'current_val': seed}
+            )
+    except IntegrityError:
+        pass  # Created concurrently by another process
+
+
+def allocate(hospital_id, name, count=1):
+    """Reserve `count` values of a hospital's sequence. Returns a list of ints."""
+    global _blocks_pid
+
+    if connection.in_atomic_block:
+        return list(_reserve(hospital_id, name, count))
+
+    block_size = settings.HOSPITAL_SEQUENCES['BLOCK_SIZE']
+    key = (hospital_id, name)
+    values = []
+    with _blocks_lock:
+        # Forked workers must not reuse the parent's blocks
+        if _blocks_pid != os.getpid():
+            _blocks.clear()
+            _blocks_pid = os.getpid()
+
+        while len(values) < count:
+            block = _blocks.get(key)
+            if not block:
+                block = list(_reserve(hospital_id, name, max(block_size, count - len(values))))
+                _blocks[key] = block
+            take = count - len(values)
+            values.extend(block[:take])
+            del block[:take]
+    return values
+
+
+def next_value(hospital_id, name):
+    return allocate(hospital_id, name)[0]
+
+
+def next_uhid(hospital_id):
+    """Next UHID for a hospital's patient, e.g. "P1042"."""
+    return f"P{next_value(hospital_id, UHID)}"
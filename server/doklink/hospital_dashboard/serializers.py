@@ -33,6 +33,13 @@ class DashboardHospitalWithStatsSerializer(DashboardHospitalSerializer):
         fields = DashboardHospitalSerializer.Meta.fields + ['stats']
 
     def get_stats(self, obj):
+        # Annotated by hospital_dashboard.stats.with_stats(); count directly otherwise
+        if hasattr(obj, 'bed_count'):
+            return {
+                'beds': obj.bed_count,
+                'patients': obj.patient_count,
+                'claims': obj.claim_count,
+            }
         return {
             'beds': obj.dashboard_beds.count(),
             'patients': obj.dashboard_patients.count(),
@@ -0,0 +1,83 @@
+"""
+Keep the tenant cache (hospital_dashboard.middleware), the occupancy summary
+(hospital_dashboard.occupancy) and the claims rollup
+(hospital_dashboard.claim_analytics) in step with hospital, bed and claim
+changes.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from healthcare.models import Hospital
+from .middleware import invalidate_hospital
+from .claim_analytics import apply_contribution, claim_contribution
+from .models import HospitalBed, HospitalClaim
+from .occupancy import invalidate_occupancy
+
+
+@receiver(post_save, sender=Hospital)
+@receiver(post_delete, sender=Hospital)
+def invalidate_tenant_cache(sender, instance, **kwargs):
+    """Hospital edited (bed-count syncs included), created or removed."""
+    hospital_id = instance.pk
+    invalidate_hospital(hospital_id)
+    # Again after commit, in case a request re-cached the old row meanwhile
+    transaction.on_commit(lambda: invalidate_hospital(hospital_id))
+
+
+@receiver(post_save, sender=HospitalBed)
+@receiver(post_delete, sender=HospitalBed)
+def invalidate_occupancy_cache(sender, instance, **kwargs):
+    """Bed added, edited or removed."""
+    hospital_id = instance.hospital_id
+    invalidate_occupancy(hospital_id)
+    transaction.on_commit(lambda: invalidate_occupancy(hospital_id))
+
+
+def _stored_contribution(claim):
+    """
+    What the claim's stored row contributes, read under a row lock: a
+    concurrent save or delete of the same claim waits for this transaction,
+    then sees the row as this one leaves it. None for a new claim.
+    """
+    if not claim.pk:
+        return None
+    stored = HospitalClaim.objects.select_for_update().filter(pk=claim.pk).only(
+        'hospital_id', 'insurer', 'status', 'submission_date', 'created_at',
+        'claim_amount', 'approved_amount', 'pending_amount', 'rejected_amount',
+    ).first()
+    return claim_contribution(stored) if stored is not None else None
+
+
+@receiver(pre_save, sender=HospitalClaim)
+def remember_claim_contribution(sender, instance, **kwargs):
+    """Capture what the stored claim contributes before it is overwritten."""
+    # HospitalClaim.save wraps this, the UPDATE and post_save in one transaction
+    instance._rollup_previous = _stored_contribution(instance)
+
+
+@receiver(post_save, sender=HospitalClaim)
+def update_claim_rollup(sender, instance, **kwargs):
+    """Move the claim's contribution from its old rollup group to its new one."""
+    previous = getattr(instance, '_rollup_previous', None)
+    current = claim_contribution(instance)
+    if previous == current:
+        return
+
+    if previous:
+        apply_contribution(*previous, sign=-1)
+    apply_contribution(*current, sign=1)
+
+
+@receiver(pre_delete, sender=HospitalClaim)
+def remember_deleted_claim_contribution(sender, instance, **kwargs):
+    """The stored row, not the possibly stale instance, is what leaves the rollup."""
+    # Sent inside the deletion's transaction
+    instance._rollup_previous = _stored_contribution(instance)
+
+
+@receiver(post_delete, sender=HospitalClaim)
+def remove_claim_from_rollup(sender, instance, **kwargs):
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        apply_contribution(*previous, sign=-1)
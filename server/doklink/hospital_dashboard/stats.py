@@ -0,0 +1,81 @@
+"""
+Per-hospital bed / patient / claim counts for the SuperAdmin hospital list.
+
+`with_stats()` annotates a Hospital queryset so the whole list is one query:
+each count comes from the HospitalStats row when it is fresh enough, and
+from a correlated COUNT subquery otherwise (Postgres only evaluates the
+subquery for hospitals without a fresh row). `refresh_hospital_stats()`
+rebuilds the table with one GROUP BY per model, so large tenants are served
+from the table instead of counting their rows on every page load.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from healthcare.models import Hospital
+from .models import HospitalBed, HospitalClaim, HospitalPatient, HospitalStats
+
+# Annotation name -> (HospitalStats field, counted model)
+STAT_SOURCES = {
+    'bed_count': ('beds', HospitalBed),
+    'patient_count': ('patients', HospitalPatient),
+    'claim_count': ('claims', HospitalClaim),
+}
+
+
+def _live_count(model):
+    counts = (
+        model.objects.filter(hospital=OuterRef('pk'))
+        .order_by()
+        .values('hospital')
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def with_stats(queryset):
+    """Annotate bed_count / patient_count / claim_count on a Hospital queryset."""
+    cutoff = timezone.now() - timedelta(seconds=settings.HOSPITAL_STATS['MAX_AGE_SECONDS'])
+    fresh = Q(dashboard_stats__refreshed_at__gte=cutoff)
+
+    return queryset.annotate(**{
+        name: Case(
+            When(fresh, then=F(f'dashboard_stats__{field}')),
+            default=_live_count(model),
+            output_field=IntegerField(),
+        )
+        for name, (field, model) in STAT_SOURCES.items()
+    })
+
+
+def _grouped_counts(model):
+    return dict(
+        model.objects.order_by().values_list('hospital_id').annotate(n=Count('pk'))
+    )
+
+
+def refresh_hospital_stats():
+    """Recompute every hospital's counts and upsert HospitalStats. Returns rows written."""
+    now = timezone.now()
+    counts = {field: _grouped_counts(model) for field, model in STAT_SOURCES.values()}
+
+    rows = [
+        HospitalStats(
+            hospital_id=hospital_id,
+            refreshed_at=now,
+            **{field: counts[field].get(hospital_id, 0) for field in counts},
+        )
+        for hospital_id in Hospital.objects.values_list('pk', flat=True).iterator()
+    ]
+    HospitalStats.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['hospital'],
+        update_fields=[*counts, 'refreshed_at'],
+    )
+    return len(rows)
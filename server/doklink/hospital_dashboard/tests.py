@@ -1,3 +1,274 @@
-from django.test import TestCase
+import io
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from app_auth.models import UserProfile
+from healthcare.models import Hospital
+from notifications.models import Notification
+from .claim_analytics import apply_contribution, claim_contribution, rebuild_claim_rollups
+from .exports import DATASETS, export_response
+from .imports import import_beds, import_patients
+from .middleware import invalidate_hospital, resolve_hospital
+from .models import HospitalBed, HospitalClaim, HospitalClaimRollup, HospitalPatient, HospitalSequence
+from . import sequences
+from .search import search_patients
+
+
+def _hospital():
+    return Hospital.objects.create(name='City Hospital', address='1 Main Rd', city='Kochi', state='Kerala', pin_code='682001')
+
+
+class ClaimRollupTests(TestCase):
+    def setUp(self):
+        self.hospital = _hospital()
+        self.patient = HospitalPatient.objects.create(
+            hospital=self.hospital, uhid='P1', name='Asha', age=34, gender='Female',
+            phone='9876543210', emergency_contact='9000000000', diagnosis='Fever',
+        )
+
+    def _claim(self, **fields):
+        return HospitalClaim.objects.create(
+            hospital=self.hospital, patient=self.patient, patient_name='Asha',
+            policy_number='POL-1', submission_date=date(2025, 3, 14), **fields,
+        )
+
+    def _rollup(self):
+        return sorted(
+            HospitalClaimRollup.objects.filter(hospital=self.hospital, claims__gt=0)
+            .values_list('insurer', 'status', 'month', 'claims', 'claim_amount', 'approved_amount')
+        )
+
+    def test_contribution_round_trip(self):
+        claim = self._claim(insurer='Star', claim_amount=Decimal('1000.50'), status='Pending')
+        key, amounts = claim_contribution(claim)
+
+        self.assertEqual(key, {'hospital_id': self.hospital.id, 'insurer': 'Star', 'status': 'Pending', 'month': date(2025, 3, 1)})
+        self.assertEqual(amounts['claim_amount'], Decimal('1000.50'))
+
+        apply_contribution(key, amounts, sign=1)
+        apply_contribution(key, amounts, sign=-1)
+        self.assertEqual(self._rollup(), [('Star', 'Pending', date(2025, 3, 1), 1, Decimal('1000.50'), Decimal('0'))])
+
+    def test_saves_and_deletes_match_a_rebuild(self):
+        first = self._claim(insurer='Star', claim_amount=1000, status='Pending')
+        self._claim(insurer='Care', claim_amount=500, status='Pending')
+
+        first.status, first.approved_amount = 'Approved', 800
+        first.save()
+        stale = HospitalClaim.objects.get(pk=first.pk)
+        stale.insurer = 'Care'
+        stale.save()
+        HospitalClaim.objects.get(insurer='Care', status='Pending').delete()
+
+        incremental = self._rollup()
+        rebuild_claim_rollups(self.hospital.id)
+        self.assertEqual(incremental, self._rollup())
+        self.assertEqual(incremental, [('Care', 'Approved', date(2025, 3, 1), 1, Decimal('1000'), Decimal('800'))])
+
+
+class TenantCacheTests(TestCase):
+    def setUp(self):
+        self.hospital = _hospital()
+        invalidate_hospital(self.hospital.id)
+        self.addCleanup(invalidate_hospital, self.hospital.id)
+
+    def test_each_request_gets_its_own_instance(self):
+        first = resolve_hospital(self.hospital.id)
+        first.name = 'Changed in one request'
+
+        second = resolve_hospital(self.hospital.id)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.name, 'City Hospital')
+
+    def test_bed_count_sync_refreshes_the_cached_hospital(self):
+        self.assertEqual(resolve_hospital(self.hospital.id).total_icu_beds, 0)
+
+        HospitalBed.objects.create(
+            hospital=resolve_hospital(self.hospital.id), bed_number='ICU-1', bed_category='ICU',
+            floor='1', daily_rate=5000,
+        )
+
+        self.assertEqual(resolve_hospital(self.hospital.id).total_icu_beds, 1)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        hospital = _hospital()
+        HospitalPatient.objects.create(
+            hospital=hospital, uhid='P1', name='=HYPERLINK("http://x.example","Asha")', age=34,
+            gender='Female', phone='+91 98765 43210', emergency_contact='9000000000', diagnosis='-2+3',
+        )
+        self.queryset = DATASETS['patients']['queryset'](hospital)
+        self.columns = [('name', 'name'), ('phone', 'phone'), ('diagnosis', 'diagnosis'), ('age', 'age')]
+
+    def _export(self, export_format):
+        response = export_response(self.queryset, self.columns, export_format, False, 'patients')
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_neutralises_formulas(self):
+        self.assertEqual(self._export('csv').splitlines()[1], '"\'=HYPERLINK(""http://x.example"",""Asha"")",\'+91 98765 43210,\'-2+3,34')
+
+    def test_ndjson_keeps_values_as_stored(self):
+        self.assertIn('"name": "=HYPERLINK(', self._export('ndjson'))
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+            if cursor.fetchone() is None:
+                self.skipTest('pg_trgm is not available on this database server')
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+        self.hospital = _hospital()
+        for uhid, phone in (('P1', '98765 43210'), ('P2', '+91 98765-43210'), ('P3', '98765 00000')):
+            HospitalPatient.objects.create(
+                hospital=self.hospital, uhid=uhid, name=f'Patient {uhid}', age=40, gender='Male',
+                phone=phone, emergency_contact='9000000000', diagnosis='Fever',
+            )
+
+    def test_formatted_phone_numbers_match(self):
+        for query in ('9876543210', '98765 43210', '+91 98765 43210', '98765-43210'):
+            results = search_patients(self.hospital, query)
+            self.assertEqual(sorted(p.uhid for p in results), ['P1', 'P2'], query)
+            self.assertEqual({p.rank for p in results}, {1.0}, query)
+
+    def test_partial_phone_number_is_not_an_exact_match(self):
+        results = search_patients(self.hospital, '98765')
+
+        self.assertEqual(sorted(p.uhid for p in results), ['P1', 'P2', 'P3'])
+        self.assertTrue(all(p.rank < 1.0 for p in results))
+
+
+def _stored_sequence(hospital):
+    return HospitalSequence.objects.get(hospital=hospital, sequence_name=sequences.UHID).current_val
+
+
+class SequenceTests(TestCase):
+    # Test methods run inside a transaction: allocate's in-atomic path
+    def setUp(self):
+        self.hospital = _hospital()
+        sequences._blocks.clear()
+
+    def test_in_atomic_block_reserves_only_count(self):
+        self.assertEqual(sequences.allocate(self.hospital.id, sequences.UHID, 3), [1, 2, 3])
+        self.assertEqual(sequences.allocate(self.hospital.id, sequences.UHID), [4])
+        self.assertEqual(_stored_sequence(self.hospital), 4)
+        self.assertEqual(sequences._blocks, {})
+
+    def test_seeded_above_existing_patient_ids(self):
+        patients = [
+            HospitalPatient.objects.create(hospital=self.hospital, uhid=f'P{i}', name='Old', phone='9000000000')
+            for i in range(3)
+        ]
+
+        self.assertEqual(sequences.next_uhid(self.hospital.id), f'P{patients[-1].id + 1}')
+
+
+@override_settings(HOSPITAL_SEQUENCES={'BLOCK_SIZE': 10})
+class SequenceBlockTests(TransactionTestCase):
+    # Autocommit, as in a request: values come from per-process blocks
+    def setUp(self):
+        self.hospital = _hospital()
+        sequences._blocks.clear()
+        self.addCleanup(sequences._blocks.clear)
+
+    def test_block_is_reused_across_calls(self):
+        self.assertEqual(sequences.allocate(self.hospital.id, sequences.UHID), [1])
+        self.assertEqual(sequences.allocate(self.hospital.id, sequences.UHID, 2), [2, 3])
+        self.assertEqual(_stored_sequence(self.hospital), 10)
+
+    def test_count_larger_than_block(self):
+        self.assertEqual(sequences.allocate(self.hospital.id, sequences.UHID, 25), list(range(1, 26)))
+        self.assertEqual(_stored_sequence(self.hospital), 25)
+
+        self.assertEqual(sequences.allocate(self.hospital.id, sequences.UHID), [26])
+        self.assertEqual(_stored_sequence(self.hospital), 35)
+
+    def test_forked_process_reserves_its_own_block(self):
+        self.assertEqual(sequences.allocate(self.hospital.id, sequences.UHID), [1])
+
+        with mock.patch('hospital_dashboard.sequences.os.getpid', return_value=-1):
+            self.assertEqual(sequences.allocate(self.hospital.id, sequences.UHID), [11])
+        self.assertEqual(_stored_sequence(self.hospital), 20)
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.hospital = _hospital()
+
+    def test_import_beds_from_csv(self):
+        upload = SimpleUploadedFile('beds.csv', (
+            b'Bed Number,bedCategory,floor,daily_rate,Has Oxygen\n'
+            b'ICU-1,ICU,1,5000,true\n'
+            b'G-1,General,2,1200,\n'
+            b'G-1,General,2,1200,\n'  # Duplicate of the row above
+            b'G-2,General,2,not-a-number,\n'
+        ))
+
+        report = import_beds(self.hospital, upload)
+
+        self.assertEqual(report['imported'], 2)
+        self.assertEqual(sorted(e['row'] for e in report['errors']), [4, 5])
+        self.assertTrue(HospitalBed.objects.get(hospital=self.hospital, bed_number='ICU-1').has_oxygen)
+        self.hospital.refresh_from_db()
+        self.assertEqual((self.hospital.total_icu_beds, self.hospital.total_general_beds), (1, 1))
+
+    def test_import_beds_from_xlsx(self):
+        import openpyxl
+
+        workbook = openpyxl.Workbook()
+        workbook.active.append(['bedNumber', 'bedCategory', 'floor', 'dailyRate'])
+        workbook.active.append(['W-1', 'General', 3, 900.0])
+        content = io.BytesIO()
+        workbook.save(content)
+
+        report = import_beds(self.hospital, SimpleUploadedFile('beds.xlsx', content.getvalue()))
+
+        self.assertEqual(report['imported'], 1)
+        self.assertEqual(HospitalBed.objects.get(hospital=self.hospital).floor, '3')
+
+    def test_dry_run_saves_nothing(self):
+        upload = SimpleUploadedFile('beds.csv', b'bedNumber,bedCategory,floor,dailyRate\nG-1,General,1,100\n')
+
+        report = import_beds(self.hospital, upload, dry_run=True)
+
+        self.assertEqual((report['imported'], report['dryRun']), (1, True))
+        self.assertFalse(HospitalBed.objects.exists())
+
+    @mock.patch('notifications.broadcast._executor.submit')
+    def test_import_patients_links_users_and_queues_admissions(self, submit):
+        user = User.objects.create_user('patient', 'patient@example.com', 'Pass-123-word')
+        UserProfile.objects.create(user=user, phone_number='+919876543210', aadhaar_number='123412341234')
+        upload = SimpleUploadedFile('patients.csv', (
+            b'name,age,gender,phone,emergencyContact,diagnosis,uhid\n'
+            b'Asha,34,Female,98765 43210,9000000000,Fever,\n'
+            b'Ravi,50,Male,9000000001,9000000000,Fracture,P900\n'
+            b'Ravi again,51,Male,9000000002,9000000000,Fracture,P900\n'
+        ))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report = import_patients(self.hospital, upload)
+
+        self.assertEqual(report['imported'], 2)
+        self.assertEqual(report['errors'][0]['row'], 4)
+        asha = HospitalPatient.objects.get(hospital=self.hospital, name='Asha')
+        self.assertTrue(asha.uhid.startswith('P'))
+        self.assertEqual(asha.linked_user, user)
+
+        notification = Notification.objects.get(user=user)
+        self.assertEqual(notification.notification_type, 'admission')
+        self.assertEqual(notification.data['patientId'], str(asha.id))
+        submit.assert_called_once()
+
+    def test_unsupported_file_type(self):
+        from .imports import ImportFileError
+
+        with self.assertRaises(ImportFileError):
+            import_beds(self.hospital, SimpleUploadedFile('beds.txt', b'bedNumber\nG-1\n'))
@@ -14,12 +14,17 @@ urlpatterns = [
 
     # Bed management
     path('beds/', views.manage_beds, name='dashboard-beds'),
+    path('beds/occupancy/', views.bed_occupancy, name='dashboard-bed-occupancy'),
+    path('beds/import/', views.import_beds_file, name='dashboard-bed-import'),
 
     # Patient management
     path('patients/', views.manage_patients, name='dashboard-patients'),
+    path('patients/search/', views.patient_search, name='dashboard-patient-search'),
+    path('patients/import/', views.import_patients_file, name='dashboard-patient-import'),
 
     # Claims management
     path('claims/', views.manage_claims, name='dashboard-claims'),
+    path('claims/analytics/', views.claims_analytics, name='dashboard-claims-analytics'),
 
     # Activities
     path('activities/', views.manage_activities, name='dashboard-activities'),
@@ -27,6 +32,9 @@ urlpatterns = [
     # Documents
     path('documents/', views.manage_documents, name='dashboard-documents'),
 
+    # Exports (claims / patients / expenses)
+    path('export/<str:dataset>/', views.export_dataset, name='dashboard-export'),
+
     # Bed configuration
     path('bed-config/', views.manage_bed_config, name='dashboard-bed-config'),
 ]
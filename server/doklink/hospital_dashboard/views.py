@@ -3,6 +3,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.contrib.auth.hashers import make_password
+from django.core.handlers.asgi import ASGIRequest
 from django.utils import timezone
 
 from .models import (
@@ -21,8 +22,18 @@ from .serializers import (
     BedConfigurationSerializer,
 )
 from healthcare.models import Hospital
+from doklink.pagination import DEFAULT_PAGE_SIZE, InvalidCursor, paginate_desc, parse_page_size
+from .claim_analytics import claim_analytics
+from .exports import DATASETS, FORMATS, export_response
+from .imports import ImportFileError, build_bed, build_patient, import_beds, import_patients
+from .listing import InvalidFilter, apply_filters, list_response
+from .occupancy import get_occupancy
+from .search import DEFAULT_RESULTS, MAX_RESULTS, MIN_QUERY_LENGTH, search_patients
+from .sequences import next_uhid
+from .stats import with_stats
 
 import re
+from datetime import datetime
 
 
 def _get_hospital_code(hospital):
@@ -103,7 +114,7 @@ def list_hospitals(request):
     ).all()
 
     if role == 'SuperAdmin':
-        serializer = DashboardHospitalWithStatsSerializer(hospitals, many=True)
+        serializer = DashboardHospitalWithStatsSerializer(with_stats(hospitals), many=True)
     else:
         serializer = DashboardHospitalSerializer(hospitals, many=True)
 
@@ -300,29 +311,21 @@ def manage_beds(request):
         return Response({'error': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
 
     if request.method == 'GET':
-        beds = HospitalBed.objects.filter(hospital=hospital)
-        serializer = HospitalBedSerializer(beds, many=True)
-        return Response(serializer.data)
+        return list_response(
+            request, HospitalBed.objects.filter(hospital=hospital), HospitalBedSerializer,
+            sorts={'bedNumber': 'bed_number', 'createdAt': 'created_at', 'updatedAt': 'updated_at'},
+            default_sort='bedNumber',
+            filters={
+                'status': 'status', 'department': 'department', 'floor': 'floor',
+                'wing': 'wing', 'ward': 'ward', 'bedCategory': 'bed_category',
+            },
+        )
 
     elif request.method == 'POST':
         ser = CreateBedSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
-        d = ser.validated_data
-        equipment = d.get('equipment', {})
-
-        bed = HospitalBed.objects.create(
-            hospital=hospital,
-            bed_number=d['bedNumber'],
-            bed_category=d['bedCategory'],
-            department=d.get('department', 'NA'),
-            floor=d['floor'],
-            wing=d.get('wing', 'NA'),
-            daily_rate=d['dailyRate'],
-            status=d.get('status', 'available'),
-            has_monitor=equipment.get('hasMonitor', False),
-            has_oxygen=equipment.get('hasOxygen', False),
-            has_ventilator=equipment.get('hasVentilator', False),
-        )
+        bed = build_bed(hospital, ser.validated_data)
+        bed.save()
         return Response(HospitalBedSerializer(bed).data, status=status.HTTP_201_CREATED)
 
     elif request.method == 'PUT':
@@ -372,6 +375,24 @@ def manage_beds(request):
         return Response(HospitalBedSerializer(bed).data)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def bed_occupancy(request):
+    """Bed counts per status, category, department, floor and wing"""
+    hospital = _get_hospital_from_headers(request)
+    if not hospital:
+        return Response({'error': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    return Response(get_occupancy(hospital.id))
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def import_beds_file(request):
+    """Bulk-create beds from an uploaded CSV/XLSX (multipart field "file"; dryRun=true to validate only)"""
+    return _run_import(request, import_beds)
+
+
 # ============================================================
 # PATIENT MANAGEMENT
 # ============================================================
@@ -385,37 +406,27 @@ def manage_patients(request):
         return Response({'error': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
 
     if request.method == 'GET':
-        patients = HospitalPatient.objects.filter(hospital=hospital)
-        serializer = HospitalPatientSerializer(patients, many=True)
-        return Response(serializer.data)
+        return list_response(
+            request, HospitalPatient.objects.filter(hospital=hospital), HospitalPatientSerializer,
+            sorts={'createdAt': 'created_at', 'updatedAt': 'updated_at', 'name': 'name'},
+            default_sort='-createdAt',
+            filters={'status': 'status', 'gender': 'gender', 'uhid': 'uhid', 'assignedBed': 'assigned_bed'},
+            ranges={
+                'admittedFrom': ('admission_date', 'datetime_from'),
+                'admittedTo': ('admission_date', 'datetime_to'),
+                'dischargedFrom': ('discharge_date', 'datetime_from'),
+                'dischargedTo': ('discharge_date', 'datetime_to'),
+            },
+        )
 
     elif request.method == 'POST':
         ser = CreatePatientSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         d = ser.validated_data
 
-        patient = HospitalPatient.objects.create(
-            hospital=hospital,
-            uhid=d.get('uhid', ''),
-            name=d['name'],
-            age=d['age'],
-            gender=d['gender'],
-            phone=d['phone'],
-            email=d.get('email', ''),
-            address=d.get('address', ''),
-            blood_group=d.get('bloodGroup', ''),
-            emergency_contact=d['emergencyContact'],
-            allergies=d.get('allergies', ''),
-            medications=d.get('medications', ''),
-            diagnosis=d['diagnosis'],
-            assigned_bed=d.get('assignedBed', ''),
-            status=d.get('status', 'Admitted'),
-        )
         # Auto-generate UHID if not provided
-        if not patient.uhid:
-            patient.uhid = f"P{patient.id}"
-            patient.save(update_fields=['uhid'])
-
+        patient = build_patient(hospital, d, d.get('uhid') or next_uhid(hospital.id))
+        patient.save()
         # Auto-link to mobile app user by phone number
         _auto_link_patient_to_user(patient)
 
@@ -456,6 +467,33 @@ def manage_patients(request):
         return Response(HospitalPatientSerializer(patient).data)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def patient_search(request):
+    """Ranked search over name, UHID, phone and diagnosis: ?q=...&limit=N"""
+    hospital = _get_hospital_from_headers(request)
+    if not hospital:
+        return Response({'error': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    query = request.query_params.get('q', '').strip()
+    if len(query) < MIN_QUERY_LENGTH:
+        return Response(
+            {'error': f'Search query must be at least {MIN_QUERY_LENGTH} characters'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    limit = parse_page_size(request.query_params.get('limit'), DEFAULT_RESULTS, MAX_RESULTS)
+    patients = search_patients(hospital, query, limit)
+    return Response(HospitalPatientSerializer(patients, many=True).data)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def import_patients_file(request):
+    """Bulk-create patients from an uploaded CSV/XLSX (multipart field "file"; dryRun=true to validate only)"""
+    return _run_import(request, import_patients)
+
+
 # ============================================================
 # CLAIMS MANAGEMENT
 # ============================================================
@@ -469,9 +507,16 @@ def manage_claims(request):
         return Response({'error': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
 
     if request.method == 'GET':
-        claims = HospitalClaim.objects.filter(hospital=hospital)
-        serializer = InsuranceClaimSerializer(claims, many=True)
-        return Response(serializer.data)
+        return list_response(
+            request, HospitalClaim.objects.filter(hospital=hospital), InsuranceClaimSerializer,
+            sorts={'createdAt': 'created_at', 'updatedAt': 'updated_at', 'claimAmount': 'claim_amount'},
+            default_sort='-createdAt',
+            filters={'status': 'status', 'insurer': 'insurer', 'patientId': 'patient_id'},
+            ranges={
+                'submittedFrom': ('submission_date', 'date_from'),
+                'submittedTo': ('submission_date', 'date_to'),
+            },
+        )
 
     elif request.method == 'POST':
         data = request.data
@@ -525,6 +570,38 @@ def manage_claims(request):
         return Response(InsuranceClaimSerializer(claim).data)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def claims_analytics(request):
+    """
+    Approval rate, outstanding receivables and average settlement,
+    overall and by insurer / status / month.
+    Optional ?from=YYYY-MM&to=YYYY-MM&insurer=...
+    """
+    hospital = _get_hospital_from_headers(request)
+    if not hospital:
+        return Response({'error': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    months = {}
+    for param in ('from', 'to'):
+        value = request.query_params.get(param)
+        if value:
+            try:
+                months[param] = datetime.strptime(value, '%Y-%m').date()
+            except ValueError:
+                return Response(
+                    {'error': f"Invalid month '{value}', expected YYYY-MM"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+    return Response(claim_analytics(
+        hospital.id,
+        month_from=months.get('from'),
+        month_to=months.get('to'),
+        insurer=request.query_params.get('insurer'),
+    ))
+
+
 # ============================================================
 # ACTIVITIES
 # ============================================================
@@ -538,9 +615,26 @@ def manage_activities(request):
         return Response({'error': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
 
     if request.method == 'GET':
-        activities = HospitalActivity.objects.filter(hospital=hospital)[:50]
-        serializer = ActivityLogSerializer(activities, many=True)
-        return Response(serializer.data)
+        activities = HospitalActivity.objects.filter(hospital=hospital)
+        params = request.query_params
+
+        # Latest 50 as a plain array, unless the client pages with limit/cursor
+        if 'limit' not in params and 'cursor' not in params:
+            activities = activities.order_by('-time', '-id')[:DEFAULT_PAGE_SIZE]
+            return Response(ActivityLogSerializer(activities, many=True).data)
+
+        try:
+            activities, next_cursor = paginate_desc(
+                activities, 'time', params.get('cursor'), parse_page_size(params.get('limit'))
+            )
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'results': ActivityLogSerializer(activities, many=True).data,
+            'nextCursor': next_cursor,
+            'hasMore': next_cursor is not None,
+        })
 
     elif request.method == 'POST':
         data = request.data
@@ -566,9 +660,16 @@ def manage_documents(request):
         return Response({'error': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
 
     if request.method == 'GET':
-        documents = HospitalDocument.objects.filter(hospital=hospital)
-        serializer = PatientDocumentSerializer(documents, many=True)
-        return Response(serializer.data)
+        return list_response(
+            request, HospitalDocument.objects.filter(hospital=hospital), PatientDocumentSerializer,
+            sorts={'createdAt': 'created_at', 'name': 'name'},
+            default_sort='-createdAt',
+            filters={'type': 'doc_type', 'patientId': 'patient_id'},
+            ranges={
+                'dateFrom': ('date', 'date_from'),
+                'dateTo': ('date', 'date_to'),
+            },
+        )
 
     elif request.method == 'POST':
         data = request.data
@@ -655,6 +756,49 @@ def manage_bed_config(request):
         })
 
 
+# ============================================================
+# EXPORTS
+# ============================================================
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def export_dataset(request, dataset):
+    """
+    Stream claims / patients / expenses as CSV or NDJSON:
+    ?exportFormat=csv|ndjson&gzip=true plus the list endpoint's filters
+    """
+    hospital = _get_hospital_from_headers(request)
+    if not hospital:
+        return Response({'error': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    spec = DATASETS.get(dataset)
+    if spec is None:
+        return Response(
+            {'error': f"Unknown export '{dataset}'. Options: {', '.join(DATASETS)}"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    params = request.query_params
+    export_format = params.get('exportFormat', 'csv').lower()
+    if export_format not in FORMATS:
+        return Response(
+            {'error': f"Invalid exportFormat '{export_format}'. Options: {', '.join(FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        queryset = apply_filters(spec['queryset'](hospital), params, spec['filters'], spec['ranges'])
+    except InvalidFilter as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return export_response(
+        queryset, spec['columns'], export_format,
+        compress=params.get('gzip', '').lower() == 'true',
+        filename=dataset,
+        asynchronous=isinstance(request._request, ASGIRequest),
+    )
+
+
 # ============================================================
 # HELPERS
 # ============================================================
@@ -679,11 +823,31 @@ def _auto_link_patient_to_user(patient):
         pass  # Non-critical — notifications still work via phone matching
 
 
+def _run_import(request, importer):
+    hospital = _get_hospital_from_headers(request)
+    if not hospital:
+        return Response({'error': 'Unauthorized'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    upload = request.FILES.get('file')
+    if not upload:
+        return Response({'error': 'A CSV or XLSX file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    dry_run = str(request.data.get('dryRun', request.query_params.get('dryRun', ''))).lower() == 'true'
+    try:
+        return Response(importer(hospital, upload, dry_run=dry_run))
+    except ImportFileError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
 def _get_hospital_from_headers(request):
     """
     Extract hospital from the session headers set by NextAuth middleware.
     The Next.js middleware forwards x-hospital-id from the JWT token.
+    Normally already resolved by TenantMiddleware as request.hospital.
     """
+    if hasattr(request, 'hospital'):
+        return request.hospital
+
     hospital_id = request.headers.get('X-Hospital-Id', '')
     if not hospital_id:
         # Try from query param for direct Django API calls
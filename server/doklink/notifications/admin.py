@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PushToken, Notification
+from .models import PushToken, Notification, NotificationArchive
 
 
 @admin.register(PushToken)
@@ -17,3 +17,11 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'title', 'body']
     readonly_fields = ['created_at', 'updated_at']
     ordering = ['-created_at']
+
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    list_display = ['user_id', 'notification_type', 'title', 'created_at', 'archived_at']
+    list_filter = ['notification_type']
+    search_fields = ['title']
+    readonly_fields = ['archived_at']
@@ -0,0 +1,200 @@
+"""
+Broadcast notifications to a whole audience at once.
+
+Audiences are resolved to user ids with a single query, Notification rows are
+written with `bulk_create`, and delivery goes through the batched Expo sender
+instead of one `send_push_notification` call (and HTTP request) per user.
+
+Pushes are sent off the request path, like the app_auth outbox:
+
+- on a background pool once the rows commit
+  (NOTIFICATION_BROADCAST['DELIVER_ON_COMMIT']),
+- and/or by `python manage.py deliver_pushes`, which picks up pending rows a
+  crashed or disabled background sender left behind.
+
+Each batch is claimed before it is sent: the rows are locked with
+SKIP LOCKED and moved to 'sending', so the two senders never push the same
+notification twice. Rows that were not sent (no device, or Expo could not be
+reached) go back to 'pending' afterwards; a batch left 'sending' by a dead
+process is claimable again after SENDING_LEASE.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .events import publish_notifications
+from .models import Notification, PushToken
+from .push_service import send_push_batch
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_BATCH_SIZE = 1000
+SENDING_LEASE = timedelta(minutes=10)
+
+# One worker: broadcasts are delivered in order and never compete for Expo quota
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='push-broadcast')
+
+
+def hospital_patient_user_ids(hospital_id):
+    """App users currently admitted to a hospital (via linked_user)."""
+    from hospital_dashboard.models import HospitalPatient
+
+    return HospitalPatient.objects.filter(
+        hospital_id=hospital_id,
+        status='Admitted',
+        linked_user__isnull=False,
+    ).values_list('linked_user_id', flat=True).distinct()
+
+
+def insurance_holder_user_ids(insurer):
+    """App users holding an active policy with the given insurer."""
+    from healthcare.models import Insurance
+
+    return Insurance.objects.filter(
+        provider_name__iexact=insurer,
+        is_active=True,
+        user__is_active=True,
+    ).values_list('user_id', flat=True).distinct()
+
+
+def city_user_ids(city):
+    """App users whose current or permanent address is in the given city."""
+    from app_auth.models import UserProfile
+
+    return UserProfile.objects.filter(
+        Q(current_address__city__iexact=city) | Q(permanent_address__city__iexact=city),
+        user__is_active=True,
+    ).values_list('user_id', flat=True).distinct()
+
+
+def broadcast_notification(
+    user_ids,
+    title: str,
+    body: str,
+    notification_type: str = 'general',
+    data: dict = None,
+    hospital_name: str = '',
+) -> dict:
+    """
+    Create one notification per user in `user_ids` and queue their pushes.
+
+    1. Bulk-inserts all Notification rows in one transaction.
+    2. Publishes them to connected SSE clients in one Redis pipeline.
+    3. After commit, sends pushes in the background through `send_push_batch`
+       (one token query, 100 per request); rows stay 'pending' until then.
+
+    Returns the recipient count.
+    """
+    data = data or {}
+    user_ids = set(user_ids)
+
+    notifications = [
+        Notification(
+            user_id=user_id,
+            notification_type=notification_type,
+            title=title,
+            body=body,
+            data=data,
+            hospital_name=hospital_name,
+            status='pending',
+        )
+        for user_id in user_ids
+    ]
+
+    notifications = queue_notifications(notifications)
+
+    logger.info(f"Broadcast '{title}' queued for {len(notifications)} users")
+    return {'recipients': len(notifications)}
+
+
+def queue_notifications(notifications):
+    """
+    Bulk-insert unsaved Notification rows, publish them to SSE clients and
+    queue their pushes for after commit. Returns the saved rows.
+    """
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create(notifications, batch_size=BROADCAST_BATCH_SIZE)
+
+    # Like publish_new_notification: subscribers never see a row that may roll back
+    transaction.on_commit(lambda: publish_notifications(notifications))
+
+    if notifications and settings.NOTIFICATION_BROADCAST['DELIVER_ON_COMMIT']:
+        ids = [n.id for n in notifications]
+        transaction.on_commit(lambda: _executor.submit(_deliver_in_background, ids))
+    return notifications
+
+
+def _deliver_in_background(ids):
+    try:
+        deliver_notifications(ids)
+    except Exception as e:
+        logger.error(f"Background push delivery failed for {len(ids)} notifications: {e}")
+    finally:
+        close_old_connections()
+
+
+def _claimable(now):
+    """Pending rows, and rows a sender claimed but never finished."""
+    return Q(status='pending') | Q(status='sending', updated_at__lt=now - SENDING_LEASE)
+
+
+def claim_notifications(ids):
+    """
+    Lock the claimable rows among `ids` and move them to 'sending'.
+    Rows another sender holds are skipped. Returns the claimed rows.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        notifications = list(
+            Notification.objects.filter(_claimable(now), id__in=ids)
+            .order_by('id')
+            .select_for_update(skip_locked=True)
+        )
+        if notifications:
+            Notification.objects.filter(id__in=[n.id for n in notifications]).update(
+                status='sending', updated_at=now
+            )
+    return notifications
+
+
+def deliver_notifications(ids, batch_size=BROADCAST_BATCH_SIZE):
+    """Claim and send pushes for the given notifications in batches. Returns summed counts."""
+    totals = {'claimed': 0, 'sent': 0, 'failed': 0, 'retry': 0, 'noToken': 0}
+    for start in range(0, len(ids), batch_size):
+        batch = claim_notifications(ids[start:start + batch_size])
+        totals['claimed'] += len(batch)
+        try:
+            for key, count in send_push_batch(batch).items():
+                totals[key] += count
+        finally:
+            # Whatever was not marked sent / failed is released for a later attempt
+            Notification.objects.filter(id__in=[n.id for n in batch], status='sending').update(status='pending')
+    return totals
+
+
+def pending_push_ids(min_age, max_age):
+    """
+    Pending notifications created between `max_age` and `min_age` ago whose
+    user has an active device, i.e. pushes that were queued but never sent.
+    `min_age` leaves the background sender time to finish first.
+    """
+    now = timezone.now()
+    users_with_devices = PushToken.objects.filter(is_active=True).values('user_id')
+    return list(
+        Notification.objects.filter(
+            _claimable(now),
+            created_at__gte=now - max_age,
+            created_at__lte=now - min_age,
+            user_id__in=users_with_devices,
+        ).order_by('id').values_list('id', flat=True)
+    )
+
+
+def deliver_pending(min_age=timedelta(minutes=5), max_age=timedelta(hours=1), batch_size=BROADCAST_BATCH_SIZE):
+    """Deliver pushes left pending (see pending_push_ids). Returns summed counts."""
+    return deliver_notifications(pending_push_ids(min_age, max_age), batch_size)
@@ -0,0 +1,97 @@
+"""
+Real-time notification events over Redis pub/sub.
+
+Publishers (signals, views) push small JSON events to a per-user channel;
+the SSE stream in `notifications.stream` subscribes to that channel and
+forwards events to connected mobile clients.
+
+Publishing is best-effort: if Redis is down the notification is still in
+the DB and clients pick it up on their next `?since=` fetch.
+"""
+import json
+import logging
+
+from django.conf import settings
+
+from doklink.pagination import encode_cursor
+
+logger = logging.getLogger(__name__)
+
+
+def user_channel(user_id):
+    """Redis pub/sub channel carrying events for one user."""
+    return f"{settings.NOTIFICATION_STREAM['CHANNEL_PREFIX']}:{user_id}"
+
+
+def _publish(user_id, event):
+    try:
+        from django_redis import get_redis_connection
+        redis_conn = get_redis_connection("default")
+        redis_conn.publish(user_channel(user_id), json.dumps(event, default=str))
+    except Exception as e:
+        logger.warning(f"Notification event publish failed for user {user_id}: {e}")
+
+
+def publish_notification(notification, unread_count=None):
+    """Push a newly created notification (and the new badge count) to the user."""
+    from .serializers import NotificationSerializer
+
+    if unread_count is None:
+        unread_count = notification.user.notifications.filter(read=False).count()
+
+    _publish(notification.user_id, {
+        'event': 'notification',
+        'id': encode_cursor(notification.created_at, notification.id),
+        'data': {
+            'notification': NotificationSerializer(notification).data,
+            'unreadCount': unread_count,
+        },
+    })
+
+
+def publish_notifications(notifications):
+    """
+    Push many new notifications at once (e.g. a broadcast).
+    Unread counts come from one grouped query and events go out in one pipeline.
+    """
+    from django.db.models import Count
+    from .models import Notification
+    from .serializers import NotificationSerializer
+
+    if not notifications:
+        return
+
+    unread_counts = dict(
+        Notification.objects.filter(
+            user_id__in={n.user_id for n in notifications}, read=False
+        ).values('user_id').annotate(count=Count('id')).values_list('user_id', 'count')
+    )
+
+    try:
+        from django_redis import get_redis_connection
+        pipeline = get_redis_connection("default").pipeline(transaction=False)
+        for notification in notifications:
+            pipeline.publish(user_channel(notification.user_id), json.dumps({
+                'event': 'notification',
+                'id': encode_cursor(notification.created_at, notification.id),
+                'data': {
+                    'notification': NotificationSerializer(notification).data,
+                    'unreadCount': unread_counts.get(notification.user_id, 0),
+                },
+            }, default=str))
+        pipeline.execute()
+    except Exception as e:
+        logger.warning(f"Bulk notification event publish failed: {e}")
+
+
+def publish_unread_count(user_id, unread_count=None):
+    """Push the current unread badge count to the user."""
+    from .models import Notification
+
+    if unread_count is None:
+        unread_count = Notification.objects.filter(user_id=user_id, read=False).count()
+
+    _publish(user_id, {
+        'event': 'unread_count',
+        'data': {'unreadCount': unread_count},
+    })
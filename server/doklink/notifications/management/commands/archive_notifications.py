@@ -0,0 +1,134 @@
+"""
+Management command to archive old, read notifications and delete them in chunks.
+Run this periodically via cron job or scheduler, e.g. nightly:
+
+    python manage.py archive_notifications
+    python manage.py archive_notifications --days 30 --to-file /var/backups/notifications.jsonl.gz
+
+Rows are moved in small batches, each in its own transaction, so locks stay
+short and autovacuum can reclaim dead tuples between batches (--sleep).
+"""
+import gzip
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from notifications.models import Notification, NotificationArchive
+
+ARCHIVE_FIELDS = [
+    'id', 'user_id', 'notification_type', 'title', 'body', 'data',
+    'status', 'hospital_name', 'created_at',
+]
+
+
+class Command(BaseCommand):
+    help = 'Archive read notifications older than N days and delete them in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.AUDIT_SETTINGS.get('RETAIN_READ_NOTIFICATIONS_DAYS', 90),
+            help='Archive read notifications older than this many days (default: 90)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows moved per transaction (default: 5000)'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.5,
+            help='Seconds to pause between batches so vacuum can keep up (default: 0.5)'
+        )
+        parser.add_argument(
+            '--to-file',
+            help='Append to a gzip-compressed JSONL file instead of the archive table'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows would be archived'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        batch_size = options['batch_size']
+        candidates = Notification.objects.filter(read=True, created_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(
+                f'{candidates.count()} read notification(s) older than {options["days"]} days would be archived'
+            )
+            return
+
+        archive_file = gzip.open(options['to_file'], 'at', encoding='utf-8') if options['to_file'] else None
+        moved = 0
+        started = time.monotonic()
+
+        try:
+            while True:
+                with transaction.atomic():
+                    # Lock one batch; SKIP LOCKED lets concurrent runs share the work
+                    rows = list(
+                        candidates.order_by('id')
+                        .select_for_update(skip_locked=True)
+                        .values(*ARCHIVE_FIELDS)[:batch_size]
+                    )
+                    if not rows:
+                        break
+
+                    if archive_file:
+                        for row in rows:
+                            archive_file.write(json.dumps(row, default=str) + '\n')
+                        archive_file.flush()
+                    else:
+                        NotificationArchive.objects.bulk_create([
+                            NotificationArchive(
+                                original_id=row['id'],
+                                user_id=row['user_id'],
+                                notification_type=row['notification_type'],
+                                title=row['title'],
+                                body=row['body'],
+                                data=row['data'],
+                                status=row['status'],
+                                hospital_name=row['hospital_name'],
+                                created_at=row['created_at'],
+                            )
+                            for row in rows
+                        ])
+
+                    Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+
+                moved += len(rows)
+                elapsed = max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f'Archived {moved} notification(s) ({moved / elapsed:.0f} rows/s)'
+                )
+
+                if len(rows) < batch_size:
+                    break
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+        finally:
+            if archive_file:
+                archive_file.close()
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        if moved:
+            destination = options['to_file'] or NotificationArchive._meta.db_table
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Successfully archived {moved} notification(s) to {destination} '
+                    f'in {elapsed:.1f}s ({moved / elapsed:.0f} rows/s)'
+                )
+            )
+        else:
+            self.stdout.write('No notifications to archive')
@@ -0,0 +1,86 @@
+"""
+Management command to send broadcast pushes left pending, e.g. by a process
+that died before its background sender finished, or with
+NOTIFICATION_BROADCAST['DELIVER_ON_COMMIT'] disabled. Run it as a worker or
+periodically via cron job or scheduler:
+
+    python manage.py deliver_pushes --loop
+    python manage.py deliver_pushes --min-age 0     # no background sender running
+
+Only notifications whose user has an active device are picked up; the rest
+stay 'pending' as usual. Rows the background sender is still working on are
+skipped, and rows whose send failed to reach Expo are retried on the next poll.
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from notifications.broadcast import BROADCAST_BATCH_SIZE, deliver_pending
+
+
+class Command(BaseCommand):
+    help = 'Send pending broadcast push notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=300,
+            help='Only notifications at least this many seconds old, so the background sender finishes first (default: 300)'
+        )
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            default=60,
+            help='Skip notifications older than this many minutes; late pushes are worse than none (default: 60)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BROADCAST_BATCH_SIZE,
+            help=f'Notifications per token query / send batch (default: {BROADCAST_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling instead of exiting once pending pushes are sent'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=30.0,
+            help='Seconds between polls (with --loop, default: 30)'
+        )
+
+    def handle(self, *args, **options):
+        totals = {'claimed': 0, 'sent': 0, 'failed': 0, 'retry': 0, 'noToken': 0}
+
+        try:
+            while True:
+                result = deliver_pending(
+                    min_age=timedelta(seconds=options['min_age']),
+                    max_age=timedelta(minutes=options['max_age']),
+                    batch_size=options['batch_size'],
+                )
+                for key in totals:
+                    totals[key] += result[key]
+
+                if result['claimed']:
+                    self.stdout.write(
+                        f"Sent {result['sent']}, failed {result['failed']}, "
+                        f"{result['retry']} to retry of {result['claimed']} pending"
+                    )
+
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping push worker')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {totals['claimed']} notification(s): {totals['sent']} sent, "
+                f"{totals['failed']} failed, {totals['retry']} to retry, {totals['noToken']} without devices"
+            )
+        )
@@ -44,6 +44,7 @@ class Notification(models.Model):
 
     STATUS_CHOICES = [
         ('pending', 'Pending'),
+        ('sending', 'Sending'),  # Claimed by a broadcast sender (notifications.broadcast)
         ('sent', 'Sent'),
         ('delivered', 'Delivered'),
         ('failed', 'Failed'),
@@ -71,7 +72,37 @@ class Notification(models.Model):
             models.Index(fields=['user', 'read']),
             models.Index(fields=['user', 'notification_type']),
             models.Index(fields=['created_at']),
+            # Keyset pagination: WHERE user = ? AND (created_at, id) < cursor
+            models.Index(fields=['user', 'created_at', 'id']),
         ]
 
     def __str__(self):
         return f"{self.notification_type}: {self.title} → {self.user.username}"
+
+
+class NotificationArchive(models.Model):
+    """
+    Compact cold storage for old, read notifications moved out of Notification
+    by the `archive_notifications` command. No foreign keys and a single index,
+    so it stays cheap to append to and never slows the hot table.
+    """
+    original_id = models.BigIntegerField()
+    user_id = models.BigIntegerField()
+    notification_type = models.CharField(max_length=30)
+    title = models.CharField(max_length=300)
+    body = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=15)
+    hospital_name = models.CharField(max_length=300, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Archived Notification"
+        verbose_name_plural = "Archived Notifications"
+        indexes = [
+            models.Index(fields=['user_id', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"[archived] {self.notification_type}: {self.title} → user {self.user_id}"
@@ -7,14 +7,46 @@ to deliver push notifications to mobile app users.
 No third-party SDK required — just HTTP requests via `requests`.
 """
 import logging
+from collections import defaultdict
+
 import requests
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 from .models import PushToken, Notification
 
 logger = logging.getLogger(__name__)
 
 EXPO_PUSH_URL = 'https://exp.host/--/api/v2/push/send'
+EXPO_HEADERS = {
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
+    'Content-Type': 'application/json',
+}
+EXPO_BATCH_SIZE = 100  # Expo accepts at most 100 messages per request
+
+
+def _build_message(token, notification):
+    """Build one Expo push message for a Notification row."""
+    return {
+        'to': token,
+        'title': notification.title,
+        'body': notification.body,
+        'data': {
+            'notificationId': str(notification.id),
+            'type': notification.notification_type,
+            **notification.data,
+        },
+        'sound': 'default',
+        'priority': 'high',
+        'channelId': 'default',
+    }
+
+
+def _device_not_registered(ticket):
+    """Expo error ticket for an uninstalled app / expired token."""
+    details = ticket.get('details') or {}
+    return details.get('error') == 'DeviceNotRegistered' or 'DeviceNotRegistered' in ticket.get('message', '')
 
 
 def send_push_notification(
@@ -58,31 +90,13 @@ def send_push_notification(
         return notification
 
     # Build Expo push messages (one per token)
-    messages = []
-    for token in tokens:
-        messages.append({
-            'to': token,
-            'title': title,
-            'body': body,
-            'data': {
-                'notificationId': str(notification.id),
-                'type': notification_type,
-                **data,
-            },
-            'sound': 'default',
-            'priority': 'high',
-            'channelId': 'default',
-        })
+    messages = [_build_message(token, notification) for token in tokens]
 
     try:
         response = requests.post(
             EXPO_PUSH_URL,
             json=messages,
-            headers={
-                'Accept': 'application/json',
-                'Accept-Encoding': 'gzip, deflate',
-                'Content-Type': 'application/json',
-            },
+            headers=EXPO_HEADERS,
             timeout=10,
         )
 
@@ -93,8 +107,7 @@ def send_push_notification(
             # Check for individual ticket errors (invalid tokens)
             for i, ticket in enumerate(ticket_data):
                 if ticket.get('status') == 'error':
-                    error_msg = ticket.get('message', '')
-                    if 'DeviceNotRegistered' in error_msg:
+                    if _device_not_registered(ticket):
                         # Deactivate invalid token
                         PushToken.objects.filter(token=tokens[i]).update(is_active=False)
                         logger.warning(f"Deactivated invalid push token: {tokens[i][:30]}...")
@@ -115,6 +128,88 @@ def send_push_notification(
     return notification
 
 
+def send_push_batch(notifications) -> dict:
+    """
+    Deliver many already-saved Notification rows with as few calls as possible.
+
+    1. Resolves active push tokens for every recipient in one query.
+    2. Sends messages in chunks of 100 over one pooled HTTP session.
+    3. Updates Notification statuses and deactivates dead tokens in bulk.
+
+    Status comes from Expo's per-message tickets: a notification is 'sent'
+    if any of its devices got an 'ok' ticket, otherwise 'failed'.
+    Notifications whose user has no active token, or whose request to Expo
+    failed outright, keep their status so the caller can retry them.
+    Returns counts of sent / failed / retry / no-token rows.
+    """
+    if not notifications:
+        return {'sent': 0, 'failed': 0, 'retry': 0, 'noToken': 0}
+
+    tokens_by_user = defaultdict(list)
+    for user_id, token in PushToken.objects.filter(
+        user_id__in={n.user_id for n in notifications}, is_active=True
+    ).values_list('user_id', 'token'):
+        tokens_by_user[user_id].append(token)
+
+    messages = []
+    owners = []  # Notification id for each message, index-aligned
+    for notification in notifications:
+        for token in tokens_by_user.get(notification.user_id, ()):
+            messages.append(_build_message(token, notification))
+            owners.append(notification.id)
+
+    sent_ids, failed_ids, retry_ids, dead_tokens = set(), set(), set(), []
+
+    with requests.Session() as session:
+        for start in range(0, len(messages), EXPO_BATCH_SIZE):
+            chunk = messages[start:start + EXPO_BATCH_SIZE]
+            chunk_owners = owners[start:start + EXPO_BATCH_SIZE]
+            try:
+                response = session.post(EXPO_PUSH_URL, json=chunk, headers=EXPO_HEADERS, timeout=10)
+            except requests.RequestException as e:
+                retry_ids.update(chunk_owners)
+                logger.error(f"Batch push request failed: {e}")
+                continue
+
+            if response.status_code != 200:
+                retry_ids.update(chunk_owners)
+                logger.error(f"Expo batch push failed ({response.status_code}): {response.text}")
+                continue
+
+            try:
+                tickets = response.json().get('data', [])
+            except ValueError:
+                tickets = []
+            # One ticket per message, in order; a missing ticket counts as a failure
+            for i, (message, owner) in enumerate(zip(chunk, chunk_owners)):
+                ticket = tickets[i] if i < len(tickets) else {}
+                if ticket.get('status') == 'ok':
+                    sent_ids.add(owner)
+                    continue
+                failed_ids.add(owner)
+                if _device_not_registered(ticket):
+                    dead_tokens.append(message['to'])
+
+    # A user with several devices counts as sent if any device accepted it
+    failed_ids -= sent_ids
+    retry_ids -= sent_ids | failed_ids
+    now = timezone.now()
+    if sent_ids:
+        Notification.objects.filter(id__in=sent_ids).update(status='sent', updated_at=now)
+    if failed_ids:
+        Notification.objects.filter(id__in=failed_ids).update(status='failed', updated_at=now)
+    if dead_tokens:
+        PushToken.objects.filter(token__in=dead_tokens).update(is_active=False)
+        logger.warning(f"Deactivated {len(dead_tokens)} invalid push tokens")
+
+    no_token = len(notifications) - len(sent_ids) - len(failed_ids) - len(retry_ids)
+    logger.info(
+        f"Batch push: {len(sent_ids)} sent, {len(failed_ids)} failed, "
+        f"{len(retry_ids)} to retry, {no_token} without tokens"
+    )
+    return {'sent': len(sent_ids), 'failed': len(failed_ids), 'retry': len(retry_ids), 'noToken': no_token}
+
+
 def send_push_to_user_by_phone(
     phone_number: str,
     title: str,
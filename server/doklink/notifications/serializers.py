@@ -21,3 +21,30 @@ class NotificationSerializer(serializers.ModelSerializer):
             'status', 'read', 'hospitalName', 'createdAt',
         ]
         read_only_fields = ['id', 'createdAt']
+
+
+class BroadcastSerializer(serializers.Serializer):
+    """Broadcast a notification to an audience (camelCase, from the dashboard)."""
+    TARGET_CHOICES = ['hospital_patients', 'insurance_holders', 'city']
+
+    target = serializers.ChoiceField(choices=TARGET_CHOICES)
+    title = serializers.CharField(max_length=300)
+    body = serializers.CharField()
+    notificationType = serializers.ChoiceField(
+        choices=[choice[0] for choice in Notification.NOTIFICATION_TYPE_CHOICES],
+        default='general',
+    )
+    data = serializers.DictField(required=False, default=dict)
+    hospitalId = serializers.IntegerField(required=False)
+    insurer = serializers.CharField(max_length=200, required=False)
+    city = serializers.CharField(max_length=100, required=False)
+
+    def validate(self, attrs):
+        required = {
+            'hospital_patients': 'hospitalId',
+            'insurance_holders': 'insurer',
+            'city': 'city',
+        }[attrs['target']]
+        if not attrs.get(required):
+            raise serializers.ValidationError({required: f'{required} is required for this target'})
+        return attrs
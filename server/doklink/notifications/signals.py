@@ -2,8 +2,10 @@
 Django signals to:
 1. Sync HospitalBed changes → Hospital aggregate bed counts (for mobile app).
 2. Send push notifications on authoritative hospital dashboard actions.
+3. Publish new notifications to the real-time SSE stream.
 """
 import logging
+from django.db import transaction
 from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from django.db.models import Q
@@ -12,6 +14,7 @@ from hospital_dashboard.models import (
     HospitalBed, HospitalPatient, HospitalClaim, HospitalActivity
 )
 from healthcare.models import Hospital
+from .models import Notification
 
 logger = logging.getLogger(__name__)
 
@@ -26,15 +29,23 @@ def sync_hospital_bed_counts(sender, instance, **kwargs):
     After any HospitalBed is saved, recalculate the aggregate
     bed counts on the shared Hospital model so the mobile app
     sees accurate availability.
-
-    Mapping:
-    - bed_category containing 'icu' (case-insensitive) → ICU beds
-    - everything else → General beds
     """
     hospital = instance.hospital
     if not hospital:
         return
 
+    sync_bed_counts(hospital)
+
+
+def sync_bed_counts(hospital):
+    """
+    Recalculate a hospital's aggregate bed counts from its HospitalBeds.
+    Also called directly after bulk bed changes, which skip post_save.
+
+    Mapping:
+    - bed_category containing 'icu' (case-insensitive) → ICU beds
+    - everything else → General beds
+    """
     beds = HospitalBed.objects.filter(hospital=hospital)
 
     # ICU beds = any bed whose category contains 'icu' (case-insensitive)
@@ -78,17 +89,7 @@ def notify_patient_status_change(sender, instance, created, **kwargs):
     if created and instance.status == 'Admitted':
         send_push_to_user_by_phone(
             phone_number=instance.phone,
-            title='Hospital Admission Confirmed',
-            body=f'You have been admitted to {hospital_name}. '
-                 f'Diagnosis: {instance.diagnosis or "N/A"}. '
-                 f'Bed: {instance.assigned_bed or "Pending assignment"}.',
-            notification_type='admission',
-            data={
-                'patientId': str(instance.id),
-                'hospitalId': str(instance.hospital_id),
-                'screen': 'Dashboard',
-            },
-            hospital_name=hospital_name,
+            **admission_message(instance, hospital_name),
         )
     elif not created and instance.status == 'Discharged':
         send_push_to_user_by_phone(
@@ -106,6 +107,23 @@ def notify_patient_status_change(sender, instance, created, **kwargs):
         )
 
 
+def admission_message(patient, hospital_name):
+    """Notification fields for a patient's admission push (also used by bulk imports)."""
+    return {
+        'title': 'Hospital Admission Confirmed',
+        'body': f'You have been admitted to {hospital_name}. '
+                f'Diagnosis: {patient.diagnosis or "N/A"}. '
+                f'Bed: {patient.assigned_bed or "Pending assignment"}.',
+        'notification_type': 'admission',
+        'data': {
+            'patientId': str(patient.id),
+            'hospitalId': str(patient.hospital_id),
+            'screen': 'Dashboard',
+        },
+        'hospital_name': hospital_name,
+    }
+
+
 # Track bed assignment changes for notifications
 _bed_patient_cache = {}
 
@@ -235,3 +253,20 @@ def notify_claim_status_change(sender, instance, created, **kwargs):
                 },
                 hospital_name=hospital_name,
             )
+
+
+# ============================================================
+# 3. REAL-TIME STREAM: publish new notifications to SSE clients
+# ============================================================
+
+@receiver(post_save, sender=Notification)
+def publish_new_notification(sender, instance, created, **kwargs):
+    """
+    Push newly created notifications to the user's SSE stream.
+    Deferred to commit so subscribers never see a row they cannot fetch.
+    """
+    if not created:
+        return
+
+    from notifications.events import publish_notification
+    transaction.on_commit(lambda: publish_notification(instance))
@@ -0,0 +1,185 @@
+"""
+Server-Sent Events stream for mobile notifications.
+
+GET /api/v1/notifications/stream/ keeps one long-lived HTTP response open per
+app instance and pushes `notification` and `unread_count` events as they are
+published to Redis (see `notifications.events`), replacing the polling of
+`notifications/` and `notifications/unread-count/`.
+
+This is an async view: it must be served by the ASGI application in
+`doklink.asgi` (uvicorn / daphne) so an idle connection costs a coroutine,
+not a worker thread.
+
+Authentication: `Authorization: Bearer <access>` or, for EventSource clients
+that cannot set headers, `?token=<access>`.
+
+Reconnects: every notification event carries an `id:` that is a
+`doklink.pagination` cursor. On reconnect the client sends it back as
+`Last-Event-ID` (or `?since=`) and missed notifications are replayed from
+the DB before live events resume.
+"""
+import asyncio
+import json
+import logging
+
+import redis.asyncio as aioredis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from app_auth.authentication import CachedJWTAuthentication
+from doklink.pagination import InvalidCursor, encode_cursor, paginate_since, MAX_PAGE_SIZE
+from .events import user_channel
+from .models import Notification
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+# Shared across connections in this process; redis-py pools the sockets.
+_redis_client = None
+
+
+def _get_redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = aioredis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+
+def _authenticate(request):
+    """Resolve the user from a Bearer header or ?token=, or None."""
+    auth = CachedJWTAuthentication()
+    raw_token = request.GET.get('token')
+    try:
+        if raw_token:
+            validated = auth.get_validated_token(raw_token.encode())
+            return auth.get_user(validated)
+        result = auth.authenticate(request)
+        return result[0] if result else None
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+def _replay_since(user, cursor):
+    """Notifications created after `cursor` (oldest first), unread count, has_more."""
+    rows, _, has_more = paginate_since(
+        Notification.objects.filter(user=user), 'created_at', cursor, MAX_PAGE_SIZE
+    )
+    unread = Notification.objects.filter(user=user, read=False).count()
+    missed = [
+        (encode_cursor(row.created_at, row.id), NotificationSerializer(row).data)
+        for row in rows
+    ]
+    return missed, unread, has_more
+
+
+def _format_event(event, data, event_id=None):
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _event_stream(user, since):
+    config = settings.NOTIFICATION_STREAM
+    heartbeat = config['HEARTBEAT_SECONDS']
+    queue = asyncio.Queue(maxsize=config['MAX_QUEUED_EVENTS'])
+    overflowed = asyncio.Event()
+
+    pubsub = _get_redis().pubsub()
+    try:
+        await pubsub.subscribe(user_channel(user.id))
+    except Exception as e:
+        # Client reconnects after `retry` and can poll in the meantime.
+        logger.error(f"Notification stream subscribe failed for user {user.id}: {e}")
+        yield f"retry: {config['RETRY_MILLISECONDS']}\n\n"
+        return
+
+    async def reader():
+        # Drain Redis independently of how fast the client reads. If the
+        # client falls behind we stop queueing and tell it to resync from
+        # the DB instead of buffering without bound.
+        async for message in pubsub.listen():
+            if message.get('type') != 'message':
+                continue
+            if overflowed.is_set():
+                continue
+            try:
+                queue.put_nowait(json.loads(message['data']))
+            except asyncio.QueueFull:
+                overflowed.set()
+
+    reader_task = asyncio.create_task(reader())
+    try:
+        yield f"retry: {config['RETRY_MILLISECONDS']}\n\n"
+
+        # Subscribe first, then replay, so nothing falls in between.
+        if since:
+            try:
+                missed, unread, has_more = await sync_to_async(_replay_since)(user, since)
+            except InvalidCursor:
+                yield _format_event('resync', {})
+            else:
+                for event_id, item in missed:
+                    yield _format_event(
+                        'notification', {'notification': item, 'unreadCount': unread}, event_id
+                    )
+                yield _format_event('unread_count', {'unreadCount': unread})
+                if has_more:
+                    # Too far behind to replay here; let the client page via the list API.
+                    yield _format_event('resync', {})
+
+        while True:
+            if reader_task.done():
+                # Redis connection lost; end the stream so the client reconnects.
+                break
+
+            if overflowed.is_set():
+                # Collapse everything we dropped into one instruction.
+                while not queue.empty():
+                    queue.get_nowait()
+                overflowed.clear()
+                yield _format_event('resync', {})
+                continue
+
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+
+            # Only the latest badge count matters; skip stale ones.
+            if event['event'] == 'unread_count' and not queue.empty():
+                continue
+
+            yield _format_event(event['event'], event['data'], event.get('id'))
+    finally:
+        reader_task.cancel()
+        try:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+        except Exception as e:
+            logger.warning(f"Notification stream cleanup failed for user {user.id}: {e}")
+
+
+@require_GET
+async def notification_stream(request):
+    """Stream notification and unread-count events to the authenticated user."""
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    since = request.headers.get('Last-Event-ID') or request.GET.get('since')
+
+    response = StreamingHttpResponse(
+        _event_stream(user, since),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable nginx proxy buffering
+    return response
@@ -0,0 +1,99 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .broadcast import SENDING_LEASE, claim_notifications, deliver_notifications, queue_notifications
+from .models import Notification, PushToken
+
+
+def _no_background_delivery():
+    from django.conf import settings
+    return override_settings(NOTIFICATION_BROADCAST={**settings.NOTIFICATION_BROADCAST, 'DELIVER_ON_COMMIT': False})
+
+
+@_no_background_delivery()
+class BroadcastDeliveryTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(f'user{i}', f'user{i}@example.com', 'Pass-123-word') for i in range(3)]
+        for user in self.users[:2]:
+            PushToken.objects.create(user=user, token=f'ExponentPushToken[{user.id}]')
+        self.notifications = Notification.objects.bulk_create([
+            Notification(user=user, notification_type='general', title='Hello', body='', status='pending')
+            for user in self.users
+        ])
+        self.ids = [n.id for n in self.notifications]
+
+    def _statuses(self):
+        return list(Notification.objects.filter(id__in=self.ids).order_by('id').values_list('status', flat=True))
+
+    def test_claimed_rows_are_not_claimed_again(self):
+        self.assertEqual(len(claim_notifications(self.ids)), 3)
+        self.assertEqual(self._statuses(), ['sending'] * 3)
+        self.assertEqual(claim_notifications(self.ids), [])
+
+        # ...until the claim outlives its lease
+        Notification.objects.filter(id=self.ids[0]).update(updated_at=timezone.now() - SENDING_LEASE * 2)
+        self.assertEqual([n.id for n in claim_notifications(self.ids)], [self.ids[0]])
+
+    @mock.patch('notifications.broadcast.send_push_batch')
+    def test_unsent_rows_go_back_to_pending(self, send):
+        def send_first(batch):
+            Notification.objects.filter(id=batch[0].id).update(status='sent')
+            return {'sent': 1, 'failed': 0, 'retry': 1, 'noToken': 1}
+        send.side_effect = send_first
+
+        result = deliver_notifications(self.ids)
+
+        self.assertEqual(result, {'claimed': 3, 'sent': 1, 'failed': 0, 'retry': 1, 'noToken': 1})
+        self.assertEqual(self._statuses(), ['sent', 'pending', 'pending'])
+
+    @mock.patch('notifications.broadcast.send_push_batch', side_effect=RuntimeError('boom'))
+    def test_a_failed_send_releases_the_batch(self, send):
+        with self.assertRaises(RuntimeError):
+            deliver_notifications(self.ids)
+
+        self.assertEqual(self._statuses(), ['pending'] * 3)
+
+    @mock.patch('requests.Session.post')
+    def test_unreachable_expo_is_retried_not_failed(self, post):
+        import requests
+        post.side_effect = requests.ConnectionError('down')
+
+        result = deliver_notifications(self.ids)
+
+        self.assertEqual((result['retry'], result['noToken']), (2, 1))
+        self.assertEqual(self._statuses(), ['pending'] * 3)
+
+    @mock.patch('notifications.broadcast.publish_notifications')
+    def test_publish_waits_for_the_outer_transaction(self, publish):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                queue_notifications([Notification(user=self.users[0], notification_type='general', title='Hi', body='')])
+                publish.assert_not_called()
+
+        publish.assert_called_once()
+
+
+class ListNotificationsTests(TestCase):
+    def setUp(self):
+        throttle = mock.patch('doklink.throttling.RedisRateThrottleMixin.allow_request', return_value=True)
+        throttle.start()
+        self.addCleanup(throttle.stop)
+        self.user = User.objects.create_user('inbox', 'inbox@example.com', 'Pass-123-word')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_empty_inbox_can_start_polling(self):
+        response = self.client.get('/api/v1/notifications/')
+        self.assertEqual(response.data['notifications'], [])
+        latest = response.data['latestCursor']
+        self.assertIsNotNone(latest)
+
+        notification = Notification.objects.create(user=self.user, notification_type='general', title='First', body='')
+
+        response = self.client.get('/api/v1/notifications/', {'since': latest})
+        self.assertEqual([n['id'] for n in response.data['notifications']], [notification.id])
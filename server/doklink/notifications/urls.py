@@ -1,5 +1,6 @@
 from django.urls import path
 from . import views
+from .stream import notification_stream
 
 urlpatterns = [
     # Push token management
@@ -10,4 +11,10 @@ urlpatterns = [
     path('', views.list_notifications, name='notifications-list'),
     path('mark-read/', views.mark_notification_read, name='notification-mark-read'),
     path('unread-count/', views.unread_count, name='notification-unread-count'),
+
+    # Audience broadcasts from the hospital dashboard
+    path('broadcast/', views.broadcast, name='notification-broadcast'),
+
+    # Real-time Server-Sent Events (ASGI only)
+    path('stream/', notification_stream, name='notification-stream'),
 ]
@@ -1,10 +1,21 @@
+import hmac
+
+from django.conf import settings
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
 from .models import PushToken, Notification
-from .serializers import PushTokenSerializer, NotificationSerializer
+from .serializers import PushTokenSerializer, NotificationSerializer, BroadcastSerializer
+from .broadcast import (
+    broadcast_notification, hospital_patient_user_ids,
+    insurance_holder_user_ids, city_user_ids,
+)
+from .events import publish_unread_count
+from doklink.pagination import (
+    InvalidCursor, encode_cursor, initial_cursor, paginate_desc, paginate_since, parse_page_size,
+)
 
 
 @api_view(['POST'])
@@ -61,8 +72,14 @@ def unregister_push_token(request):
 @permission_classes([IsAuthenticated])
 def list_notifications(request):
     """
-    Get all notifications for the authenticated user.
-    Supports ?unread_only=true query param.
+    Get notifications for the authenticated user, newest first.
+
+    Query params:
+    - unread_only=true   only unread notifications
+    - limit=N            page size (default 50, max 100)
+    - cursor=<token>     continue with older notifications (from nextCursor)
+    - since=<token>      only notifications newer than this (from latestCursor),
+                         for cheap incremental polling
     """
     queryset = Notification.objects.filter(user=request.user)
 
@@ -70,7 +87,32 @@ def list_notifications(request):
     if unread_only:
         queryset = queryset.filter(read=False)
 
-    notifications = queryset[:50]  # Limit to 50 most recent
+    limit = parse_page_size(request.query_params.get('limit'))
+    cursor = request.query_params.get('cursor')
+    since = request.query_params.get('since')
+
+    try:
+        if since:
+            notifications, latest_cursor, has_more = paginate_since(
+                queryset, 'created_at', since, limit
+            )
+            notifications.reverse()  # Keep newest-first like the history view
+            next_cursor = None
+        else:
+            notifications, next_cursor = paginate_desc(
+                queryset, 'created_at', cursor, limit
+            )
+            has_more = next_cursor is not None
+            # Only the first page knows the newest row to poll from; an empty
+            # one polls from the start so the first notification is not missed
+            latest_cursor = None
+            if notifications and not cursor:
+                latest_cursor = encode_cursor(notifications[0].created_at, notifications[0].id)
+            elif not cursor:
+                latest_cursor = initial_cursor()
+    except InvalidCursor as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
     serializer = NotificationSerializer(notifications, many=True)
 
     unread_count = Notification.objects.filter(user=request.user, read=False).count()
@@ -78,6 +120,9 @@ def list_notifications(request):
     return Response({
         'notifications': serializer.data,
         'unreadCount': unread_count,
+        'nextCursor': next_cursor,
+        'latestCursor': latest_cursor,
+        'hasMore': has_more,
     })
 
 
@@ -95,6 +140,7 @@ def mark_notification_read(request):
         updated = Notification.objects.filter(
             user=request.user, read=False
         ).update(read=True)
+        publish_unread_count(request.user.id, 0)
         return Response({'success': True, 'message': f'{updated} notifications marked as read'})
 
     if not notification_id:
@@ -104,6 +150,7 @@ def mark_notification_read(request):
         notification = Notification.objects.get(id=notification_id, user=request.user)
         notification.read = True
         notification.save(update_fields=['read', 'updated_at'])
+        publish_unread_count(request.user.id)
         return Response({'success': True})
     except Notification.DoesNotExist:
         return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -115,3 +162,75 @@ def unread_count(request):
     """Quick endpoint for badge count."""
     count = Notification.objects.filter(user=request.user, read=False).count()
     return Response({'unreadCount': count})
+
+
+def _broadcast_role(request):
+    """
+    Role a broadcast runs as, or None if the caller may not broadcast.
+
+    A Django staff user (JWT) is a SuperAdmin. Otherwise the dashboard's
+    X-User-Role header is only trusted alongside the shared
+    NOTIFICATION_BROADCAST secret in X-Broadcast-Secret.
+    """
+    if request.user and request.user.is_authenticated and request.user.is_staff:
+        return 'SuperAdmin'
+
+    secret = settings.NOTIFICATION_BROADCAST['SECRET']
+    presented = request.headers.get('X-Broadcast-Secret', '')
+    if not secret or not hmac.compare_digest(presented.encode(), secret.encode()):
+        return None
+
+    role = request.headers.get('X-User-Role', '')
+    return role if role in ('SuperAdmin', 'HospitalAdmin') else None
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def broadcast(request):
+    """
+    Broadcast a notification from the hospital dashboard.
+
+    Callers are Django staff users, or the dashboard backend sending the
+    shared secret (X-Broadcast-Secret) with the same X-User-Role /
+    X-Hospital-Id headers as the dashboard API.
+
+    - HospitalAdmin: only to patients admitted to their own hospital.
+    - SuperAdmin: any hospital's patients, insurance holders or a city.
+    """
+    role = _broadcast_role(request)
+    if role is None:
+        return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+    serializer = BroadcastSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    d = serializer.validated_data
+
+    hospital_name = ''
+    if d['target'] == 'hospital_patients':
+        from healthcare.models import Hospital
+
+        hospital_id = d['hospitalId']
+        if role == 'HospitalAdmin' and str(hospital_id) != request.headers.get('X-Hospital-Id', ''):
+            return Response({'error': 'Cannot broadcast to other hospitals'}, status=status.HTTP_403_FORBIDDEN)
+        hospital_name = Hospital.objects.filter(id=hospital_id).values_list('name', flat=True).first()
+        if hospital_name is None:
+            return Response({'error': 'Hospital not found'}, status=status.HTTP_404_NOT_FOUND)
+        user_ids = hospital_patient_user_ids(hospital_id)
+    elif role != 'SuperAdmin':
+        return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+    elif d['target'] == 'insurance_holders':
+        user_ids = insurance_holder_user_ids(d['insurer'])
+    else:
+        user_ids = city_user_ids(d['city'])
+
+    result = broadcast_notification(
+        user_ids=user_ids,
+        title=d['title'],
+        body=d['body'],
+        notification_type=d['notificationType'],
+        data=d['data'],
+        hospital_name=hospital_name,
+    )
+
+    # Pushes go out in the background; rows move from 'pending' as Expo answers
+    return Response({'success': True, 'queued': True, **result}, status=status.HTTP_202_ACCEPTED)